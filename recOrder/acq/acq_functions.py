@@ -1,10 +1,10 @@
 import numpy as np
 import json
-import os
-from waveorder.io.reader import WaveorderReader
-import time
-import glob
 from pycromanager import Studio
+from recOrder.acq.image_sources import Frame, AcquisitionBuffer
+
+# dtypes of the grayscale images of MM, by their bytes per pixel
+PIXEL_DTYPES = {1: "uint8", 2: "uint16"}
 
 
 def generate_acq_settings(
@@ -117,13 +117,66 @@ def generate_acq_settings(
     return original_json
 
 
-def acquire_from_settings(
+def acquisition_shape(settings: dict):
+    """Number of timepoints, channels and slices of an MDA acquisition.
+
+    Parameters
+    ----------
+    settings : dict
+        JSON dictionary conforming to MM SequenceSettings
+
+    Returns
+    -------
+    tuple
+        (T, C, Z)
+    """
+    n_frames = settings["numFrames"] if settings.get("useFrames") else 1
+    n_channels = (
+        len(settings["channels"]) if settings.get("useChannels") else 1
+    )
+    n_slices = len(settings["slices"]) if settings.get("useSlices") else 1
+
+    return max(1, n_frames), max(1, n_channels), max(1, n_slices)
+
+
+def datastore_frames(mm: Studio, datastore, shape: tuple):
+    """Frames of a single position acquisition read from its MM Datastore.
+
+    Parameters
+    ----------
+    mm : Studio
+    datastore : Datastore
+        datastore returned by the MM acquisition engine
+    shape : tuple
+        (T, C, Z) of the acquisition
+
+    Yields
+    ------
+    Frame
+        (p, t, c, z, image) of every acquired image
+    """
+    for t, c, z in np.ndindex(*shape):
+        coords = (
+            mm.data().createCoordsBuilder().t(t).c(c).z(z).p(0).build()
+        )
+        image = datastore.getImage(coords)
+        if image is None:
+            continue
+        pixels = np.asarray(image.getRawPixels()).reshape(
+            image.getHeight(), image.getWidth()
+        )
+        yield Frame(0, t, c, z, pixels)
+
+
+def acquire_to_buffer(
     mm: Studio,
     settings: dict,
-    grab_images: bool = True,
     restore_settings: bool = True,
+    max_ram_bytes: int = None,
 ):
-    """Function to acquire an MDA acquisition with the native MM MDA Engine.
+    """Function to acquire an MDA acquisition with the native MM MDA Engine
+    into an AcquisitionBuffer, images are taken from the Datastore of the
+    acquisition instead of being re-read from its files.
     Assumes single position acquisition.
 
     Parameters
@@ -131,36 +184,88 @@ def acquire_from_settings(
     mm : Studio
     settings : dict
         JSON dictionary conforming to MM SequenceSettings
-    grab_images : bool, optional
-        return the acquired array, by default True
     restore_settings : bool, optional
         restore MDA settings before acquisition, by default True
+    max_ram_bytes : int, optional
+        largest buffer held in RAM, larger buffers are file-backed,
+        by default a fraction of the free RAM
 
     Returns
     -------
-    NDArray
-        acquired images
+    AcquisitionBuffer
+        context-managed buffer of the acquired (T, C, Z, Y, X) images
     """
     am = mm.getAcquisitionManager()
     ss = am.getAcquisitionSettings()
 
+    # blocks until the acquisition is finished
     ss_new = ss.fromJSONStream(json.dumps(settings))
-    am.runAcquisitionWithSettings(ss_new, True)
-
-    time.sleep(3)
+    datastore = am.runAcquisitionWithSettings(ss_new, True)
 
     if restore_settings:
         am.setAcquisitionSettings(ss)
 
-    # TODO: speed improvements in reading the data with pycromanager acquisition?
-    if grab_images:
-        # get the most recent acquisition if multiple
-        path = os.path.join(settings["root"], settings["prefix"])
-        files = glob.glob(path + "*")
-        index = max([int(x.split(path + "_")[1]) for x in files])
+    shape = acquisition_shape(settings)
+    first = datastore.getAnyImage()
+    if first is None:
+        raise RuntimeError("The acquisition returned no images")
+    bytes_per_pixel = first.getBytesPerPixel()
+    if bytes_per_pixel not in PIXEL_DTYPES:
+        raise ValueError(
+            f"Images of {bytes_per_pixel} bytes per pixel are not supported, "
+            f"only grayscale images of {list(PIXEL_DTYPES)} bytes per pixel"
+        )
+    dtype = PIXEL_DTYPES[bytes_per_pixel]
 
-        reader = WaveorderReader(
-            path + f"_{index}", "ometiff", extract_data=True
+    buffer = AcquisitionBuffer(
+        shape + (first.getHeight(), first.getWidth()),
+        dtype=dtype,
+        max_ram_bytes=max_ram_bytes,
+    )
+    if not buffer.fill(datastore_frames(mm, datastore, shape)):
+        buffer.close()
+        raise RuntimeError(
+            f"The acquisition returned {buffer.n_received} of "
+            f"{int(np.prod(shape))} images"
         )
 
-        return reader.get_array(0)
+    return buffer
+
+
+def acquire_from_settings(
+    mm: Studio,
+    settings: dict,
+    grab_images: bool = True,
+    restore_settings: bool = True,
+):
+    """Function to acquire an MDA acquisition with the native MM MDA Engine.
+    Assumes single position acquisition.
+
+    Parameters
+    ----------
+    mm : Studio
+    settings : dict
+        JSON dictionary conforming to MM SequenceSettings
+    grab_images : bool, optional
+        return the acquired array, by default True
+    restore_settings : bool, optional
+        restore MDA settings before acquisition, by default True
+
+    Returns
+    -------
+    NDArray
+        acquired images
+    """
+    if not grab_images:
+        am = mm.getAcquisitionManager()
+        ss = am.getAcquisitionSettings()
+
+        ss_new = ss.fromJSONStream(json.dumps(settings))
+        am.runAcquisitionWithSettings(ss_new, True)
+
+        if restore_settings:
+            am.setAcquisitionSettings(ss)
+        return None
+
+    with acquire_to_buffer(mm, settings, restore_settings) as buffer:
+        return buffer.array
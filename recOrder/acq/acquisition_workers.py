@@ -3,7 +3,6 @@ from __future__ import annotations
 
 from qtpy.QtCore import Signal
 from recOrder.compute.reconstructions import (
-    initialize_reconstructor,
     reconstruct_qlipp_birefringence,
     reconstruct_qlipp_stokes,
     reconstruct_phase2D,
@@ -13,16 +12,32 @@ from recOrder.acq.acq_functions import (
     generate_acq_settings,
     acquire_from_settings,
 )
-from recOrder.io.utils import load_bg, extract_reconstruction_parameters
-from recOrder.compute.reconstructions import QLIPPBirefringenceCompute
+from recOrder.acq.image_sources import (
+    RingBuffer,
+    StackAssembler,
+    TiffTailSource,
+)
+from recOrder.io.utils import (
+    load_bg_stokes,
+    extract_reconstruction_parameters,
+)
+from recOrder.compute.reconstructions import (
+    QLIPPBirefringenceCompute,
+    StreamingPhase2D,
+)
+from recOrder.compute.reconstructor_cache import default_cache_dir
 from recOrder.io.zarr_converter import ZarrConverter
 from recOrder.io.metadata_reader import MetadataReader, get_last_metadata_file
-from recOrder.io.utils import ram_message, rec_bkg_to_wo_bkg
+from recOrder.io.utils import (
+    ram_message,
+    rec_bkg_to_wo_bkg,
+    max_pending_stacks,
+)
+from recOrder.acq.pipeline import AsyncPipeline, WriteBehindArray
 from napari.qt.threading import WorkerBaseSignals, WorkerBase
 from napari.utils.notifications import show_warning
 import logging
 from waveorder.io.writer import WaveorderWriter
-import tifffile as tiff
 import numpy as np
 import os
 import zarr
@@ -38,6 +53,8 @@ if TYPE_CHECKING:
     from recOrder.plugin.main_widget import MainWidget
     from recOrder.calib.Calibration import QLIPP_Calibration
 
+LIVE_BUFFER_SIZE = 32  # images buffered between the live image source and reconstruction
+
 
 class PolarizationAcquisitionSignals(WorkerBaseSignals):
     """
@@ -228,67 +245,29 @@ class BFAcquisitionWorker(WorkerBase):
         self.img_dim = (stack.shape[-2], stack.shape[-1], stack.shape[-3])
         self._check_abort()
 
-        # Initialize the reconstuctor
-
-        # if no reconstructor has been initialized before, create new reconstructor
-        if not self.calib_window.phase_reconstructor:
-            logging.debug("Computing new reconstructor")
-
-            recon = initialize_reconstructor(
-                "PhaseFromBF",
-                image_dim=(stack.shape[-2], stack.shape[-1]),
-                wavelength_nm=self.calib_window.recon_wavelength,
-                NA_obj=self.calib_window.obj_na,
-                NA_illu=self.calib_window.cond_na,
-                mag=self.calib_window.mag,
-                n_slices=self.img_dim[-1],
-                z_step_um=self.calib_window.z_step,
-                pad_z=self.calib_window.pad_z,
-                pixel_size_um=self.calib_window.ps,
-                n_obj_media=self.calib_window.n_media,
-                mode=self.calib_window.acq_mode,
-                use_gpu=self.calib_window.use_gpu,
-                gpu_id=self.calib_window.gpu_id,
-            )
+        # Get the reconstuctor, only initialized when the parameters changed
+        recon = self.calib_window.reconstructor_registry.get(
+            "PhaseFromBF",
+            image_dim=(stack.shape[-2], stack.shape[-1]),
+            wavelength_nm=self.calib_window.recon_wavelength,
+            NA_obj=self.calib_window.obj_na,
+            NA_illu=self.calib_window.cond_na,
+            mag=self.calib_window.mag,
+            n_slices=self.img_dim[-1],
+            z_step_um=self.calib_window.z_step,
+            pad_z=self.calib_window.pad_z,
+            pixel_size_um=self.calib_window.ps,
+            n_obj_media=self.calib_window.n_media,
+            mode=self.calib_window.acq_mode,
+            use_gpu=self.calib_window.use_gpu,
+            gpu_id=self.calib_window.gpu_id,
+            cache_dir=default_cache_dir(),
+        )
 
-            # Emit reconstructor to be saved for later reconstructions
+        # Emit reconstructor to be saved for later reconstructions
+        if recon is not self.calib_window.phase_reconstructor:
             self.phase_reconstructor_emitter.emit(recon)
 
-        # if previous reconstructor exists
-        else:
-            self._check_abort()
-
-            # compute new reconstructor if the old reconstructor properties have been modified
-            if self._reconstructor_changed(stack.shape):
-                logging.debug(
-                    "Reconstruction settings changed, updating reconstructor"
-                )
-
-                recon = initialize_reconstructor(
-                    "PhaseFromBF",
-                    image_dim=(stack.shape[-2], stack.shape[-1]),
-                    wavelength_nm=self.calib_window.recon_wavelength,
-                    NA_obj=self.calib_window.obj_na,
-                    NA_illu=self.calib_window.cond_na,
-                    mag=self.calib_window.mag,
-                    n_slices=self.n_slices,
-                    z_step_um=self.calib_window.z_step,
-                    pad_z=self.calib_window.pad_z,
-                    pixel_size_um=self.calib_window.ps,
-                    n_obj_media=self.calib_window.n_media,
-                    mode=self.calib_window.acq_mode,
-                    use_gpu=self.calib_window.use_gpu,
-                    gpu_id=self.calib_window.gpu_id,
-                )
-
-                # Emit reconstructor to be saved for later reconstructions
-                self.phase_reconstructor_emitter.emit(recon)
-
-            # use previous reconstructor
-            else:
-                logging.debug("Using previous reconstruction settings")
-                recon = self.calib_window.phase_reconstructor
-
         # Begin reconstruction with stokes (needed for birefringence or phase)
         logging.debug("Reconstructing...")
         self._check_abort()
@@ -384,72 +363,6 @@ class BFAcquisitionWorker(WorkerBase):
         current_meta["recOrder"] = meta
         writer.store.attrs.put(current_meta)
 
-    def _reconstructor_changed(self, stack_shape: tuple):
-        """Function to check if the reconstructor has changed from the previous one in memory.
-        Serves to check if the worker attributes and reconstructor attributes have diverged.
-
-        Parameters
-        ----------
-        stack_shape : tuple
-            shape of the stack array to reconstruct
-
-        Returns
-        -------
-        bool
-            whether a new reconstructor should be initialized
-        """
-        # Attributes that are directly equivalent to worker attributes
-        attr_list = {
-            "acq_mode": "phase_deconv",
-            "pad_z": "pad_z",
-            "n_media": "n_media",
-            "use_gpu": "use_gpu",
-            "gpu_id": "gpu_id",
-        }
-        # attributes that are modified upon passing them to reconstructor
-        attr_modified_list = {
-            "obj_na": "NA_obj",
-            "cond_na": "NA_illu",
-            "wavelength": "lambda_illu",
-            "n_slices": "N_defocus",
-            "swing": "chi",
-            "ps": "ps",
-        }
-        self._check_abort()
-        old_recon = self.calib_window.phase_reconstructor
-        # check if X/Y shape has changed
-        if (old_recon.N, old_recon.M) != stack_shape[-2:]:
-            return True
-        # check if equivalent attributes have diverged
-        for key, value in attr_list.items():
-            if getattr(self.calib_window, key) != getattr(old_recon, value):
-                return True
-        # modify attributes to be equivalent and check for divergence
-        for key, value in attr_modified_list.items():
-            if key == "wavelength":
-                if (
-                    self.calib_window.wavelength
-                    * 1e-3
-                    / self.calib_window.n_media
-                    != old_recon.lambda_illu
-                ):
-                    return True
-            elif key == "n_slices":
-                if getattr(self, key) != getattr(old_recon, value):
-                    return True
-            elif key == "ps":
-                if getattr(self.calib_window, key) / float(
-                    self.calib_window.mag
-                ) != getattr(old_recon, value):
-                    return True
-            else:
-                if getattr(
-                    self.calib_window, key
-                ) / self.calib_window.n_media != getattr(old_recon, value):
-                    return True
-        # not changed
-        return False
-
     def _cleanup_acq(self):
 
         # Get display windows
@@ -500,7 +413,6 @@ class BFAcquisitionWorker(WorkerBase):
                 continue
 
 
-# TODO: Cache common OTF's on local computers and use those for reconstruction
 class PolarizationAcquisitionWorker(WorkerBase):
     """
     Class to execute a birefringence/phase acquisition.  First step is to snap the images follow by a second
@@ -508,7 +420,11 @@ class PolarizationAcquisitionWorker(WorkerBase):
     """
 
     def __init__(
-        self, calib_window: MainWidget, calib: QLIPP_Calibration, mode: str
+        self,
+        calib_window: MainWidget,
+        calib: QLIPP_Calibration,
+        mode: str,
+        n_timepoints: int = 1,
     ):
         super().__init__(SignalsClass=PolarizationAcquisitionSignals)
 
@@ -518,6 +434,7 @@ class PolarizationAcquisitionWorker(WorkerBase):
         # Init properties
         self.calib = calib
         self.mode = mode
+        self.n_timepoints = n_timepoints
         self.n_slices = None
         self.prefix = "recOrderPluginSnap"
         self.dm = self.calib_window.mm.displays()
@@ -567,6 +484,10 @@ class PolarizationAcquisitionWorker(WorkerBase):
     def _check_ram(self):
         """
         Show a warning if RAM < 32 GB.
+
+        Returns
+        -------
+        is_warning:     (bool) whether the RAM is < 32 GB
         """
         is_warning, msg = ram_message()
         if is_warning:
@@ -574,11 +495,15 @@ class PolarizationAcquisitionWorker(WorkerBase):
         else:
             logging.info(msg)
 
+        return is_warning
+
     def work(self):
         """
-        Function that runs the 2D or 3D acquisition and reconstructs the data
+        Function that runs the 2D or 3D acquisition and reconstructs the data.  Acquired stacks are
+        reconstructed and saved by a reconstruction thread, the next timepoint of a time-lapse is
+        acquired while the previous one is reconstructed.
         """
-        self._check_ram()
+        low_ram = self._check_ram()
         logging.info("Running Acquisition...")
         self.calib_window._dump_gui_state(self.snap_dir)
 
@@ -589,7 +514,7 @@ class PolarizationAcquisitionWorker(WorkerBase):
 
         self._check_abort()
 
-        # Acquire 2D stack
+        # Generate 2D stack settings
         if self.dim == "2D":
             logging.debug("Acquiring 2D stack")
 
@@ -603,10 +528,8 @@ class PolarizationAcquisitionWorker(WorkerBase):
                 keep_shutter_open_channels=True,
             )
             self._check_abort()
-            # acquire images
-            stack = self._acquire()
 
-        # Acquire 3D stack
+        # Generate 3D stack settings
         else:
             logging.debug("Acquiring 3D stack")
 
@@ -630,11 +553,47 @@ class PolarizationAcquisitionWorker(WorkerBase):
             self.settings["slicesFirst"] = False
             self.settings["acqOrderMode"] = 0  # TIME_POS_SLICE_CHANNEL
 
-            # acquire images
-            stack = self._acquire()
+        pipeline = None
+        try:
+            for t in range(self.n_timepoints):
+                self._check_abort()
 
-        # Cleanup acquisition by closing window, converting to zarr, and deleting temp directory
-        self._cleanup_acq()
+                # acquire images
+                stack = self._acquire()
+
+                # Close the acquisition window, the raw data is converted to
+                # zarr by the reconstruction thread
+                raw_dir = self._cleanup_acq()
+
+                # waiting stacks are limited by the available RAM
+                if pipeline is None:
+                    pipeline = AsyncPipeline(
+                        self._process,
+                        1 if low_ram else max_pending_stacks(stack.nbytes),
+                    )
+                pipeline.put((t, stack, raw_dir), self._check_abort)
+        finally:
+            if pipeline is not None:
+                pipeline.close()
+
+        logging.info("Finished Acquisition")
+        logging.debug("Finished Acquisition")
+
+    def _process(self, item):
+        """
+        Converts the raw data of one acquired stack to zarr, reconstructs, saves and emits it.
+        Runs in the reconstruction thread.
+
+        Parameters
+        ----------
+        item:           (tuple) timepoint, stack of dimensions (1, C, Z, Y, X) and raw data path
+
+        """
+
+        t, stack, raw_dir = item
+        suffix = f"_{t}" if self.n_timepoints > 1 else ""
+        if raw_dir is not None:
+            self._convert_raw(raw_dir, suffix)
 
         # Reconstruct snapped images
         self._check_abort()
@@ -647,14 +606,11 @@ class PolarizationAcquisitionWorker(WorkerBase):
 
         # Save images
         logging.debug("Saving Images")
-        self._save_imgs(birefringence, phase, meta)
+        self._save_imgs(birefringence, phase, meta, suffix)
 
         self._check_abort()
 
-        logging.info("Finished Acquisition")
-        logging.debug("Finished Acquisition")
-
-        # Emit the images and let thread know function is finished
+        # Emit the images
         self.bire_image_emitter.emit(birefringence)
         self.phase_image_emitter.emit(phase)
 
@@ -748,81 +704,39 @@ class PolarizationAcquisitionWorker(WorkerBase):
             self.calib_window.bg_option
         )
 
-        # Initialize the heavy reconstuctor
+        # Get the reconstuctor, only initialized when the parameters changed
+        registry = self.calib_window.reconstructor_registry
         if self.mode == "phase" or self.mode == "all":
-
             self._check_abort()
+            recon = registry.get(
+                "QLIPP",
+                image_dim=(stack.shape[-2], stack.shape[-1]),
+                wavelength_nm=self.calib_window.recon_wavelength,
+                swing=self.calib.swing,
+                calibration_scheme=self.calib.calib_scheme,
+                NA_obj=self.calib_window.obj_na,
+                NA_illu=self.calib_window.cond_na,
+                mag=self.calib_window.mag,
+                n_slices=self.n_slices,
+                z_step_um=self.calib_window.z_step,
+                pad_z=self.calib_window.pad_z,
+                pixel_size_um=self.calib_window.ps,
+                bg_correction=wo_background_correction,
+                n_obj_media=self.calib_window.n_media,
+                mode=self.calib_window.acq_mode,
+                use_gpu=self.calib_window.use_gpu,
+                gpu_id=self.calib_window.gpu_id,
+                cache_dir=default_cache_dir(),
+            )
 
-            # if no reconstructor has been initialized before, create new reconstructor
-            if not self.calib_window.phase_reconstructor:
-                logging.debug("Computing new reconstructor")
-
-                recon = initialize_reconstructor(
-                    "QLIPP",
-                    image_dim=(stack.shape[-2], stack.shape[-1]),
-                    wavelength_nm=self.calib_window.recon_wavelength,
-                    swing=self.calib.swing,
-                    calibration_scheme=self.calib.calib_scheme,
-                    NA_obj=self.calib_window.obj_na,
-                    NA_illu=self.calib_window.cond_na,
-                    mag=self.calib_window.mag,
-                    n_slices=self.n_slices,
-                    z_step_um=self.calib_window.z_step,
-                    pad_z=self.calib_window.pad_z,
-                    pixel_size_um=self.calib_window.ps,
-                    bg_correction=wo_background_correction,
-                    n_obj_media=self.calib_window.n_media,
-                    mode=self.calib_window.acq_mode,
-                    use_gpu=self.calib_window.use_gpu,
-                    gpu_id=self.calib_window.gpu_id,
-                )
-
-                # Emit reconstructor to be saved for later reconstructions
+            # Emit reconstructor to be saved for later reconstructions
+            if recon is not self.calib_window.phase_reconstructor:
                 self.phase_reconstructor_emitter.emit(recon)
 
-            # if previous reconstructor exists
-            else:
-                self._check_abort()
-
-                # compute new reconstructor if the old reconstructor properties have been modified
-                if self._reconstructor_changed():
-                    logging.debug(
-                        "Reconstruction settings changed, updating reconstructor"
-                    )
-
-                    recon = initialize_reconstructor(
-                        "QLIPP",
-                        image_dim=(stack.shape[-2], stack.shape[-1]),
-                        wavelength_nm=self.calib_window.recon_wavelength,
-                        swing=self.calib.swing,
-                        calibration_scheme=self.calib.calib_scheme,
-                        NA_obj=self.calib_window.obj_na,
-                        NA_illu=self.calib_window.cond_na,
-                        mag=self.calib_window.mag,
-                        n_slices=self.n_slices,
-                        z_step_um=self.calib_window.z_step,
-                        pad_z=self.calib_window.pad_z,
-                        pixel_size_um=self.calib_window.ps,
-                        bg_correction=wo_background_correction,
-                        n_obj_media=self.calib_window.n_media,
-                        mode=self.calib_window.acq_mode,
-                        use_gpu=self.calib_window.use_gpu,
-                        gpu_id=self.calib_window.gpu_id,
-                    )
-
-                    self.phase_reconstructor_emitter.emit(recon)
-
-                # use previous reconstructor
-                else:
-                    logging.debug("Using previous reconstruction settings")
-                    recon = self.calib_window.phase_reconstructor
-
-        # if phase isn't desired, initialize the lighter birefringence only reconstructor
-        # no need to save this reconstructor for later as it is pretty quick to compute
+        # if phase isn't desired, get the birefringence only reconstructor
         else:
             self._check_abort()
-            logging.debug("Creating birefringence only reconstructor")
-            recon = initialize_reconstructor(
+            recon = registry.get(
                 "birefringence",
                 image_dim=(stack.shape[-2], stack.shape[-1]),
                 calibration_scheme=self.calib.calib_scheme,
@@ -835,18 +749,23 @@ class PolarizationAcquisitionWorker(WorkerBase):
         # Prepare background corrections for waveorder
         # This block mimics qlipp_pipeline.py L110-119.
         if self.calib_window.bg_option in ["global", "local_fit+"]:
-            logging.debug("Loading BG Data")
+            logging.debug("Loading BG Stokes")
             self._check_abort()
-            bg_data = self._load_bg(
-                self.calib_window.acq_bg_directory,
-                stack.shape[-2],
-                stack.shape[-1],
+            bg_stokes = registry.memoize(
+                "bg_stokes",
+                lambda: self._load_bg_stokes(
+                    recon,
+                    self.calib_window.acq_bg_directory,
+                    stack.shape[-2],
+                    stack.shape[-1],
+                ),
+                bg_option=self.calib_window.bg_option,
+                bg_path=self.calib_window.acq_bg_directory,
+                image_dim=(stack.shape[-2], stack.shape[-1]),
+                calibration_scheme=self.calib.calib_scheme,
+                swing=self.calib.swing,
             )
             self._check_abort()
-            bg_stokes = recon.Stokes_recon(bg_data)
-            self._check_abort()
-            bg_stokes = recon.Stokes_transform(bg_stokes)
-            self._check_abort()
         elif self.calib_window.bg_option == "local_fit":
             bg_stokes = np.zeros((5, stack.shape[-2], stack.shape[-1]))
             bg_stokes[
@@ -951,7 +870,7 @@ class PolarizationAcquisitionWorker(WorkerBase):
         # return both variables, could contain images or could be null
         return birefringence, phase, meta
 
-    def _save_imgs(self, birefringence, phase, meta=None):
+    def _save_imgs(self, birefringence, phase, meta=None, suffix=""):
         """
         function to save images.  Seperates out both birefringence and phase into separate zarr stores.
         Makes sure file names do not overlap, i.e. nothing is overwritten.
@@ -960,6 +879,7 @@ class PolarizationAcquisitionWorker(WorkerBase):
         ----------
         birefringence:      (nd-array or None) birefringence image(s)
         phase:              (nd-array or None) phase image(s)
+        suffix:             (str) suffix of the zarr store names, e.g. the timepoint of a time-lapse
 
         Returns
         -------
@@ -981,9 +901,9 @@ class PolarizationAcquisitionWorker(WorkerBase):
             # increment filename one more than last found saved snap
             prefix = self.calib_window.save_name
             name = (
-                f"BirefringenceSnap.zarr"
+                f"BirefringenceSnap{suffix}.zarr"
                 if not prefix
-                else f"{prefix}_BirefringenceSnap.zarr"
+                else f"{prefix}_BirefringenceSnap{suffix}.zarr"
             )
 
             # create zarr root and position group
@@ -1036,7 +956,9 @@ class PolarizationAcquisitionWorker(WorkerBase):
             # increment filename one more than last found saved snap
             prefix = self.calib_window.save_name
             name = (
-                f"PhaseSnap.zarr" if not prefix else f"{prefix}_PhaseSnap.zarr"
+                f"PhaseSnap{suffix}.zarr"
+                if not prefix
+                else f"{prefix}_PhaseSnap{suffix}.zarr"
             )
 
             # create zarr root and position group
@@ -1069,21 +991,23 @@ class PolarizationAcquisitionWorker(WorkerBase):
             current_meta["recOrder"] = meta
             writer.store.attrs.put(current_meta)
 
-    def _load_bg(self, path, height, width):
+    def _load_bg_stokes(self, recon, path, height, width):
         """
         # TODO: remove ROI for 1.0.0
 
-        Load background and calibration metadata.
+        Load the background Stokes saved in the BG folder, computing them from the
+        background images if they are missing or out of date.
 
         Parameters
         ----------
+        recon:          (waveorder_microscopy) initialized reconstructor
         path:           (str) path to the BG folder
         height:         (int) height of BG image
         width:          (int) widht of BG image
 
         Returns
         -------
-
+        bg_stokes:      (nd-array) background Stokes of shape (5, Y, X)
         """
 
         # TODO: Change to just accept ROI
@@ -1094,116 +1018,26 @@ class PolarizationAcquisitionWorker(WorkerBase):
         except:
             roi = None
 
-        bg_data = load_bg(path, height, width, roi)
-
-        return bg_data
+        return load_bg_stokes(
+            path,
+            recon,
+            height,
+            width,
+            self.calib.calib_scheme,
+            self.calib.swing,
+            roi,
+        )
 
-    def _reconstructor_changed(self):
+    def _cleanup_acq(self):
         """
-        Function to check if the reconstructor has changed from the previous one in memory.
-        Serves to check if the worker attributes and reconstructor attributes have diverged.
+        Closes the display window of the acquisition
 
         Returns
         -------
+        raw_dir:        (str or None) path to the raw data of the acquisition, None if no window was found
 
         """
 
-        changed = None
-
-        # Attributes that are directly equivalent to worker attributes
-        attr_list = {
-            "acq_mode": "phase_deconv",
-            "pad_z": "pad_z",
-            "n_media": "n_media",
-            "bg_option": "bg_option",
-            "use_gpu": "use_gpu",
-            "gpu_id": "gpu_id",
-        }
-
-        # attributes that are modified upon passing them to reconstructor
-        attr_modified_list = {
-            "obj_na": "NA_obj",
-            "cond_na": "NA_illu",
-            "wavelength": "lambda_illu",
-            "n_slices": "N_defocus",
-            "swing": "chi",
-            "ps": "ps",
-        }
-
-        self._check_abort()
-        # check if equivalent attributes have diverged
-        for key, value in attr_list.items():
-            if getattr(self.calib_window, key) != getattr(
-                self.calib_window.phase_reconstructor, value
-            ):
-                changed = True
-                break
-            else:
-                changed = False
-
-        if not changed:
-            # modify attributes to be equivalent and check for divergence
-            for key, value in attr_modified_list.items():
-                if key == "swing":
-                    if self.calib.calib_scheme == "5-State":
-                        if (
-                            self.calib.swing * 2 * np.pi
-                            != self.calib_window.phase_reconstructor.chi
-                        ):
-                            changed = True
-                        else:
-                            changed = False
-                    else:
-                        if (
-                            self.calib.swing
-                            != self.calib_window.phase_reconstructor.chi
-                        ):
-                            changed = True
-                        else:
-                            changed = False
-
-                elif key == "wavelength":
-                    if (
-                        self.calib_window.recon_wavelength
-                        * 1e-3
-                        / self.calib_window.n_media
-                        != self.calib_window.phase_reconstructor.lambda_illu
-                    ):
-                        changed = True
-                        break
-                    else:
-                        changed = False
-                elif key == "n_slices":
-                    if getattr(self, key) != getattr(
-                        self.calib_window.phase_reconstructor, value
-                    ):
-                        changed = True
-                        break
-                    else:
-                        changed = False
-
-                elif key == "ps":
-                    if getattr(self.calib_window, key) / float(
-                        self.calib_window.mag
-                    ) != getattr(self.calib_window.phase_reconstructor, value):
-                        changed = True
-                        break
-                    else:
-                        changed = False
-                else:
-                    if getattr(
-                        self.calib_window, key
-                    ) / self.calib_window.n_media != getattr(
-                        self.calib_window.phase_reconstructor, value
-                    ):
-                        changed = True
-                    else:
-                        changed = False
-
-        return changed
-
-    def _cleanup_acq(self):
-
         # Get display windows
         disps = self.dm.getAllDataViewers()
 
@@ -1222,35 +1056,49 @@ class PolarizationAcquisitionWorker(WorkerBase):
                     closed = disp.isClosed()
                 dp.close()
 
-                # Try to delete the data, sometime it isn't cleaned up quickly enough and will
-                # return an error.  In this case, catch the error and then try to close again (seems to work).
-                try:
-                    save_prefix = (
-                        self.calib_window.save_name
-                        if self.calib_window.save_name
-                        else None
-                    )
-                    name = (
-                        f"RawPolDataSnap.zarr"
-                        if not save_prefix
-                        else f"{save_prefix}_RawPolDataSnap.zarr"
-                    )
-                    out_path = os.path.join(self.snap_dir, name)
-                    converter = ZarrConverter(
-                        os.path.join(dir_, prefix),
-                        out_path,
-                        "ometiff",
-                        False,
-                        False,
-                    )
-                    converter.run_conversion()
-                    shutil.rmtree(os.path.join(dir_, prefix))
-                except PermissionError as ex:
-                    dp.close()
-                break
+                return os.path.join(dir_, prefix)
             else:
                 continue
 
+        return None
+
+    def _convert_raw(self, raw_dir, suffix=""):
+        """
+        Converts the raw data of an acquisition to zarr and deletes it
+
+        Parameters
+        ----------
+        raw_dir:        (str) path to the raw data
+        suffix:         (str) suffix of the zarr store name
+
+        """
+
+        # Try to delete the data, sometime it isn't cleaned up quickly enough and will
+        # return an error.
+        try:
+            save_prefix = (
+                self.calib_window.save_name
+                if self.calib_window.save_name
+                else None
+            )
+            name = (
+                f"RawPolDataSnap{suffix}.zarr"
+                if not save_prefix
+                else f"{save_prefix}_RawPolDataSnap{suffix}.zarr"
+            )
+            out_path = os.path.join(self.snap_dir, name)
+            converter = ZarrConverter(
+                raw_dir,
+                out_path,
+                "ometiff",
+                False,
+                False,
+            )
+            converter.run_conversion()
+            shutil.rmtree(raw_dir)
+        except PermissionError as ex:
+            logging.warning(f"Could not delete {raw_dir}: {ex}")
+
 
 class ListeningWorker(WorkerBase):
     """
@@ -1258,7 +1106,14 @@ class ListeningWorker(WorkerBase):
     step of reconstructing those images.
     """
 
-    def __init__(self, calib_window, bg_data):
+    def __init__(
+        self,
+        calib_window,
+        bg_data,
+        source=None,
+        write_block=None,
+        phase_reconstructor=None,
+    ):
         super().__init__(SignalsClass=ListeningSignals)
 
         # Save current state of GUI window
@@ -1277,252 +1132,133 @@ class ListeningWorker(WorkerBase):
         self.save_directory = None
         self.bg_data = bg_data
         self.reconstructor = None
+        self.source = source
+        self.write_block = write_block
+        self.writer = None
+        self.phase_reconstructor = phase_reconstructor
+        self.phase = None
+        self.phase_writer = None
 
     def _check_abort(self):
         if self.abort_requested:
             self.aborted.emit()
             raise TimeoutError("Stop Requested")
 
-    def get_byte_offset(self, offsets, page):
+    def _next_frame(self, buffer):
         """
-        Gets the byte offset from the tiff tag metadata.
-
-        210 accounts for header data + page header data.
-        162 accounts page header data
+        Waits for the next frame of the live buffer
 
         Parameters
         ----------
-        offsets:             (dict) Offset dictionary list
-        page:               (int) Page to look at for the offset
+        buffer:         (RingBuffer) buffer fed by the image source
 
         Returns
         -------
-        byte offset:        (int) byte offset for the image array
+        frame:          (Frame or None) None if the source ended before the end of the acquisition
 
         """
 
-        if page == 0:
-            array_offset = offsets[page] + 210
-        else:
-            array_offset = offsets[page] + 162
+        frame = None
+        while frame is None:
+            self._check_abort()
+            frame = buffer.get(timeout=0.1)
+            if frame is None and buffer.exhausted:
+                if self.source.error is not None:
+                    raise self.source.error
+                return None
 
-        return array_offset
+        return frame
 
-    def listen_for_images(
-        self, array, file, offsets, interval, dim3, dim2, dim1, dim0, dim_order
-    ):
+    def _init_store(self):
+        """
+        Preallocates the zarr store of the reconstruction and emits it to napari.  Once the store
+        has been emitted, we can add data to the store without needing to emit the store again
+        (thanks to napari's handling of zarr datasets).  Reconstructions are written to the store
+        by a write-behind buffer, one slice at a time unless a write block is given.  The
+        dimensions of the napari viewer are only updated once a block was written, so that the
+        viewer never points at slices that are still in memory.
         """
 
-        Parameters
-        ----------
-        array:          (nd-array) numpy array of size (C, Z)
-        file:           (string) filepath corresponding to the desired tiff image
-        offsets:        (dict) dictionary of offsets corresponding to byte offsets of pixel data in tiff image
-        interval:       (int) time interval between timepoints in seconds
-        dim3:           (int) outermost dimension to value begin at
-        dim2:           (int) first-inner dimension value to begin at
-        dim1:           (int) second-inner dimension value to begin at
-        dim0:           (int) innermost dimension value to begin at
-        dim_order:      (int) 1, 2, 3, or 4 corresponding to the dimensionality ordering of the acquisition (MM-provided)
+        self.store = zarr.open(os.path.join(self.root, self.prefix + ".zarr"))
+        array = self.store.zeros(
+            name="Birefringence",
+            shape=(
+                self.n_pos,
+                self.n_frames,
+                2,
+                self.n_slices,
+                self.shape[0],
+                self.shape[1],
+            ),
+            chunks=(1, 1, 1, 1, self.shape[0], self.shape[1]),
+            overwrite=True,
+        )
+        if self.phase is not None:
+            self.phase_writer = WriteBehindArray(
+                self.store.zeros(
+                    name="Phase2D",
+                    shape=(
+                        self.n_pos,
+                        self.n_frames,
+                        1,
+                        1,
+                        self.shape[0],
+                        self.shape[1],
+                    ),
+                    chunks=(1, 1, 1, 1, self.shape[0], self.shape[1]),
+                    overwrite=True,
+                )
+            )
+        self.store_emitter.emit(self.store)
 
-        Returns
-        -------
-        array:                      (nd-array) partially filled array of size (C, Z) to continue filling in next iteration
-        index:                      (int) current page number at end of function
-        dim3:                       (int) dimension values corresponding to where the next iteration should begin
-        dim2:                       (int) dimension values corresponding to where the next iteration should begin
-        dim1:                       (int) dimension values corresponding to where the next iteration should begin
-        dim0:                       (int) dimension values corresponding to where the next iteration should begin
+        block_shape = (
+            self.write_block
+            if self.write_block
+            else (1, 1, array.shape[2], 1) + array.shape[4:]
+        )
+        self.writer = WriteBehindArray(
+            array,
+            block_shape,
+            max_pending_stacks(
+                int(np.prod(block_shape)) * array.dtype.itemsize
+            ),
+            on_write=self._emit_written,
+        )
 
+    def _emit_written(self, region):
+        """
+        Emits the last (p, t, z) of a block written to the store to update the napari dimension
+        slider
         """
 
-        # Order dimensions that we will loop through in order to match the acquisition
-        if dim_order == 0:
-            dims = [
-                [dim3, self.n_frames],
-                [dim2, self.n_pos],
-                [dim1, self.n_slices],
-                [dim0, self.n_channels],
-            ]
-            channel_dim = 0
-        elif dim_order == 1:
-            dims = [
-                [dim3, self.n_frames],
-                [dim2, self.n_pos],
-                [dim1, self.n_channels],
-                [dim0, self.n_slices],
-            ]
-            channel_dim = 1
-        elif dim_order == 2:
-            dims = [
-                [dim3, self.n_pos],
-                [dim2, self.n_frames],
-                [dim1, self.n_slices],
-                [dim0, self.n_channels],
-            ]
-            channel_dim = 0
-        else:
-            dims = [
-                [dim3, self.n_pos],
-                [dim2, self.n_frames],
-                [dim1, self.n_channels],
-                [dim0, self.n_slices],
-            ]
-            channel_dim = 1
-
-        # Loop through dimensions in the order they are acquired
-        idx = 0
-        for dim3 in range(dims[0][0], dims[0][1]):
-            for dim2 in range(dims[1][0], dims[1][1]):
-                for dim1 in range(dims[2][0], dims[2][1]):
-                    for dim0 in range(dims[3][0], dims[3][1]):
-
-                        # GET OFFSET AND WAIT
-                        if idx > 0:
-                            try:
-                                offset = self.get_byte_offset(offsets, idx)
-                            except IndexError:
-                                # NEED TO STOP BECAUSE RAN OUT OF PAGES OR REACHED END OF ACQ
-                                return array, idx, dim3, dim2, dim1, dim0
-
-                            # Checks if the offset in metadata is 0, but technically self.get_byte_offset() adds
-                            # 162 to every offset to account for tiff file header bytes
-                            while offset == 162:
-                                self._check_abort()
-                                tf = tiff.TiffFile(file)
-                                time.sleep(interval)
-                                offsets = tf.micromanager_metadata["IndexMap"][
-                                    "Offset"
-                                ]
-                                tf.close()
-                                offset = self.get_byte_offset(offsets, idx)
-                        else:
-                            offset = self.get_byte_offset(offsets, idx)
-
-                        if idx < (
-                            self.n_slices
-                            * self.n_channels
-                            * self.n_frames
-                            * self.n_pos
-                        ):
-
-                            # Assign dimensions based off acquisition order to correctly add image to array
-                            if dim_order == 0:
-                                t, p, c, z = dim3, dim2, dim0, dim1
-                            elif dim_order == 1:
-                                t, p, c, z = dim3, dim2, dim1, dim0
-                            elif dim_order == 2:
-                                t, p, c, z = dim2, dim3, dim0, dim1
-                            else:
-                                t, p, c, z = dim2, dim3, dim1, dim0
-
-                            self._check_abort()
-
-                            # Add Image to array
-                            img = np.memmap(
-                                file,
-                                dtype=self.dtype,
-                                mode="r",
-                                offset=offset,
-                                shape=self.shape,
-                            )
-                            array[c, z] = img
-
-                            # If Channel first, compute birefringence here
-                            if (
-                                channel_dim == 0
-                                and dim0 == self.n_channels - 1
-                            ):
-                                self._check_abort()
-
-                                # Compute birefringence
-                                self.compute_and_save(array[:, z], p, t, z)
-
-                            idx += 1
-
-                    # Reset Range to 0 to account for starting this function in middle of a dimension
-                    if idx < (
-                        self.n_slices
-                        * self.n_channels
-                        * self.n_frames
-                        * self.n_pos
-                    ):
-                        dims[2][0] = 0
-                        dims[3][0] = 0
-
-                    # If z-first, compute the birefringence here
-                    if channel_dim == 1 and dim1 == self.n_channels - 1:
-
-                        # Assign dimensions based off acquisition order to correctly add image to array
-                        if dim_order == 0:
-                            t, p, c, z = dim3, dim2, dim0, dim1
-                        elif dim_order == 1:
-                            t, p, c, z = dim3, dim2, dim1, dim0
-                        elif dim_order == 2:
-                            t, p, c, z = dim2, dim3, dim0, dim1
-                        else:
-                            t, p, c, z = dim2, dim3, dim1, dim0
-
-                        self._check_abort()
-                        self.compute_and_save(array, p, t, dim0)
-                    else:
-                        continue
-
-                # Reset range to 0 to account for starting this function in the middle of a dimension
-                if idx < (
-                    self.n_slices
-                    * self.n_channels
-                    * self.n_frames
-                    * self.n_pos
-                ):
-                    dims[1][0] = 0
-
-        # Return at the end of the acquisition
-        return array, idx, dim3, dim2, dim1, dim0
+        p, t, _, z = region[:4]
+        self.dim_emitter.emit((p.stop - 1, t.stop - 1, z.stop - 1))
 
     def compute_and_save(self, array, p, t, z):
 
         if self.n_slices == 1:
             array = array[:, 0]
 
-        birefringence = self.reconstructor.reconstruct(array)
+        stokes = self.reconstructor.reconstruct_stokes(array)
+        birefringence = self.reconstructor.reconstruct_birefringence(stokes)
 
-        # If the napari layer doesn't exist yet, create the zarr store to emit to napari
-        if self.prefix not in self.calib_window.viewer.layers:
-            self.store = zarr.open(
-                os.path.join(self.root, self.prefix + ".zarr")
-            )
-            self.store.zeros(
-                name="Birefringence",
-                shape=(
-                    self.n_pos,
-                    self.n_frames,
-                    2,
-                    self.n_slices,
-                    self.shape[0],
-                    self.shape[1],
-                ),
-                chunks=(1, 1, 1, 1, self.shape[0], self.shape[1]),
-                overwrite=True,
-            )
-
-            # Add data and send out the store.  Once the store has been emitted, we can add data to the store
-            # without needing to emit the store again (thanks to napari's handling of zarr datasets)
-            if len(birefringence.shape) == 4:
-                self.store["Birefringence"][p, t] = birefringence
-            else:
-                self.store["Birefringence"][p, t, :, z] = birefringence
-
-            self.store_emitter.emit(self.store)
+        if self.writer is None:
+            self._init_store()
 
+        if len(birefringence.shape) == 4:
+            self.writer[p, t] = birefringence
         else:
-            if len(birefringence.shape) == 4:
-                self.store["Birefringence"][p, t] = birefringence
-            else:
-                self.store["Birefringence"][p, t, :, z] = birefringence
-
-        # Emit the current dimensions so that we can update the napari dimension slider
-        self.dim_emitter.emit((p, t, z))
+            self.writer[p, t, :, z] = birefringence
+
+        # Slices are added to the 2D phase as they arrive, the phase is
+        # written with the last slice of its stack
+        if self.phase is not None:
+            S0 = stokes[0]
+            slices = enumerate(S0) if S0.ndim == 3 else [(z, S0)]
+            for z_slice, S0 in slices:
+                phase = self.phase.add(z_slice, S0, key=(p, t))
+                if phase is not None:
+                    self.phase_writer[p, t, 0, 0] = phase
 
     def work(self):
         acq_man = self.calib_window.mm.acquisitions()
@@ -1553,80 +1289,60 @@ class ListeningWorker(WorkerBase):
         # Get File Path corresponding to current dataset
         path = os.path.join(self.root, self.prefix)
         files = [fn for fn in glob.glob(path + "*") if ".zarr" not in fn]
-        index = max([int(x.strip(path + "_")) for x in files])
+        index = max([int(x[len(path) :].lstrip("_")) for x in files])
 
         self.prefix = self.prefix + f"_{index}"
-        full_path = os.path.join(self.root, self.prefix)
-        first_file_path = os.path.join(
-            full_path, self.prefix + "_MMStack.ome.tif"
-        )
-
-        file = tiff.TiffFile(first_file_path)
-        file_path = first_file_path
-        self.shape = (
-            file.micromanager_metadata["Summary"]["Height"],
-            file.micromanager_metadata["Summary"]["Width"],
-        )
-        self.dtype = file.pages[0].dtype
-        offsets = file.micromanager_metadata["IndexMap"]["Offset"]
-        file.close()
-
-        self._check_abort()
-
-        # Init Reconstruction Class
-        self.reconstructor = QLIPPBirefringenceCompute(
-            self.shape,
-            self.calib_window.calib_scheme,
-            self.calib_window.wavelength,
-            self.calib_window.swing,
-            self.n_slices,
-            self.calib_window.bg_option,
-            self.bg_data,
-        )
+        n_images = self.n_slices * self.n_channels * self.n_frames * self.n_pos
+        if self.source is None:
+            self.source = TiffTailSource(
+                os.path.join(self.root, self.prefix), self.prefix, n_images
+            )
 
         self._check_abort()
 
-        # initialize dimensions / array for the loop
-        idx, dim3, dim2, dim1, dim0 = 0, 0, 0, 0, 0
-        array = np.zeros(
-            (self.n_channels, self.n_slices, self.shape[0], self.shape[1])
+        # images are handed from the source to the reconstruction through a bounded buffer,
+        # stacks are reconstructed as soon as their images arrived
+        buffer = RingBuffer(LIVE_BUFFER_SIZE)
+        assembler = StackAssembler(
+            self.n_channels, self.n_slices, channel_first=dim_order in (0, 2)
         )
-        file_count = 0
-        total_idx = 0
-
-        # Run until the function has collected the totality of the data
-        while total_idx < (
-            self.n_slices * self.n_channels * self.n_frames * self.n_pos
-        ):
-
-            self._check_abort()
-
-            # this will loop through reading images in a single file as it's being written
-            # when it has successfully loaded all of the images from the file, it'll move on to the next
-            array, idx, dim3, dim2, dim1, dim0 = self.listen_for_images(
-                array,
-                file_path,
-                offsets,
-                self.interval,
-                dim3,
-                dim2,
-                dim1,
-                dim0,
-                dim_order,
-            )
+        self.source.start(buffer)
+        try:
+            for _ in range(n_images):
+                frame = self._next_frame(buffer)
+                if frame is None:
+                    break
 
-            total_idx += idx
-
-            # If acquisition is not finished, grab the next file and listen for images
-            if (
-                total_idx
-                != self.n_slices * self.n_channels * self.n_frames * self.n_pos
-            ):
-                time.sleep(1)
-                file_count += 1
-                file_path = os.path.join(
-                    full_path, self.prefix + f"_MMStack_{file_count}.ome.tif"
-                )
-                file = tiff.TiffFile(file_path)
-                offsets = file.micromanager_metadata["IndexMap"]["Offset"]
-                file.close()
+                if self.reconstructor is None:
+                    # Init Reconstruction Class
+                    self.shape = frame.image.shape
+                    self.dtype = frame.image.dtype
+                    self.reconstructor = QLIPPBirefringenceCompute(
+                        self.shape,
+                        self.calib_window.calib_scheme,
+                        self.calib_window.wavelength,
+                        self.calib_window.swing,
+                        self.n_slices,
+                        self.calib_window.bg_option,
+                        self.bg_data,
+                    )
+                    if self.phase_reconstructor is not None:
+                        self.phase = StreamingPhase2D(
+                            self.phase_reconstructor,
+                            method=self.calib_window.phase_regularizer,
+                            reg_p=float(
+                                self.calib_window.ui.le_phase_strength.text()
+                            ),
+                            rho=float(self.calib_window.ui.le_rho.text()),
+                            itr=int(self.calib_window.ui.le_itr.text()),
+                        )
+
+                for p, t, z, array in assembler.add(frame):
+                    self._check_abort()
+                    self.compute_and_save(array, p, t, z)
+        finally:
+            self.source.stop()
+            if self.writer is not None:
+                self.writer.close()
+            if self.phase_writer is not None:
+                self.phase_writer.close()
@@ -0,0 +1,645 @@
+import os
+import time
+import struct
+import tempfile
+import threading
+from collections import namedtuple
+import numpy as np
+import psutil
+from recOrder.io.tiff_index import (
+    INDEX_MAP_HEADER,
+    INDEX_MAP_OFFSET_HEADER,
+    image_location,
+)
+
+# acquisition order of Micro-Manager's acqOrderMode, outermost dimension first
+ACQ_ORDERS = {0: "TPZC", 1: "TPCZ", 2: "PTZC", 3: "PTCZ"}
+INDEX_MAP_ENTRY = struct.Struct("5I")
+INDEX_MAP_WINDOW = 256  # IndexMap entries read per poll
+# acquisition buffers larger than this fraction of the free RAM are file-backed
+BUFFER_RAM_FRACTION = 0.5
+
+Frame = namedtuple("Frame", ["p", "t", "c", "z", "image"])
+
+
+class RingBuffer:
+    """
+    Bounded buffer of frames between an image source and a single consumer.  Images are copied
+    into slots preallocated on the first put, put blocks while all slots are in use so that a
+    slow consumer throttles the source instead of accumulating images in memory.
+    """
+
+    def __init__(self, capacity=16):
+        """
+
+        Parameters
+        ----------
+        capacity:       (int) number of image slots
+        """
+
+        self.capacity = capacity
+        self.closed = False
+        self._slots = None
+        self._coords = [None] * capacity
+        self._head = 0
+        self._count = 0
+        self._held = 0
+        self._condition = threading.Condition()
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def exhausted(self):
+        """
+        whether the buffer was closed and all of its frames were consumed
+        """
+
+        return self.closed and self._count == 0
+
+    def put(self, p, t, c, z, image, timeout=None):
+        """
+        Copies an image into the buffer, waits for a free slot while the buffer is full
+
+        Parameters
+        ----------
+        p:              (int) position of the image
+        t:              (int) timepoint of the image
+        c:              (int) channel of the image
+        z:              (int) slice of the image
+        image:          (nd-array) image of shape (Y, X)
+        timeout:        (float or None) seconds to wait for a free slot, forever if None
+
+        Returns
+        -------
+        put:            (bool) False if the buffer stayed full for timeout seconds or was closed
+
+        """
+
+        with self._condition:
+            if not self._condition.wait_for(
+                lambda: self.closed
+                or self._count + self._held < self.capacity,
+                timeout,
+            ):
+                return False
+            if self.closed:
+                return False
+
+            if self._slots is None:
+                self._slots = np.empty(
+                    (self.capacity,) + image.shape, dtype=image.dtype
+                )
+            elif image.shape != self._slots.shape[1:]:
+                raise ValueError(
+                    f"Image of shape {image.shape} does not fit the buffer slots of shape "
+                    f"{self._slots.shape[1:]}"
+                )
+
+            slot = (self._head + self._count) % self.capacity
+            self._slots[slot] = image
+            self._coords[slot] = (p, t, c, z)
+            self._count += 1
+            self._condition.notify_all()
+
+        return True
+
+    def get(self, timeout=None):
+        """
+        Takes the oldest frame from the buffer.  The image of the frame is a view of its slot,
+        valid until the next call of get.
+
+        Parameters
+        ----------
+        timeout:        (float or None) seconds to wait for a frame, forever if None
+
+        Returns
+        -------
+        frame:          (Frame or None) None if no frame arrived within timeout seconds or if the
+                        buffer is exhausted
+
+        """
+
+        with self._condition:
+            # release the slot of the previous frame
+            self._held = 0
+            self._condition.notify_all()
+            self._condition.wait_for(
+                lambda: self.closed or self._count > 0, timeout
+            )
+            if self._count == 0:
+                return None
+
+            slot = self._head
+            self._head = (self._head + 1) % self.capacity
+            self._count -= 1
+            self._held = 1
+
+            return Frame(*self._coords[slot], self._slots[slot])
+
+    def close(self):
+        """
+        Closes the buffer, the frames left in the buffer can still be taken
+        """
+
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
+
+
+class ImageSource:
+    """
+    Base class of the sources of live images.  A source pushes the images of an acquisition into
+    a RingBuffer from its own thread, in the order of acquisition, and closes the buffer once it
+    is done.  Subclasses implement run.
+    """
+
+    def __init__(self):
+        self.error = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self, buffer):
+        """
+        Starts pushing images into buffer
+
+        Parameters
+        ----------
+        buffer:         (RingBuffer) buffer receiving the images
+        """
+
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(buffer,), daemon=True
+        )
+        self._thread.start()
+
+    def _run(self, buffer):
+        try:
+            self.run(buffer)
+        except Exception as ex:
+            self.error = ex
+        finally:
+            buffer.close()
+
+    def run(self, buffer):
+        raise NotImplementedError
+
+    @property
+    def stopped(self):
+        return self._stop.is_set()
+
+    def stop(self):
+        """
+        Stops pushing images and waits for the source thread to finish
+        """
+
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _put(self, buffer, p, t, c, z, image):
+        """
+        pushes an image into buffer, waits for a free slot until the source is stopped
+        """
+
+        while not self.stopped:
+            if buffer.put(p, t, c, z, image, timeout=0.1):
+                return True
+            if buffer.closed:
+                return False
+
+        return False
+
+
+class FakeImageSource(ImageSource):
+    """
+    Local source replaying a (P, T, C, Z, Y, X) array in the acquisition order of Micro-Manager,
+    for testing live reconstruction without a microscope.
+    """
+
+    def __init__(self, data, acq_order=1, interval=0):
+        """
+
+        Parameters
+        ----------
+        data:           (nd-array) images of dimensions (P, T, C, Z, Y, X)
+        acq_order:      (int) Micro-Manager acqOrderMode, see ACQ_ORDERS
+        interval:       (float) seconds between images
+        """
+
+        super().__init__()
+        self.data = data
+        self.acq_order = acq_order
+        self.interval = interval
+
+    def coords(self):
+        """
+        (p, t, c, z) coordinates of the images in acquisition order
+        """
+
+        P, T, C, Z = self.data.shape[:4]
+        sizes = {"P": P, "T": T, "C": C, "Z": Z}
+        order = ACQ_ORDERS[self.acq_order]
+        for index in np.ndindex(*(sizes[dim] for dim in order)):
+            coord = dict(zip(order, index))
+            yield coord["P"], coord["T"], coord["C"], coord["Z"]
+
+    def run(self, buffer):
+        for p, t, c, z in self.coords():
+            if self.interval:
+                time.sleep(self.interval)
+            if not self._put(buffer, p, t, c, z, self.data[p, t, c, z]):
+                return
+
+
+class _TiffTail:
+    """
+    Reads the images appended to a Micro-Manager multipage tiff file while it is being written.
+    Micro-Manager pre-allocates the IndexMap of the file and fills its entries as images are
+    written, new images are found from the IndexMap and read at the pixel offset of their image
+    file directory.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.n_read = 0
+        self._byte_order = None
+        self._index_map = None
+        self._buffer = None
+
+    def _map(self, size):
+        if self._buffer is None or len(self._buffer) < size:
+            self._buffer = np.memmap(self.path, dtype=np.uint8, mode="r")
+
+        return self._buffer
+
+    def _read_header(self, file):
+        header = file.read(16)
+        if len(header) < 16 or header[:2] not in (b"II", b"MM"):
+            return False
+        byte_order = "<" if header[:2] == b"II" else ">"
+        offset_header, index_map_offset = struct.unpack_from(
+            byte_order + "II", header, 8
+        )
+        if offset_header != INDEX_MAP_OFFSET_HEADER or index_map_offset == 0:
+            return False
+
+        file.seek(index_map_offset)
+        index_map = file.read(8)
+        if len(index_map) < 8:
+            return False
+        map_header, count = struct.unpack(byte_order + "II", index_map)
+        if map_header != INDEX_MAP_HEADER:
+            raise ValueError(f"{self.path} has no valid IndexMap")
+
+        self._byte_order = byte_order
+        self._index_map = (index_map_offset + 8, count)
+        return True
+
+    @property
+    def full(self):
+        """
+        whether all entries of the IndexMap were read
+        """
+
+        return (
+            self._index_map is not None and self.n_read >= self._index_map[1]
+        )
+
+    def read_new(self):
+        """
+        Reads the images written since the last call
+
+        Returns
+        -------
+        frames:         (list) Frame of every new image, images are views of the memory-mapped file
+
+        """
+
+        frames = []
+        with open(self.path, "rb") as file:
+            if self._index_map is None and not self._read_header(file):
+                return frames
+
+            first_entry, count = self._index_map
+            entry = struct.Struct(self._byte_order + INDEX_MAP_ENTRY.format)
+            file.seek(first_entry + self.n_read * entry.size)
+            entries = file.read(
+                min(INDEX_MAP_WINDOW, count - self.n_read) * entry.size
+            )
+            size = os.fstat(file.fileno()).st_size
+
+        for c, z, t, p, ifd_offset in entry.iter_unpack(
+            entries[: len(entries) - len(entries) % entry.size]
+        ):
+            if ifd_offset == 0 or ifd_offset >= size:
+                break
+
+            buffer = self._map(size)
+            try:
+                location = image_location(
+                    buffer, self._byte_order, ifd_offset
+                )
+            except struct.error:
+                # the image file directory is still being written
+                break
+            if location is None:
+                raise ValueError(
+                    f"Image {(p, t, c, z)} of {self.path} can't be read directly"
+                )
+            offset, height, width, dtype = location[:4]
+            dtype = np.dtype(dtype)
+            if offset + height * width * dtype.itemsize > size:
+                # the pixel data is still being written
+                break
+
+            image = np.ndarray(
+                (height, width), dtype=dtype, buffer=buffer, offset=offset
+            )
+            frames.append(Frame(p, t, c, z, image))
+            self.n_read += 1
+
+        return frames
+
+
+class TiffTailSource(ImageSource):
+    """
+    File-tail source: reads the images of a Micro-Manager acquisition from its multipage tiff
+    files while they are written.  Used when image-arrival events are not available.
+    """
+
+    def __init__(self, data_dir, prefix, n_images, poll_interval=0.01):
+        """
+
+        Parameters
+        ----------
+        data_dir:       (str) folder of the acquisition
+        prefix:         (str) prefix of the tiff files, the first file is <prefix>_MMStack.ome.tif
+                        followed by <prefix>_MMStack_<i>.ome.tif
+        n_images:       (int) number of images of the acquisition
+        poll_interval:  (float) seconds between checks for new images
+        """
+
+        super().__init__()
+        self.data_dir = data_dir
+        self.prefix = prefix
+        self.n_images = n_images
+        self.poll_interval = poll_interval
+
+    def file_path(self, file_count):
+        """
+        path of the tiff file written file_count-th
+        """
+
+        suffix = f"_{file_count}" if file_count else ""
+        return os.path.join(
+            self.data_dir, f"{self.prefix}_MMStack{suffix}.ome.tif"
+        )
+
+    def run(self, buffer):
+        n_read = 0
+        file_count = 0
+        tail = None
+        while n_read < self.n_images and not self.stopped:
+            if tail is None:
+                if not os.path.exists(self.file_path(file_count)):
+                    time.sleep(self.poll_interval)
+                    continue
+                tail = _TiffTail(self.file_path(file_count))
+
+            # once the next file exists the current file is complete
+            next_file = tail.full or os.path.exists(
+                self.file_path(file_count + 1)
+            )
+            frames = tail.read_new()
+            for p, t, c, z, image in frames:
+                if not self._put(buffer, p, t, c, z, image):
+                    return
+                n_read += 1
+
+            if frames:
+                continue
+            if next_file:
+                tail = None
+                file_count += 1
+            else:
+                time.sleep(self.poll_interval)
+
+
+class StackAssembler:
+    """
+    Assembles live frames into the (C, Z, Y, X) stacks of every (position, timepoint).  Stacks of
+    channel-first acquisitions are reconstructed slice by slice as soon as all channels of a slice
+    arrived, stacks of z-first acquisitions once all of their images arrived.
+    """
+
+    def __init__(self, n_channels, n_slices, channel_first):
+        """
+
+        Parameters
+        ----------
+        n_channels:     (int) number of channels
+        n_slices:       (int) number of slices
+        channel_first:  (bool) whether the channels of a slice are acquired before the next slice
+        """
+
+        self.n_channels = n_channels
+        self.n_slices = n_slices
+        self.channel_first = channel_first
+        self._stacks = dict()
+
+    def add(self, frame):
+        """
+        Adds a frame to the stack of its (position, timepoint)
+
+        Parameters
+        ----------
+        frame:          (Frame) frame taken from a RingBuffer
+
+        Returns
+        -------
+        ready:          (list) (p, t, z, array) tuples of the data ready to be reconstructed.  array
+                        is a (C, Y, X) slice in channel-first mode, a (C, Z, Y, X) stack otherwise,
+                        of the dtype of the frames.
+
+        """
+
+        p, t, c, z, image = frame
+        if (p, t) not in self._stacks:
+            self._stacks[(p, t)] = (
+                np.zeros(
+                    (self.n_channels, self.n_slices) + image.shape,
+                    dtype=image.dtype,
+                ),
+                np.zeros(self.n_slices, dtype=int),
+            )
+        stack, counts = self._stacks[(p, t)]
+        stack[c, z] = image
+        counts[z] += 1
+
+        ready = []
+        if (
+            self.channel_first
+            and self.n_slices > 1
+            and counts[z] == self.n_channels
+        ):
+            ready.append((p, t, z, stack[:, z]))
+        if counts.sum() == self.n_channels * self.n_slices:
+            if not self.channel_first or self.n_slices == 1:
+                ready.append((p, t, self.n_slices - 1, stack))
+            del self._stacks[(p, t)]
+
+        return ready
+
+
+def source_frames(source, capacity=16):
+    """
+    Frames of an image source in the order of acquisition
+
+    Parameters
+    ----------
+    source:         (ImageSource) source of the images, started and stopped by the generator
+    capacity:       (int) number of image slots between the source and the consumer
+
+    Returns
+    -------
+    frames:         (generator) Frame of every image, images are valid until the next frame is
+                    taken
+
+    """
+
+    buffer = RingBuffer(capacity)
+    source.start(buffer)
+    try:
+        while not buffer.exhausted:
+            frame = buffer.get(timeout=0.1)
+            if frame is not None:
+                yield frame
+    finally:
+        buffer.close()
+        source.stop()
+
+    if source.error is not None:
+        raise source.error
+
+
+class AcquisitionBuffer:
+    """
+    Preallocated (T, C, Z, Y, X) array receiving the images of a single position acquisition as
+    they are acquired, so that acquisitions are handed over without writing and re-reading their
+    files.  Buffers that don't fit into the free RAM are memory-mapped to an anonymous temporary
+    file instead.  Use as a context manager, the temporary file is released on exit while the
+    array stays valid as long as it is referenced.
+    """
+
+    def __init__(
+        self, shape, dtype="uint16", max_ram_bytes=None, file_dir=None
+    ):
+        """
+
+        Parameters
+        ----------
+        shape:          (tuple) shape (T, C, Z, Y, X) of the acquisition
+        dtype:          (str) data type of the images
+        max_ram_bytes:  (int or None) largest buffer held in RAM, BUFFER_RAM_FRACTION of the free
+                        RAM if None
+        file_dir:       (str or None) directory of the temporary file of file-backed buffers,
+                        the default temporary directory if None
+        """
+
+        if len(shape) != 5:
+            raise ValueError("Buffer shape must be (T, C, Z, Y, X)")
+
+        self.shape = tuple(int(dim) for dim in shape)
+        self.dtype = np.dtype(dtype)
+        if max_ram_bytes is None:
+            max_ram_bytes = (
+                psutil.virtual_memory().available * BUFFER_RAM_FRACTION
+            )
+
+        nbytes = int(np.prod(self.shape)) * self.dtype.itemsize
+        self.file_backed = nbytes > max_ram_bytes
+        self._file = None
+        if self.file_backed:
+            self._file = tempfile.TemporaryFile(dir=file_dir)
+            self.array = np.memmap(
+                self._file, dtype=self.dtype, mode="w+", shape=self.shape
+            )
+        else:
+            self.array = np.empty(self.shape, dtype=self.dtype)
+
+        self._received = np.zeros(self.shape[:3], dtype=bool)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def n_received(self):
+        """
+        number of images received
+        """
+
+        return int(self._received.sum())
+
+    @property
+    def complete(self):
+        """
+        whether every image of the acquisition was received
+        """
+
+        return bool(self._received.all())
+
+    def add(self, t, c, z, image):
+        """
+        Copies an image into the buffer
+
+        Parameters
+        ----------
+        t:              (int) timepoint of the image
+        c:              (int) channel of the image
+        z:              (int) slice of the image
+        image:          (nd-array) image of shape (Y, X)
+        """
+
+        self.array[t, c, z] = np.asarray(image).reshape(self.shape[3:])
+        self._received[t, c, z] = True
+
+    def fill(self, frames):
+        """
+        Copies frames into the buffer, e.g. the frames of an acquisition engine or of an image
+        source
+
+        Parameters
+        ----------
+        frames:         (iterable) Frame of every image, all of position 0
+
+        Returns
+        -------
+        complete:       (bool) whether every image of the acquisition was received
+
+        """
+
+        for p, t, c, z, image in frames:
+            if p != 0:
+                raise ValueError(
+                    "Acquisition buffers hold single position acquisitions"
+                )
+            self.add(t, c, z, image)
+
+        return self.complete
+
+    def close(self):
+        """
+        Releases the temporary file of a file-backed buffer, its disk space is freed once the
+        array is no longer referenced
+        """
+
+        if self._file is not None:
+            self.array.flush()
+            self._file.close()
+            self._file = None
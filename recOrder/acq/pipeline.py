@@ -0,0 +1,211 @@
+import queue
+import itertools
+import threading
+import numpy as np
+
+_STOP = object()
+
+
+class AsyncPipeline:
+    """
+    Producer/consumer pipeline: items put by the producer thread are consumed in order by a
+    consumer thread, so that producing the next item overlaps with consuming the previous one.
+    put blocks while max_pending items wait to be consumed.  An error of the consumer is raised
+    in the producer by the next put or by close.
+    """
+
+    def __init__(self, consume, max_pending=1):
+        """
+
+        Parameters
+        ----------
+        consume:        (callable) function consuming one item, called from the consumer thread
+        max_pending:    (int) number of items waiting to be consumed before put blocks
+        """
+
+        self.consume = consume
+        self.max_pending = max(1, max_pending)
+        self.error = None
+        self._queue = queue.Queue(self.max_pending)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            if self.error is not None:
+                # drop the remaining items after an error
+                continue
+            try:
+                self.consume(item)
+            except BaseException as ex:
+                self.error = ex
+
+    def _raise_error(self):
+        if self.error is not None:
+            raise self.error
+
+    def put(self, item, check_abort=None):
+        """
+        Hands an item to the consumer, waits while max_pending items are pending
+
+        Parameters
+        ----------
+        item:           (object) item to consume
+        check_abort:    (callable or None) called while waiting, raises to abort
+        """
+
+        while True:
+            self._raise_error()
+            if check_abort is not None:
+                check_abort()
+            try:
+                self._queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def close(self):
+        """
+        Waits until all items were consumed and stops the consumer thread
+        """
+
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._raise_error()
+
+
+class WriteBehindArray:
+    """
+    Write-behind buffer of a zarr array.  Writes are accumulated in memory blocks aligned to the
+    chunks of the array, complete blocks are written by a writer thread so that the producer is
+    not held up by many small compressed writes.  Every element is expected to be written once,
+    close writes the incomplete blocks.
+    """
+
+    def __init__(self, array, block_shape=None, max_pending=2, on_write=None):
+        """
+
+        Parameters
+        ----------
+        array:          (zarr array) array receiving the data
+        block_shape:    (tuple or None) shape of the blocks written at once, a multiple of the
+                        chunks of the array.  The chunks of the array if None.
+        max_pending:    (int) number of complete blocks waiting to be written before writes block
+        on_write:       (callable or None) called with the region (tuple of slices) of every block
+                        once it was written to the array, from the writer thread
+        """
+
+        block_shape = array.chunks if block_shape is None else block_shape
+        if len(block_shape) != array.ndim:
+            raise ValueError(
+                f"Block shape {block_shape} does not match the dimensions of the array"
+            )
+        block_shape = tuple(
+            min(int(block), size)
+            for block, size in zip(block_shape, array.shape)
+        )
+        for block, chunk, size in zip(block_shape, array.chunks, array.shape):
+            if block % chunk and block != size:
+                raise ValueError(
+                    f"Block shape {block_shape} is not aligned to the chunks {array.chunks}"
+                )
+
+        self.array = array
+        self.block_shape = block_shape
+        self.on_write = on_write
+        self._fill_value = array.fill_value if array.fill_value else 0
+        self._blocks = dict()
+        self._pipeline = AsyncPipeline(self._write_block, max_pending)
+
+    def _ranges(self, key):
+        """
+        (start, stop, keep) of every dimension of an index, keep is False for integer indices
+        """
+
+        if not isinstance(key, tuple):
+            key = (key,)
+        if len(key) > self.array.ndim:
+            raise IndexError(f"Too many indices for {self.array.ndim}D array")
+        key = key + (slice(None),) * (self.array.ndim - len(key))
+
+        ranges = []
+        for index, size in zip(key, self.array.shape):
+            if isinstance(index, slice):
+                start, stop, step = index.indices(size)
+                if step != 1:
+                    raise IndexError("Only contiguous slices can be written")
+                ranges.append((start, stop, True))
+            else:
+                index = int(index) + size if index < 0 else int(index)
+                if not 0 <= index < size:
+                    raise IndexError(f"Index {index} is out of bounds")
+                ranges.append((index, index + 1, False))
+
+        return ranges
+
+    def _block_region(self, block_index):
+        return tuple(
+            slice(i * block, min((i + 1) * block, size))
+            for i, block, size in zip(
+                block_index, self.block_shape, self.array.shape
+            )
+        )
+
+    def __setitem__(self, key, value):
+        ranges = self._ranges(key)
+        region_shape = tuple(stop - start for start, stop, _ in ranges)
+        value = np.broadcast_to(
+            np.asarray(value, dtype=self.array.dtype),
+            tuple(n for n, (_, _, keep) in zip(region_shape, ranges) if keep),
+        ).reshape(region_shape)
+
+        block_indices = [
+            range(start // block, (stop - 1) // block + 1)
+            for (start, stop, _), block in zip(ranges, self.block_shape)
+        ]
+        for block_index in itertools.product(*block_indices):
+            block_region = self._block_region(block_index)
+            if block_index not in self._blocks:
+                self._blocks[block_index] = [
+                    np.full(
+                        tuple(s.stop - s.start for s in block_region),
+                        self._fill_value,
+                        dtype=self.array.dtype,
+                    ),
+                    0,
+                ]
+            block = self._blocks[block_index]
+
+            # copy the intersection of the region and the block
+            src, dst = [], []
+            for (start, stop, _), s in zip(ranges, block_region):
+                low, high = max(start, s.start), min(stop, s.stop)
+                src.append(slice(low - start, high - start))
+                dst.append(slice(low - s.start, high - s.start))
+            block[0][tuple(dst)] = value[tuple(src)]
+            block[1] += int(np.prod([s.stop - s.start for s in dst]))
+
+            if block[1] >= block[0].size:
+                del self._blocks[block_index]
+                self._pipeline.put((block_region, block[0]))
+
+    def _write_block(self, item):
+        region, data = item
+        self.array[region] = data
+        if self.on_write is not None:
+            self.on_write(region)
+
+    def close(self):
+        """
+        Writes the incomplete blocks and waits until all blocks were written
+        """
+
+        try:
+            for block_index, (data, _) in self._blocks.items():
+                self._pipeline.put((self._block_region(block_index), data))
+            self._blocks = dict()
+        finally:
+            self._pipeline.close()
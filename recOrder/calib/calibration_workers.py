@@ -9,7 +9,7 @@ from recOrder.compute.reconstructions import (
     reconstruct_qlipp_stokes,
 )
 from recOrder.io.core_functions import set_lc_state, snap_and_average
-from recOrder.io.utils import MockEmitter
+from recOrder.io.utils import MockEmitter, save_bg_stokes, BG_STOKES_FILE
 from recOrder.calib.Calibration import LC_DEVICE_NAME
 from recOrder.io.metadata_reader import MetadataReader, get_last_metadata_file
 from waveorder.io.writer import WaveorderWriter
@@ -330,6 +330,9 @@ class BackgroundCaptureWorker(
             ):
                 os.remove(os.path.join(bg_path, "calibration_metadata.txt"))
 
+            if os.path.exists(os.path.join(bg_path, BG_STOKES_FILE)):
+                os.remove(os.path.join(bg_path, BG_STOKES_FILE))
+
         self._check_abort()
 
         # capture and return background images
@@ -353,6 +356,11 @@ class BackgroundCaptureWorker(
         # Reconstruct birefringence from BG images
         stokes = reconstruct_qlipp_stokes(imgs, recon, None)
 
+        # Save the background Stokes so that acquisitions don't recompute them
+        save_bg_stokes(
+            bg_path, stokes, self.calib.calib_scheme, self.calib.swing
+        )
+
         self._check_abort()
 
         self.birefringence = reconstruct_qlipp_birefringence(stokes, recon)
@@ -0,0 +1,436 @@
+import os
+import numpy as np
+import zarr
+from tqdm import tqdm
+from waveorder.io.reader import WaveorderReader
+from waveorder.io.writer import WaveorderWriter
+from recOrder.compute.reconstructions import (
+    initialize_reconstructor,
+    reconstruct_qlipp_stokes,
+    reconstruct_qlipp_birefringence,
+    reconstruct_phase2D,
+    reconstruct_phase3D,
+)
+from recOrder.io.utils import (
+    load_bg,
+    rec_bkg_to_wo_bkg,
+    extract_reconstruction_parameters,
+    default_hcs_metadata,
+    init_position_arrays,
+)
+from recOrder.compute.process_pool import worker_state, ordered_results
+from recOrder.io.sharded_store import (
+    SHARD_LAYOUTS,
+    ShardedStore,
+    is_sharded,
+    position_arrays,
+)
+
+BIREFRINGENCE_CHANNELS = ["Retardance", "Orientation", "BF", "Pol"]
+PIPELINES = ["birefringence", "QLIPP", "PhaseFromBF"]
+
+
+class ReconstructionPipeline:
+    """
+    Reconstructs (C, Z, Y, X) stacks with a single shared reconstructor.  Runs
+    stokes -> birefringence -> phase depending on the pipeline.
+    """
+
+    def __init__(
+        self,
+        pipeline,
+        image_dim,
+        n_slices,
+        reconstructor_args,
+        bg_data=None,
+        bf_channel=0,
+        regularizer="Tikhonov",
+        strength=1e-4,
+        rho=1,
+        itr=50,
+    ):
+        """
+
+        Parameters
+        ----------
+        pipeline:               (str) 'birefringence', 'QLIPP' or 'PhaseFromBF'
+        image_dim:              (tuple) (Y, X) shape of the images
+        n_slices:               (int) number of z-slices of the input stacks
+        reconstructor_args:     (dict) keyword arguments of initialize_reconstructor.
+                                        bg_correction accepts recOrder's options ('None', 'global',
+                                        'local_fit', 'local_fit+').  precision ('float32' or 'float64')
+                                        sets both the reconstructor and the working precision
+        bg_data:                (nd-array or None) background images of shape (C, Y, X), required for
+                                        'global' and 'local_fit+' background correction
+        bf_channel:             (int) index of the brightfield channel for the PhaseFromBF pipeline
+        regularizer:            (str) phase regularization method 'Tikhonov' or 'TV'
+        strength:               (float) phase regularization strength
+        rho:                    (float) TV regularization parameter
+        itr:                    (int) TV regularization number of iterations
+        """
+
+        if pipeline not in PIPELINES:
+            raise ValueError(f"Pipeline {pipeline} not understood")
+
+        self.pipeline = pipeline
+        self.image_dim = tuple(image_dim)
+        self.n_slices = n_slices
+        self.bf_channel = bf_channel
+        self.regularizer = regularizer
+        self.strength = strength
+        self.rho = rho
+        self.itr = itr
+
+        reconstructor_args = dict(reconstructor_args)
+        self.bg_option = reconstructor_args.pop("bg_correction", "None")
+        if pipeline == "PhaseFromBF":
+            # brightfield data has no polarization states
+            reconstructor_args.pop("swing", None)
+            reconstructor_args.pop("calibration_scheme", None)
+        self.mode = reconstructor_args.get("mode", "3D")
+        self.precision = reconstructor_args.get("precision", "float64")
+        self.wavelength = reconstructor_args["wavelength_nm"]
+        self.n_states = (
+            5
+            if reconstructor_args.get("calibration_scheme") == "5-State"
+            else 4
+        )
+
+        self.reconstructor = initialize_reconstructor(
+            pipeline,
+            image_dim=self.image_dim,
+            n_slices=n_slices,
+            bg_correction=rec_bkg_to_wo_bkg(self.bg_option),
+            **reconstructor_args,
+        )
+        self.bg_stokes = self._compute_bg_stokes(bg_data)
+
+    def _compute_bg_stokes(self, bg_data):
+        # This block mimics PolarizationAcquisitionWorker._reconstruct
+        if self.pipeline == "PhaseFromBF":
+            return None
+        if self.bg_option in ["global", "local_fit+"]:
+            if bg_data is None:
+                raise ValueError(
+                    f"Background data is required for {self.bg_option} background correction"
+                )
+            bg_stokes = self.reconstructor.Stokes_recon(
+                np.asarray(bg_data)[: self.n_states]
+            )
+            return self.reconstructor.Stokes_transform(bg_stokes)
+        elif self.bg_option == "local_fit":
+            bg_stokes = np.zeros((5,) + self.image_dim)
+            bg_stokes[0, ...] = 1  # Set background to "identity" Stokes parameters.
+            return bg_stokes
+        else:
+            return None
+
+    @property
+    def channel_names(self):
+        """
+        Names of the reconstructed channels, in order
+        """
+
+        names = []
+        if self.pipeline != "PhaseFromBF":
+            names += BIREFRINGENCE_CHANNELS
+        if self.pipeline != "birefringence":
+            names.append("Phase2D" if self.mode == "2D" else "Phase3D")
+
+        return names
+
+    @property
+    def output_slices(self):
+        """
+        Number of z-slices of the reconstructed stacks
+        """
+
+        if self.pipeline != "birefringence" and self.mode == "2D":
+            return 1
+        return self.n_slices
+
+    def _reconstruct_phase(self, S0):
+        if self.mode == "2D":
+            phase = reconstruct_phase2D(
+                S0,
+                self.reconstructor,
+                method=self.regularizer,
+                reg_p=self.strength,
+                rho=self.rho,
+                itr=self.itr,
+                precision=self.precision,
+            )
+            return phase[np.newaxis, np.newaxis]
+        else:
+            phase = reconstruct_phase3D(
+                S0,
+                self.reconstructor,
+                method=self.regularizer,
+                reg_re=self.strength,
+                rho=self.rho,
+                itr=self.itr,
+                precision=self.precision,
+            )
+            return phase[np.newaxis]
+
+    def reconstruct(self, data):
+        """
+        Reconstruct a single stack.
+
+        Parameters
+        ----------
+        data:           (nd-array or zarr array) raw stack of shape (C, Z, Y, X)
+
+        Returns
+        -------
+        recon_data:     (nd-array) float32 array of shape (len(channel_names), output_slices, Y, X)
+        """
+
+        results = []
+        if self.pipeline == "PhaseFromBF":
+            S0 = np.asarray(data[self.bf_channel])
+        else:
+            stokes = reconstruct_qlipp_stokes(
+                np.asarray(data[: self.n_states]),
+                self.reconstructor,
+                self.bg_stokes,
+                precision=self.precision,
+            )
+            if self.pipeline == "QLIPP" and self.mode == "2D":
+                birefringence = reconstruct_qlipp_birefringence(
+                    np.mean(stokes, axis=1),
+                    self.reconstructor,
+                    precision=self.precision,
+                )[:, np.newaxis]
+            else:
+                birefringence = reconstruct_qlipp_birefringence(
+                    stokes, self.reconstructor, precision=self.precision
+                )
+            birefringence[0] = (
+                birefringence[0] / (2 * np.pi) * self.wavelength
+            )
+            results.append(birefringence)
+            S0 = stokes[0]
+
+        if self.pipeline != "birefringence":
+            results.append(self._reconstruct_phase(S0))
+
+        return np.concatenate(results, axis=0).astype(np.float32)
+
+    def metadata(self, magnification=None):
+        """
+        Reconstruction parameters to store alongside the reconstructed data
+
+        Parameters
+        ----------
+        magnification:  (float or None) magnification of the microscope setup
+
+        Returns
+        -------
+        meta:           (dict) dictionary of reconstruction parameters
+        """
+
+        meta = extract_reconstruction_parameters(
+            self.reconstructor, magnification
+        )
+        meta["pipeline"] = self.pipeline
+        meta["precision"] = self.precision
+        if self.pipeline != "birefringence":
+            meta["regularization_method"] = self.regularizer
+            meta["regularization_strength"] = self.strength
+            if self.regularizer == "TV":
+                meta["rho"] = self.rho
+                meta["itr"] = self.itr
+
+        return meta
+
+
+def _get_pol_channel_indices(channel_names, n_states):
+    states = [f"State{i}" for i in range(n_states)]
+    if channel_names and all(state in channel_names for state in states):
+        return [channel_names.index(state) for state in states]
+    return list(range(n_states))
+
+
+def _init_worker(input_path, pipeline_kwargs):
+    # A forked worker inherits the parent's initialized pipeline, a spawned
+    # worker initializes its own (fast when the reconstructor is cached)
+    if "pipeline" not in worker_state:
+        worker_state["pipeline"] = ReconstructionPipeline(**pipeline_kwargs)
+    if is_sharded(input_path):
+        worker_state["arrays"] = [
+            array for _, array in position_arrays(input_path)
+        ]
+    else:
+        worker_state["reader"] = WaveorderReader(input_path)
+    worker_state["position"] = None
+
+
+def _reconstruct_unit(p, t, channel_idx):
+    if worker_state["position"] != p:
+        worker_state["data"] = (
+            worker_state["arrays"][p]
+            if "arrays" in worker_state
+            else worker_state["reader"].get_zarr(p)
+        )
+        worker_state["position"] = p
+
+    stack = worker_state["data"].get_orthogonal_selection(
+        (t, channel_idx, slice(None))
+    )
+
+    return worker_state["pipeline"].reconstruct(stack)
+
+
+def run_reconstruction(
+    input_path,
+    output_path,
+    pipeline,
+    reconstructor_args,
+    positions=None,
+    timepoints=None,
+    bg_path=None,
+    bf_channel=0,
+    regularizer="Tikhonov",
+    strength=1e-4,
+    rho=1,
+    itr=50,
+    num_processes=1,
+    shards=None,
+):
+    """
+    Reconstruct a whole dataset position by position and timepoint by timepoint.
+    Data is read lazily and each (P, T) reconstruction is written to the output zarr
+    as soon as it is computed, so the dataset never needs to fit in memory.
+
+    Parameters
+    ----------
+    input_path:             (str) path to the raw ome-tiff or zarr dataset
+    output_path:            (str) path of the output zarr store (../../Reconstruction.zarr)
+    pipeline:               (str) 'birefringence', 'QLIPP' or 'PhaseFromBF'
+    reconstructor_args:     (dict) keyword arguments of initialize_reconstructor (see ReconstructionPipeline)
+    positions:              (list or None) positions to reconstruct, all positions if None
+    timepoints:             (list or None) timepoints to reconstruct, all timepoints if None
+    bg_path:                (str or None) path to the folder containing background images
+    bf_channel:             (int) index of the brightfield channel for the PhaseFromBF pipeline
+    regularizer:            (str) phase regularization method 'Tikhonov' or 'TV'
+    strength:               (float) phase regularization strength
+    rho:                    (float) TV regularization parameter
+    itr:                    (int) TV regularization number of iterations
+    num_processes:          (int) number of worker processes reconstructing (P, T) stacks in parallel.
+                                    Results are still written to the output in (P, T) order.
+    shards:                 (str or None) sharded storage layout of the output, 'position' or 'time'
+                                    (see ZarrConverter).  None writes one file per chunk.
+
+    Returns
+    -------
+
+    """
+
+    if not output_path.endswith(".zarr"):
+        raise ValueError("Please specify .zarr at the end of your output")
+
+    reader = WaveorderReader(input_path)
+    T, C, Z, Y, X = reader.shape
+    positions = (
+        list(range(reader.get_num_positions()))
+        if not positions
+        else list(positions)
+    )
+    timepoints = list(range(T)) if not timepoints else list(timepoints)
+
+    reconstructor_args = dict(reconstructor_args)
+    if not reconstructor_args.get("z_step_um"):
+        reconstructor_args["z_step_um"] = reader.z_step_size
+
+    bg_data = load_bg(bg_path, Y, X) if bg_path else None
+
+    # only the channels needed by the pipeline are read from disk
+    pipeline_kwargs = dict(
+        pipeline=pipeline,
+        image_dim=(Y, X),
+        n_slices=Z,
+        reconstructor_args=reconstructor_args,
+        bg_data=bg_data,
+        bf_channel=0,
+        regularizer=regularizer,
+        strength=strength,
+        rho=rho,
+        itr=itr,
+    )
+    recon_pipeline = ReconstructionPipeline(**pipeline_kwargs)
+    worker_state["pipeline"] = recon_pipeline
+
+    if pipeline == "PhaseFromBF":
+        channel_idx = [bf_channel]
+    else:
+        channel_idx = _get_pol_channel_indices(
+            reader.channel_names, recon_pipeline.n_states
+        )
+
+    save_dir = os.path.dirname(output_path)
+    if save_dir and not os.path.exists(save_dir):
+        os.makedirs(save_dir)
+    writer = WaveorderWriter(
+        save_dir,
+        hcs=True,
+        hcs_meta=default_hcs_metadata(
+            [f"Pos_{p:03d}" for p in range(len(positions))],
+            os.path.splitext(os.path.basename(output_path))[0],
+        ),
+    )
+    writer.create_zarr_root(os.path.basename(output_path))
+    store = (
+        zarr.open(ShardedStore(output_path, SHARD_LAYOUTS[shards]), "r+")
+        if shards is not None
+        else None
+    )
+
+    chan_names = recon_pipeline.channel_names
+    n_chan = len(chan_names)
+    n_slices = recon_pipeline.output_slices
+
+    # the metadata and empty arrays of all positions are written before reconstructing
+    _, arrays = init_position_arrays(
+        writer,
+        data_shape=(len(timepoints), n_chan, n_slices, Y, X),
+        chunk_size=(1, 1, 1, Y, X),
+        chan_names=chan_names,
+        dtype="float32",
+        store=store,
+    )
+
+    units = [(p, t, channel_idx) for p in positions for t in timepoints]
+    indices = [
+        (p_out, t_out)
+        for p_out in range(len(positions))
+        for t_out in range(len(timepoints))
+    ]
+
+    bar_format = "Status: |{bar}|{n_fmt}/{total_fmt} (Time Remaining: {remaining}), {rate_fmt}{postfix}]"
+    try:
+        # each worker holds one initialized reconstructor
+        results = ordered_results(
+            _reconstruct_unit,
+            units,
+            num_processes,
+            _init_worker,
+            (input_path, pipeline_kwargs),
+        )
+        for (p_out, t_out), recon_data in tqdm(
+            zip(indices, results), total=len(units), bar_format=bar_format
+        ):
+            arrays[p_out][t_out, :n_chan, :n_slices] = recon_data
+    finally:
+        worker_state.clear()
+        if store is not None:
+            store.store.close()
+
+    meta = writer.store.attrs.asdict()
+    meta["recOrder"] = recon_pipeline.metadata(
+        reconstructor_args.get("mag")
+    )
+    meta["recOrder"]["input"] = input_path
+    meta["recOrder"]["positions"] = positions
+    meta["recOrder"]["timepoints"] = timepoints
+    writer.store.attrs.put(meta)
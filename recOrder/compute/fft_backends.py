@@ -0,0 +1,178 @@
+import os
+import pickle
+import logging
+import threading
+import functools
+import contextlib
+import numpy as np
+import waveorder.util
+import waveorder.optics
+import waveorder.waveorder_reconstructor
+from recOrder.compute.reconstructor_cache import default_cache_dir
+
+FFT_BACKENDS = ["numpy", "scipy", "pyfftw"]
+
+# FFT functions waveorder imports from numpy.fft into each of its modules
+FFT_FUNCTIONS = ["fft", "ifft", "fft2", "ifft2", "fftn", "ifftn"]
+_WAVEORDER_MODULES = [
+    waveorder.util,
+    waveorder.optics,
+    waveorder.waveorder_reconstructor,
+]
+
+# waveorder's FFT functions are module globals, reconstructions with
+# different backends are serialized
+_backend_lock = threading.RLock()
+_wisdom_loaded = False
+
+
+def default_wisdom_path():
+    """
+    Default location of the FFTW wisdom, next to the reconstructor cache.  Can be overridden
+    with the RECORDER_FFTW_WISDOM environment variable.
+
+    Returns
+    -------
+    wisdom_path:    (str) path to the wisdom file
+    """
+
+    return os.environ.get(
+        "RECORDER_FFTW_WISDOM",
+        os.path.join(os.path.dirname(default_cache_dir()), "fftw_wisdom.pkl"),
+    )
+
+
+def _import_pyfftw():
+    try:
+        import pyfftw
+        import pyfftw.interfaces.scipy_fft
+    except ImportError as ex:
+        raise ImportError(
+            "The pyfftw FFT backend requires pyFFTW, install it with `pip install pyfftw`"
+        ) from ex
+
+    return pyfftw
+
+
+def _load_wisdom(pyfftw, wisdom_path):
+    global _wisdom_loaded
+    if _wisdom_loaded or not os.path.exists(wisdom_path):
+        return
+    try:
+        with open(wisdom_path, "rb") as file:
+            pyfftw.import_wisdom(pickle.load(file))
+    except Exception as ex:
+        logging.warning(f"Could not load FFTW wisdom {wisdom_path}: {ex}")
+    _wisdom_loaded = True
+
+
+def _save_wisdom(pyfftw, wisdom_path):
+    try:
+        os.makedirs(os.path.dirname(wisdom_path), exist_ok=True)
+        with open(wisdom_path + ".tmp", "wb") as file:
+            pickle.dump(pyfftw.export_wisdom(), file)
+        os.replace(wisdom_path + ".tmp", wisdom_path)
+    except OSError as ex:
+        logging.warning(f"Could not save FFTW wisdom {wisdom_path}: {ex}")
+
+
+def fft_functions(backend="numpy", workers=None):
+    """
+    FFT functions of a backend, with the signatures of numpy.fft
+
+    Parameters
+    ----------
+    backend:        (str) 'numpy', 'scipy' or 'pyfftw'
+    workers:        (int or None) number of threads of the scipy and pyfftw backends,
+                    all cores if None
+
+    Returns
+    -------
+    functions:      (dict) FFT function of every name in FFT_FUNCTIONS
+
+    """
+
+    if backend not in FFT_BACKENDS:
+        raise ValueError(
+            f"FFT backend {backend} not understood, use one of {FFT_BACKENDS}"
+        )
+
+    if backend == "numpy":
+        return {name: getattr(np.fft, name) for name in FFT_FUNCTIONS}
+
+    if backend == "scipy":
+        import scipy.fft as module
+    else:
+        pyfftw = _import_pyfftw()
+        pyfftw.interfaces.cache.enable()
+        pyfftw.config.PLANNER_EFFORT = "FFTW_MEASURE"
+        module = pyfftw.interfaces.scipy_fft
+
+    workers = workers if workers else os.cpu_count()
+    return {
+        name: functools.partial(getattr(module, name), workers=workers)
+        for name in FFT_FUNCTIONS
+    }
+
+
+@contextlib.contextmanager
+def use_fft_backend(backend="numpy", workers=None, wisdom_path=None):
+    """
+    Context manager running waveorder's FFTs with a backend.  Contexts of all backends,
+    including numpy, hold a common lock, so that a reconstruction never runs while another
+    thread swapped waveorder's FFTs.  The pyfftw backend plans with FFTW_MEASURE and keeps its plans as
+    wisdom on disk, so that plans are only measured once per transform shape and machine.
+
+    Parameters
+    ----------
+    backend:        (str) 'numpy', 'scipy' or 'pyfftw'
+    workers:        (int or None) number of threads of the scipy and pyfftw backends,
+                    all cores if None
+    wisdom_path:    (str or None) FFTW wisdom file, default_wisdom_path() if None
+
+    """
+
+    functions = fft_functions(backend, workers)
+    with _backend_lock:
+        if backend == "pyfftw":
+            pyfftw = _import_pyfftw()
+            wisdom_path = wisdom_path if wisdom_path else default_wisdom_path()
+            _load_wisdom(pyfftw, wisdom_path)
+            wisdom = pyfftw.export_wisdom()
+
+        originals = [
+            {name: getattr(module, name) for name in FFT_FUNCTIONS}
+            for module in _WAVEORDER_MODULES
+        ]
+        try:
+            for module in _WAVEORDER_MODULES:
+                for name, function in functions.items():
+                    setattr(module, name, function)
+            yield
+        finally:
+            for module, original in zip(_WAVEORDER_MODULES, originals):
+                for name, function in original.items():
+                    setattr(module, name, function)
+
+            if backend == "pyfftw" and pyfftw.export_wisdom() != wisdom:
+                _save_wisdom(pyfftw, wisdom_path)
+
+
+def reconstructor_backend(recon):
+    """
+    FFT backend and workers a reconstructor was initialized with
+
+    Parameters
+    ----------
+    recon:          (waveorder reconstructor object) initialized reconstructor
+
+    Returns
+    -------
+    backend:        (str) FFT backend, 'numpy' for reconstructors initialized without one
+    workers:        (int or None) number of threads
+    """
+
+    return (
+        getattr(recon, "fft_backend", "numpy"),
+        getattr(recon, "fft_workers", None),
+    )
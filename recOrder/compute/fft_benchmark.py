@@ -0,0 +1,116 @@
+import time
+import logging
+from recOrder.compute.phantoms import bf_3D_from_phantom
+from recOrder.compute.fft_backends import FFT_BACKENDS
+from recOrder.compute.reconstructions import (
+    initialize_reconstructor,
+    reconstruct_phase3D,
+)
+
+# optical parameters of bf_3D_from_phantom
+PHANTOM_ARGS = {
+    "mag": 20,
+    "pixel_size_um": 6.5,
+    "z_step_um": 2,
+    "wavelength_nm": 532,
+    "NA_obj": 0.4,
+    "NA_illu": 0.2,
+    "n_obj_media": 1.0,
+    "pad_z": 5,
+}
+
+
+def benchmark_fft_backend(
+    data, backend, workers=None, precision="float32", repeats=3
+):
+    """
+    Times the initialization of a 3D phase reconstructor and the 3D phase reconstruction of a
+    brightfield stack with one FFT backend
+
+    Parameters
+    ----------
+    data:           (nd-array) brightfield stack of dimensions (Z, Y, X), e.g. bf_3D_from_phantom()
+    backend:        (str) FFT backend, one of FFT_BACKENDS
+    workers:        (int or None) number of FFT threads, all cores if None
+    precision:      (str) precision of the reconstruction, 'float32' or 'float64'
+    repeats:        (int) number of timed reconstructions, the fastest is reported
+
+    Returns
+    -------
+    result:         (dict) backend, workers, initialization and reconstruction time in seconds
+
+    """
+
+    Z, Y, X = data.shape
+    start = time.perf_counter()
+    recon = initialize_reconstructor(
+        "PhaseFromBF",
+        image_dim=(Y, X),
+        n_slices=Z,
+        mode="3D",
+        precision=precision,
+        fft_backend=backend,
+        fft_workers=workers,
+        **PHANTOM_ARGS,
+    )
+    init_seconds = time.perf_counter() - start
+
+    # the first reconstruction plans the pyfftw transforms
+    reconstruct_phase3D(data, recon, reg_re=1e-2, precision=precision)
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        reconstruct_phase3D(data, recon, reg_re=1e-2, precision=precision)
+        times.append(time.perf_counter() - start)
+
+    return {
+        "backend": backend,
+        "workers": workers,
+        "init_seconds": init_seconds,
+        "reconstruct_seconds": min(times),
+    }
+
+
+def benchmark_fft_backends(
+    backends=None, workers=None, precision="float32", repeats=3
+):
+    """
+    Benchmarks the 3D phase reconstruction of the brightfield phantom with every FFT backend.
+    Backends whose dependency is not installed are skipped.
+
+    Parameters
+    ----------
+    backends:       (list or None) FFT backends, all of FFT_BACKENDS if None
+    workers:        (int or None) number of FFT threads, all cores if None
+    precision:      (str) precision of the reconstruction, 'float32' or 'float64'
+    repeats:        (int) number of timed reconstructions per backend
+
+    Returns
+    -------
+    results:        (list) result of benchmark_fft_backend for every backend, with the speedup
+                    of the reconstruction over the numpy backend
+
+    """
+
+    data = bf_3D_from_phantom()
+    results = []
+    for backend in backends if backends else FFT_BACKENDS:
+        try:
+            results.append(
+                benchmark_fft_backend(
+                    data, backend, workers, precision, repeats
+                )
+            )
+        except ImportError as ex:
+            logging.warning(f"Skipping the {backend} FFT backend: {ex}")
+
+    reference = [r for r in results if r["backend"] == "numpy"]
+    for result in results:
+        result["speedup"] = (
+            reference[0]["reconstruct_seconds"]
+            / result["reconstruct_seconds"]
+            if reference
+            else None
+        )
+
+    return results
@@ -0,0 +1,60 @@
+import sys
+import itertools
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+# Per-process state of the pool workers, set by their initializer
+worker_state = dict()
+
+
+def ordered_results(function, units, num_processes, initializer, initargs):
+    """
+    Applies a function to every work unit and yields the results in the order of the units.
+    With num_processes > 1 the units are distributed over a pool of worker processes, each
+    initialized once with initializer(*initargs).  At most 2 * num_processes results are held
+    in memory.  On linux the workers are forked, sharing the parent's memory (e.g. the transfer
+    functions of an initialized reconstructor) copy-on-write.
+
+    Parameters
+    ----------
+    function:       (callable) module-level function called as function(*unit)
+    units:          (iterable) tuples of arguments of the function
+    num_processes:  (int) number of worker processes, units are processed in this process if <= 1
+    initializer:    (callable) module-level function storing its arguments in worker_state
+    initargs:       (tuple) arguments of the initializer
+
+    Returns
+    -------
+    results:        (generator) result of every unit, in order
+
+    """
+
+    if num_processes <= 1:
+        initializer(*initargs)
+        for unit in units:
+            yield function(*unit)
+        return
+
+    mp_context = (
+        multiprocessing.get_context("fork")
+        if sys.platform.startswith("linux")
+        else None
+    )
+    with ProcessPoolExecutor(
+        max_workers=num_processes,
+        mp_context=mp_context,
+        initializer=initializer,
+        initargs=initargs,
+    ) as executor:
+        units = iter(units)
+        pending = deque(
+            executor.submit(function, *unit)
+            for unit in itertools.islice(units, 2 * num_processes)
+        )
+        while pending:
+            result = pending.popleft().result()
+            unit = next(units, None)
+            if unit is not None:
+                pending.append(executor.submit(function, *unit))
+            yield result
@@ -0,0 +1,319 @@
+import time
+import logging
+import threading
+import tracemalloc
+import numpy as np
+import psutil
+from recOrder.compute.phantoms import (
+    pol_3D_from_phantom,
+    bf_3D_from_phantom,
+    fluorescence_from_phantom,
+)
+from recOrder.compute.fft_benchmark import PHANTOM_ARGS
+from recOrder.compute.reconstructions import (
+    initialize_reconstructor,
+    reconstruct_qlipp_stokes,
+    reconstruct_qlipp_birefringence,
+    reconstruct_phase2D,
+    reconstruct_phase3D,
+    reconstruct_density_from_fluorescence,
+)
+
+BYTES_PER_MB = 2**20
+IMAGE_SIZES = (128, 256, 512)  # (Y, X) sizes of the benchmarked images
+TV_ITERATIONS = 10  # iterations of the TV reconstructions
+
+# pipeline, phantom and initialize_reconstructor arguments of every reconstructor
+RECONSTRUCTORS = {
+    "birefringence": (
+        "birefringence",
+        "pol",
+        {
+            "swing": 0.1,
+            "calibration_scheme": "5-State",
+            "bg_correction": "global",
+        },
+    ),
+    "QLIPP_3D": (
+        "QLIPP",
+        "pol",
+        {"swing": 0.1, "calibration_scheme": "5-State", "mode": "3D"},
+    ),
+    "PhaseFromBF_2D": ("PhaseFromBF", "bf", {"mode": "2D"}),
+    "PhaseFromBF_3D": ("PhaseFromBF", "bf", {"mode": "3D"}),
+    "fluorescence": ("fluorescence", "fluor", {"mode": "3D"}),
+}
+
+# reconstructor and phantom of every reconstruction
+RECONSTRUCTIONS = {
+    "stokes": ("birefringence", "pol"),
+    "birefringence": ("birefringence", "pol"),
+    "phase2D_Tikhonov": ("PhaseFromBF_2D", "bf"),
+    "phase2D_TV": ("PhaseFromBF_2D", "bf"),
+    "phase3D_Tikhonov": ("PhaseFromBF_3D", "bf"),
+    "phase3D_TV": ("PhaseFromBF_3D", "bf"),
+    "density": ("fluorescence", "fluor"),
+}
+
+BENCHMARKS = [f"init_{name}" for name in RECONSTRUCTORS] + list(
+    RECONSTRUCTIONS
+)
+
+
+class PeakRSS:
+    """
+    Context manager sampling the resident set size of the process on a background thread, to
+    report the peak RSS of the code it wraps.  Allocations shorter than the sampling interval
+    can be missed.
+    """
+
+    def __init__(self, interval=0.005):
+        """
+
+        Parameters
+        ----------
+        interval:       (float) sampling interval in seconds
+        """
+
+        self.interval = interval
+        self.baseline = 0
+        self.peak = 0
+        self._process = psutil.Process()
+        self._done = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        while not self._done.wait(self.interval):
+            self.peak = max(self.peak, self._process.memory_info().rss)
+
+    def __enter__(self):
+        self.baseline = self._process.memory_info().rss
+        self.peak = self.baseline
+        self._done.clear()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._done.set()
+        self._thread.join()
+        self.peak = max(self.peak, self._process.memory_info().rss)
+
+
+def resize_phantom(data, size):
+    """
+    Center crop of a phantom, or the phantom tiled periodically, with images of size x size
+    pixels
+
+    Parameters
+    ----------
+    data:           (nd-array) phantom of dimensions (..., Y, X)
+    size:           (int) number of pixels in Y and X
+
+    Returns
+    -------
+    data:           (nd-array) phantom of dimensions (..., size, size)
+
+    """
+
+    for axis in [-2, -1]:
+        length = data.shape[axis]
+        start = max(0, (length - size) // 2)
+        data = np.take(data, (np.arange(size) + start) % length, axis=axis)
+
+    return data
+
+
+def _phantom_kind(name):
+    if name.startswith("init_"):
+        return RECONSTRUCTORS[name[len("init_") :]][1]
+    return RECONSTRUCTIONS[name][1]
+
+
+def load_phantoms(names):
+    """
+    Simulates the phantoms of benchmarks
+
+    Parameters
+    ----------
+    names:          (list) names of the benchmarks, from BENCHMARKS
+
+    Returns
+    -------
+    phantoms:       (dict) 'pol': (data, background) of pol_3D_from_phantom, 'bf' and 'fluor':
+                    data of bf_3D_from_phantom and fluorescence_from_phantom, only the phantoms
+                    used by the benchmarks
+
+    """
+
+    kinds = {_phantom_kind(name) for name in names}
+    simulate = {
+        "pol": pol_3D_from_phantom,
+        "bf": bf_3D_from_phantom,
+        "fluor": fluorescence_from_phantom,
+    }
+
+    return {kind: simulate[kind]() for kind in kinds}
+
+
+def _initialize(reconstructor, shape, precision):
+    pipeline, _, kwargs = RECONSTRUCTORS[reconstructor]
+    Z, Y, X = shape[-3:]
+    return initialize_reconstructor(
+        pipeline,
+        image_dim=(Y, X),
+        n_slices=Z,
+        precision=precision,
+        **PHANTOM_ARGS,
+        **kwargs,
+    )
+
+
+def _setup(name, data, bkg, precision):
+    """
+    Initializes the reconstructor and inputs of a benchmark, returns the timed callable
+    """
+
+    if name.startswith("init_"):
+        reconstructor = name[len("init_") :]
+        return lambda: _initialize(reconstructor, data.shape, precision)
+
+    recon = _initialize(RECONSTRUCTIONS[name][0], data.shape, precision)
+    if name in ["stokes", "birefringence"]:
+        bg_stokes = reconstruct_qlipp_stokes(bkg, recon, precision=precision)
+        if name == "stokes":
+            return lambda: reconstruct_qlipp_stokes(
+                data, recon, bg_stokes, precision=precision
+            )
+        stokes = reconstruct_qlipp_stokes(
+            data, recon, bg_stokes, precision=precision
+        )
+        return lambda: reconstruct_qlipp_birefringence(
+            stokes, recon, precision=precision
+        )
+
+    if name.startswith("phase"):
+        method = name.split("_")[1]
+        reconstruct = (
+            reconstruct_phase2D
+            if name.startswith("phase2D")
+            else reconstruct_phase3D
+        )
+        reg = "reg_p" if name.startswith("phase2D") else "reg_re"
+        return lambda: reconstruct(
+            data,
+            recon,
+            method=method,
+            itr=TV_ITERATIONS,
+            precision=precision,
+            **{reg: 1e-2},
+        )
+
+    return lambda: reconstruct_density_from_fluorescence(
+        data, recon, reg=1e-2, precision=precision
+    )
+
+
+def benchmark_reconstruction(
+    name, data, bkg=None, precision="float32", repeats=3
+):
+    """
+    Times a reconstructor initialization or a reconstruction and measures its memory use: the
+    peak RSS of the process during the timed runs, and the peak of the memory allocated by one
+    more run, which doesn't depend on memory the process freed earlier and holds on to
+
+    Parameters
+    ----------
+    name:           (str) name of the benchmark, one of BENCHMARKS
+    data:           (nd-array) phantom of the benchmark, of dimensions (C, Z, Y, X) or (Z, Y, X)
+    bkg:            (nd-array or None) background of the polarization phantom, of dimensions
+                    (C, Y, X), only used by the 'stokes' and 'birefringence' benchmarks
+    precision:      (str) precision of the reconstruction, 'float32' or 'float64'
+    repeats:        (int) number of timed runs, the fastest is reported
+
+    Returns
+    -------
+    result:         (dict) benchmark name, image size, time in seconds, throughput in
+                    megapixels per second, peak RSS, RSS increase over the setup and peak
+                    allocated memory in MB
+
+    """
+
+    if name not in BENCHMARKS:
+        raise ValueError(
+            f"Benchmark {name} not understood, use one of {BENCHMARKS}"
+        )
+
+    run = _setup(name, data, bkg, precision)
+    times = []
+    peak_rss = PeakRSS()
+    with peak_rss:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            run()
+            times.append(time.perf_counter() - start)
+
+    # an untimed run traces the allocations, numpy reports its arrays to tracemalloc
+    tracemalloc.start()
+    try:
+        run()
+        _, peak_allocated = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    seconds = min(times)
+    return {
+        "benchmark": name,
+        "size": data.shape[-1],
+        "seconds": seconds,
+        "MPx_per_s": data.size / seconds / 1e6,
+        "peak_rss_MB": peak_rss.peak / BYTES_PER_MB,
+        "rss_increase_MB": (peak_rss.peak - peak_rss.baseline)
+        / BYTES_PER_MB,
+        "peak_allocated_MB": peak_allocated / BYTES_PER_MB,
+    }
+
+
+def benchmark_reconstructions(
+    names=None, sizes=IMAGE_SIZES, precision="float32", repeats=3
+):
+    """
+    Benchmarks the reconstructor initializations and reconstructions on the phantoms of
+    recOrder.compute.phantoms, cropped or tiled to every image size.  Benchmarks are run
+    from the smallest to the largest image, as the RSS of the process doesn't shrink
+    between benchmarks.
+
+    Parameters
+    ----------
+    names:          (list or None) names of the benchmarks, all of BENCHMARKS if None
+    sizes:          (tuple) (Y, X) sizes of the images in pixels
+    precision:      (str) precision of the reconstructions, 'float32' or 'float64'
+    repeats:        (int) number of timed runs of every benchmark
+
+    Returns
+    -------
+    results:        (list) result of benchmark_reconstruction for every size and benchmark
+
+    """
+
+    names = names if names else BENCHMARKS
+    phantoms = load_phantoms(names)
+    results = []
+    for size in sorted(sizes):
+        for name in names:
+            kind = _phantom_kind(name)
+            data, bkg = (
+                phantoms[kind] if kind == "pol" else (phantoms[kind], None)
+            )
+            logging.info(f"Benchmarking {name} on {size}x{size} images")
+            results.append(
+                benchmark_reconstruction(
+                    name,
+                    resize_phantom(data, size),
+                    None if bkg is None else resize_phantom(bkg, size),
+                    precision,
+                    repeats,
+                )
+            )
+
+    return results
@@ -2,9 +2,109 @@ from waveorder.waveorder_reconstructor import (
     waveorder_microscopy,
     fluorescence_microscopy,
 )
+from waveorder.util import (
+    inten_normalization,
+    Dual_variable_Tikhonov_deconv_2D,
+    Dual_variable_ADMM_TV_deconv_2D,
+)
+from recOrder.compute.reconstructor_cache import (
+    ReconstructorCache,
+    reconstructor_key,
+)
+from recOrder.compute.fft_backends import (
+    FFT_BACKENDS,
+    fft_functions,
+    use_fft_backend,
+    reconstructor_backend,
+)
+from recOrder.io.utils import load_bg_stokes
 import numpy as np
 import time
 
+PRECISIONS = {"float32": np.float32, "float64": np.float64}
+COMPLEX_PRECISIONS = {"float32": np.complex64, "float64": np.complex128}
+
+
+def _as_working_array(data, precision, copy=False):
+    """
+    Convert data to the working dtype of the reconstruction.  Used for the inputs of waveorder
+    and for the results, which waveorder computes in float64.  Arrays that already have the
+    working dtype are passed through without a copy unless copy=True, which is only needed when
+    the downstream waveorder routine is not guaranteed to leave its input unmodified.
+
+    Parameters
+    ----------
+    data:           (nd-array or zarr array) input data
+    precision:      (str) 'float32' or 'float64'
+    copy:           (bool) always return a new array
+
+    Returns
+    -------
+    array:          (nd-array) data with the working dtype
+    """
+
+    if precision not in PRECISIONS:
+        raise ValueError(
+            f"Precision {precision} not understood, use one of {list(PRECISIONS)}"
+        )
+
+    return np.asarray(data).astype(PRECISIONS[precision], copy=copy)
+
+
+def _working_precision(recon, precision):
+    """
+    Working precision of a reconstruction, the precision of the reconstructor if precision is
+    None ('float64' for reconstructors initialized without one)
+    """
+
+    if precision is None:
+        return getattr(recon, "precision", "float64")
+    return precision
+
+
+def _fft_backend(recon, fft_backend, fft_workers):
+    """
+    Context running the FFTs of a reconstruction with the given backend, with the backend of the
+    reconstructor if fft_backend is None
+    """
+
+    if fft_backend is None:
+        fft_backend, workers = reconstructor_backend(recon)
+        fft_workers = fft_workers if fft_workers else workers
+
+    return use_fft_backend(fft_backend, fft_workers)
+
+
+def _cast_reconstructor(recon, precision):
+    """
+    Cast the transfer functions and every other floating point array of a reconstructor
+    to float32/complex64 or float64/complex128.  GPU arrays are left untouched.
+
+    Parameters
+    ----------
+    recon:          (waveorder reconstructor object) initialized reconstructor
+    precision:      (str) 'float32' or 'float64'
+
+    Returns
+    -------
+    recon:          (waveorder reconstructor object) reconstructor with the given precision
+    """
+
+    for name, value in list(recon.__dict__.items()):
+        if not isinstance(value, np.ndarray):
+            continue
+        if np.issubdtype(value.dtype, np.complexfloating):
+            dtype = COMPLEX_PRECISIONS[precision]
+        elif np.issubdtype(value.dtype, np.floating):
+            dtype = PRECISIONS[precision]
+        else:
+            continue
+        setattr(recon, name, value.astype(dtype, copy=False))
+
+    recon.precision = precision
+
+    return recon
+
 
 def initialize_reconstructor(
     pipeline,
@@ -25,6 +125,10 @@ def initialize_reconstructor(
     mode="3D",
     use_gpu=False,
     gpu_id=0,
+    cache_dir=None,
+    precision="float64",
+    fft_backend="numpy",
+    fft_workers=None,
 ):
     """
     Initialize the QLIPP reconstructor for downstream tasks. See tags next to parameters
@@ -91,6 +195,23 @@ def initialize_reconstructor(
         gpu_id            : int
                             number refering to which gpu will be used
 
+        cache_dir         : str or None
+                            directory of the on-disk reconstructor cache.  If provided, reconstructors
+                            with identical parameters are loaded from the cache instead of being recomputed.
+                            Not used with use_gpu=True.
+
+        precision         : str
+                            'float64' or 'float32'. With 'float32' the transfer functions are stored
+                            as float32/complex64, halving their memory footprint.  The reconstruct_*
+                            functions work in this precision unless given another one.
+
+        fft_backend       : str
+                            'numpy', 'scipy' (scipy.fft) or 'pyfftw' (requires pyFFTW). Backend of the
+                            FFTs of the initialization, kept by the reconstructor as the default
+                            backend of the reconstruct_* functions.
+
+        fft_workers       : int or None
+                            number of FFT threads of the scipy and pyfftw backends, all cores if None
 
         Returns
         -------
@@ -161,6 +282,11 @@ def initialize_reconstructor(
     else:
         raise ValueError(f"Pipeline {pipeline} not understood")
 
+    if precision not in PRECISIONS:
+        raise ValueError(f"Precision {precision} not understood")
+    if fft_backend not in FFT_BACKENDS:
+        raise ValueError(f"FFT backend {fft_backend} not understood")
+
     # Modify user inputs to fit waveorder input requirements
     lambda_illu = wavelength_nm / 1000 if wavelength_nm else None
     n_defocus = n_slices if n_slices else 0
@@ -212,10 +338,9 @@ def initialize_reconstructor(
         n_channel = 1
         swing = 0
 
-    print("Initializing Reconstructor...")
-    start_time = time.time()
     if pipeline != "fluorescence":
-        recon = waveorder_microscopy(
+        recon_class = waveorder_microscopy
+        recon_kwargs = dict(
             img_dim=image_dim,
             lambda_illu=lambda_illu,
             ps=ps,
@@ -234,10 +359,9 @@ def initialize_reconstructor(
             use_gpu=use_gpu,
             gpu_id=gpu_id,
         )
-        recon.N_channel = n_channel
     else:
-
-        recon = fluorescence_microscopy(
+        recon_class = fluorescence_microscopy
+        recon_kwargs = dict(
             img_dim=image_dim + (n_slices,),
             lambda_emiss=[lambda_illu],
             ps=ps,
@@ -250,13 +374,43 @@ def initialize_reconstructor(
             gpu_id=gpu_id,
         )
 
+    # GPU reconstructors hold device arrays that can't be memory-mapped
+    cache = (
+        ReconstructorCache(cache_dir) if cache_dir and not use_gpu else None
+    )
+    key = (
+        reconstructor_key(recon_class, precision=precision, **recon_kwargs)
+        if cache
+        else None
+    )
+
+    start_time = time.time()
+    recon = cache.load(key, recon_class) if cache else None
+    if recon is not None:
+        print("Loaded Reconstructor from cache")
+        recon.fft_backend = fft_backend
+        recon.fft_workers = fft_workers
+        return recon
+
+    print("Initializing Reconstructor...")
+    with use_fft_backend(fft_backend, fft_workers):
+        recon = recon_class(**recon_kwargs)
+    recon.fft_backend = fft_backend
+    recon.fft_workers = fft_workers
+    if pipeline != "fluorescence":
+        recon.N_channel = n_channel
+    recon = _cast_reconstructor(recon, precision)
+
     elapsed_time = (time.time() - start_time) / 60
     print(f"Finished Initializing Reconstructor ({elapsed_time:0.2f} min)")
 
+    if cache:
+        cache.save(key, recon)
+
     return recon
 
 
-def reconstruct_qlipp_stokes(data, recon, bg_stokes=None):
+def reconstruct_qlipp_stokes(data, recon, bg_stokes=None, precision=None):
     """
     From intensity data, use the waveorder.waveorder_microscopy (recon) to build a stokes array
         if recon background correction flag is selected, will also perform backgroudn correction
@@ -272,6 +426,10 @@ def reconstruct_qlipp_stokes(data, recon, bg_stokes=None):
         bg_stokes           : np.ndarray (5, Y, X) or (4, Y, X)
                               stokes array representing background data
 
+        precision           : str
+                              working dtype of the input data, 'float32' or 'float64',
+                              the precision of recon if None
+
     Returns
     -------
         stokes_stack        : np.ndarray
@@ -280,12 +438,14 @@ def reconstruct_qlipp_stokes(data, recon, bg_stokes=None):
                               or (C, Y, X) if not reconstructing a z-stack
     """
 
-    stokes_data = recon.Stokes_recon(np.copy(data))
+    precision = _working_precision(recon, precision)
+    # Stokes_recon does not modify its input, so data is only converted
+    stokes_data = recon.Stokes_recon(_as_working_array(data, precision))
     stokes_data = recon.Stokes_transform(stokes_data)
 
     # Don't do background correction if BG data isn't provided
     if recon.bg_option == "None" or bg_stokes is None:
-        return stokes_data  # C(Z)YX
+        return _as_working_array(stokes_data, precision)  # C(Z)YX
 
     # Compute Stokes with background correction
     else:
@@ -299,10 +459,90 @@ def reconstruct_qlipp_stokes(data, recon, bg_stokes=None):
                 stokes_data, bg_stokes
             )  # CYX
 
-        return s_image
+        return _as_working_array(s_image, precision)
 
 
-def reconstruct_qlipp_birefringence(stokes, recon):
+def reconstruct_qlipp_stokes_batch(
+    data, recon, bg_stokes=None, precision=None
+):
+    """
+    Batched version of reconstruct_qlipp_stokes for many positions/timepoints at once.
+    The inverse instrument matrix is applied as a single matrix product and the global
+    background correction is done in one call for the whole batch, the local background
+    corrections stack by stack.  CPU reconstructors only.
+
+    Parameters
+    ----------
+        data                : np.ndarray or zarr array
+                              intensity data of shape: (N, C, Z, Y, X) or (N, C, Y, X)
+
+        recon               : waveorder.waveorder_microscopy object
+                              initialized by initialize_reconstructor
+
+        bg_stokes           : np.ndarray (5, Y, X) or (4, Y, X)
+                              stokes array representing background data
+
+        precision           : str
+                              working dtype of the input data, 'float32' or 'float64',
+                              the precision of recon if None
+
+    Returns
+    -------
+        stokes_stack        : np.ndarray
+                              array of shape (N, 5, Z, Y, X) or (N, 5, Y, X)
+    """
+
+    precision = _working_precision(recon, precision)
+    data = _as_working_array(data, precision)
+    if data.ndim not in (4, 5):
+        raise ValueError(f"Incompatible data dimension: {data.shape}")
+
+    A_matrix_inv = getattr(recon, "A_matrix_inv", None)
+    if A_matrix_inv is None:
+        A_matrix_inv = np.linalg.pinv(recon.A_matrix)
+
+    N, C = data.shape[:2]
+    stokes = np.matmul(
+        np.asarray(A_matrix_inv, dtype=data.dtype), data.reshape(N, C, -1)
+    )
+    stokes = np.moveaxis(stokes.reshape((N, -1) + data.shape[2:]), 1, 0)
+    stokes = recon.Stokes_transform(stokes)  # C, N, (Z), Y, X
+
+    if recon.bg_option in ["local", "local_fit"] and bg_stokes is not None:
+        # the local modes estimate the background of every stack from the
+        # stack itself, the stacks are corrected one by one
+        stokes = np.stack(
+            [
+                _bg_correction(stokes[:, n], recon, bg_stokes)
+                for n in range(N)
+            ],
+            axis=1,
+        )
+    elif recon.bg_option != "None" and bg_stokes is not None:
+        stokes = _bg_correction(stokes, recon, bg_stokes)
+
+    return _as_working_array(np.moveaxis(stokes, 0, 1), precision)
+
+
+def _bg_correction(stokes, recon, bg_stokes):
+    """
+    Background correction of stokes data of dimensions (C, ..., Y, X)
+    """
+
+    # Polscope_bg_correction takes (C, Y, X, ...), stack along the last axis
+    n_stokes, stack_shape = stokes.shape[0], stokes.shape[1:-2]
+    stacked = np.moveaxis(stokes, (-2, -1), (1, 2)).reshape(
+        (n_stokes,) + stokes.shape[-2:] + (-1,)
+    )
+    stacked = recon.Polscope_bg_correction(stacked, bg_stokes)
+    return np.moveaxis(
+        stacked.reshape((n_stokes,) + stokes.shape[-2:] + stack_shape),
+        (1, 2),
+        (-2, -1),
+    )
+
+
+def reconstruct_qlipp_birefringence(stokes, recon, precision=None):
     """
     From stokes data, use waveorder.waveorder_microscopy (recon) to build a birefringence array
 
@@ -315,6 +555,10 @@ def reconstruct_qlipp_birefringence(stokes, recon):
     recon                   : waveorder.waveorder_microscopy object
                               initialized by initialize_reconstructor
 
+    precision               : str
+                              working dtype of the stokes data, 'float32' or 'float64',
+                              the precision of recon if None
+
     Returns
     -------
         recon_data          : np.ndarray
@@ -328,18 +572,74 @@ def reconstruct_qlipp_birefringence(stokes, recon):
     else:
         raise ValueError(f"Incompatible stokes dimension: {stokes.shape}")
 
-    birefringence = recon.Polarization_recon(np.copy(stokes))
+    precision = _working_precision(recon, precision)
+    birefringence = recon.Polarization_recon(
+        _as_working_array(stokes, precision)
+    )
 
     # Return the transposed birefringence array with channel first
-    return (
+    return _as_working_array(
         np.transpose(birefringence, (-4, -1, -3, -2))
         if len(birefringence.shape) == 4
-        else birefringence
+        else birefringence,
+        precision,
+    )
+
+
+def reconstruct_qlipp_birefringence_batch(stokes, recon, precision=None):
+    """
+    Batched version of reconstruct_qlipp_birefringence for many positions/timepoints at once
+
+    Parameters
+    ----------
+    stokes                  : np.ndarray or zarr array
+                              stokes array generated by reconstruct_qlipp_stokes_batch
+                              dimensions: (N, C, Z, Y, X) or (N, C, Y, X)
+
+    recon                   : waveorder.waveorder_microscopy object
+                              initialized by initialize_reconstructor
+
+    precision               : str
+                              working dtype of the stokes data, 'float32' or 'float64',
+                              the precision of recon if None
+
+    Returns
+    -------
+        recon_data          : np.ndarray
+                              array of shape (N, C, Z, Y, X) or (N, C, Y, X) containing reconstructed birefringence data.
+    """
+
+    precision = _working_precision(recon, precision)
+    stokes = _as_working_array(stokes, precision)
+    if stokes.ndim not in (4, 5):
+        raise ValueError(f"Incompatible stokes dimension: {stokes.shape}")
+
+    # Polarization_recon takes (C, Y, X, ...), batch along the last axis
+    stokes = np.moveaxis(stokes, (1, -2, -1), (0, 1, 2))
+    batch_shape = stokes.shape[3:]
+    birefringence = recon.Polarization_recon(
+        stokes.reshape(stokes.shape[:3] + (-1,))
+    )
+    birefringence = birefringence.reshape(
+        birefringence.shape[:3] + batch_shape
+    )
+
+    return _as_working_array(
+        np.moveaxis(birefringence, (0, 1, 2), (1, -2, -1)), precision
     )
 
 
 def reconstruct_phase2D(
-    S0, recon, method="Tikhonov", reg_p=1e-4, rho=1, lambda_p=1e-4, itr=50
+    S0,
+    recon,
+    method="Tikhonov",
+    reg_p=1e-4,
+    rho=1,
+    lambda_p=1e-4,
+    itr=50,
+    precision=None,
+    fft_backend=None,
+    fft_workers=None,
 ):
     """
     Reconstruct 2D phase from a given S0 or BF stack.
@@ -353,6 +653,10 @@ def reconstruct_phase2D(
     rho:            (float) TV regularization parameter
     lambda_p:       (float) TV regularization parameter
     itr:            (int) TV Regularization number of iterations
+    precision:      (str or None) working dtype of the S0 data, 'float32' or 'float64',
+                    the precision of recon if None
+    fft_backend:    (str or None) 'numpy', 'scipy' or 'pyfftw', the backend of the reconstructor if None
+    fft_workers:    (int or None) number of FFT threads of the scipy and pyfftw backends
 
     Returns
     -------
@@ -360,22 +664,33 @@ def reconstruct_phase2D(
 
     """
 
+    precision = _working_precision(recon, precision)
     S0 = np.transpose(S0, (1, 2, 0))
-    _, phase2D = recon.Phase_recon(
-        np.copy(S0).astype("float"),
-        method=method,
-        reg_p=reg_p,
-        rho=rho,
-        lambda_p=lambda_p,
-        itr=itr,
-        verbose=False,
-    )
+    with _fft_backend(recon, fft_backend, fft_workers):
+        _, phase2D = recon.Phase_recon(
+            _as_working_array(S0, precision),
+            method=method,
+            reg_p=reg_p,
+            rho=rho,
+            lambda_p=lambda_p,
+            itr=itr,
+            verbose=False,
+        )
 
-    return phase2D
+    return _as_working_array(phase2D, precision)
 
 
 def reconstruct_phase3D(
-    S0, recon, method="Tikhonov", reg_re=1e-4, rho=1e-3, lambda_re=1e-4, itr=50
+    S0,
+    recon,
+    method="Tikhonov",
+    reg_re=1e-4,
+    rho=1e-3,
+    lambda_re=1e-4,
+    itr=50,
+    precision=None,
+    fft_backend=None,
+    fft_workers=None,
 ):
     """
     Reconstruct 2D phase from a given S0 or BF stack.
@@ -389,6 +704,10 @@ def reconstruct_phase3D(
     rho:            (float) TV regularization parameter
     lambda_p:       (float) TV regularization parameter
     itr:            (int) TV Regularization number of iterations
+    precision:      (str or None) working dtype of the S0 data, 'float32' or 'float64',
+                    the precision of recon if None
+    fft_backend:    (str or None) 'numpy', 'scipy' or 'pyfftw', the backend of the reconstructor if None
+    fft_workers:    (int or None) number of FFT threads of the scipy and pyfftw backends
 
     Returns
     -------
@@ -396,23 +715,33 @@ def reconstruct_phase3D(
 
     """
 
+    precision = _working_precision(recon, precision)
     S0 = np.transpose(S0, (1, 2, 0))
-    phase3D = recon.Phase_recon_3D(
-        np.copy(S0).astype("float"),
-        method=method,
-        reg_re=reg_re,
-        rho=rho,
-        lambda_re=lambda_re,
-        itr=itr,
-        verbose=False,
-    )
+    with _fft_backend(recon, fft_backend, fft_workers):
+        phase3D = recon.Phase_recon_3D(
+            _as_working_array(S0, precision),
+            method=method,
+            reg_re=reg_re,
+            rho=rho,
+            lambda_re=lambda_re,
+            itr=itr,
+            verbose=False,
+        )
 
     phase3D = np.transpose(phase3D, (-1, -3, -2))
 
-    return phase3D
+    return _as_working_array(phase3D, precision)
 
 
-def reconstruct_density_from_fluorescence(data3D, recon, bg_level=0, reg=1e-2):
+def reconstruct_density_from_fluorescence(
+    data3D,
+    recon,
+    bg_level=0,
+    reg=1e-2,
+    precision=None,
+    fft_backend=None,
+    fft_workers=None,
+):
     """
     Reconstruct 3D density from fluorescence intensity
 
@@ -421,6 +750,10 @@ def reconstruct_density_from_fluorescence(data3D, recon, bg_level=0, reg=1e-2):
     data3D:         (nd-array) Stack of dimensions (Z, Y, X)
     recon:          (fluorescence_microscopy Object): initialized reconstructor object
     reg:            (float) Tikhonov regularization parameters
+    precision:      (str or None) working dtype of the data, 'float32' or 'float64',
+                    the precision of recon if None
+    fft_backend:    (str or None) 'numpy', 'scipy' or 'pyfftw', the backend of the reconstructor if None
+    fft_workers:    (int or None) number of FFT threads of the scipy and pyfftw backends
 
     Returns
     -------
@@ -428,14 +761,146 @@ def reconstruct_density_from_fluorescence(data3D, recon, bg_level=0, reg=1e-2):
 
     """
 
+    precision = _working_precision(recon, precision)
     data3D = np.transpose(data3D, (1, 2, 0))
-    density = recon.deconvolve_fluor_3D(
-        np.copy(data3D).astype("float"),
-        bg_level=[bg_level],
-        reg=[reg],
-    )
+    # deconvolve_fluor_3D is not guaranteed to leave its input unmodified
+    with _fft_backend(recon, fft_backend, fft_workers):
+        density = recon.deconvolve_fluor_3D(
+            _as_working_array(data3D, precision, copy=True),
+            bg_level=[bg_level],
+            reg=[reg],
+        )
+
+    return _as_working_array(np.transpose(density, (-1, -3, -2)), precision)
+
+
+class StreamingPhase2D:
+    """
+    2D phase reconstruction from defocus slices that arrive one at a time.  The 2D phase is a sum
+    over the z-transfer function, so every slice is normalized and Fourier transformed on arrival
+    and added to running sums, and the phase is solved as soon as the last slice of a stack
+    arrived.  Gives the same result as reconstruct_phase2D on the full stack.
+    """
+
+    # waveorder's absorption defaults, as used by reconstruct_phase2D
+    REG_U = 1e-6
+    LAMBDA_U = 1e-3
+
+    def __init__(
+        self,
+        recon,
+        method="Tikhonov",
+        reg_p=1e-4,
+        rho=1,
+        lambda_p=1e-4,
+        itr=50,
+        precision=None,
+    ):
+        """
+
+        Parameters
+        ----------
+        recon:          (waveorder_microscopy Object): reconstructor initialized for 2D phase
+        method:         (str) Regularization method 'Tikhonov' or 'TV'
+        reg_p:          (float) Tikhonov regularization parameters
+        rho:            (float) TV regularization parameter
+        lambda_p:       (float) TV regularization parameter
+        itr:            (int) TV Regularization number of iterations
+        precision:      (str or None) working dtype of the S0 data, 'float32' or 'float64',
+                        the precision of recon if None
+        """
+
+        if method not in ["Tikhonov", "TV"]:
+            raise ValueError(
+                f"Regularization method {method} not understood, use 'Tikhonov' or 'TV'"
+            )
+
+        self.recon = recon
+        self.method = method
+        self.rho = rho
+        self.lambda_p = lambda_p
+        self.itr = itr
+        self.precision = _working_precision(recon, precision)
+        self.n_slices = recon.Hu.shape[2]
+
+        # the normal matrix only depends on the transfer functions
+        Hu, Hp = recon.Hu, recon.Hp
+        self._AHA = [
+            np.sum(np.abs(Hu) ** 2, axis=2) + self.REG_U,
+            np.sum(np.conj(Hu) * Hp, axis=2),
+            np.sum(np.conj(Hp) * Hu, axis=2),
+            np.sum(np.abs(Hp) ** 2, axis=2) + reg_p,
+        ]
+        self._stacks = dict()
+        self._fft2 = fft_functions(*reconstructor_backend(recon))["fft2"]
+
+    def add(self, z, S0, key=None):
+        """
+        Adds a slice to the running sums of its stack
+
+        Parameters
+        ----------
+        z:              (int) index of the slice in the stack
+        S0:             (nd-array) BF/S0 slice of dimensions (Y, X)
+        key:            (hashable) stack of the slice, e.g. its (position, timepoint)
+
+        Returns
+        -------
+        phase2D:        (nd-array or None) Phase2D image of size (Y, X) once all slices of the stack
+                        were added, None before
 
-    return np.transpose(density, (-1, -3, -2))
+        """
+
+        if not 0 <= z < self.n_slices:
+            raise IndexError(
+                f"Slice {z} is out of the {self.n_slices} slices of the reconstructor"
+            )
+
+        if key not in self._stacks:
+            shape = self._AHA[0].shape
+            self._stacks[key] = (
+                np.zeros(shape, dtype=np.complex128),
+                np.zeros(shape, dtype=np.complex128),
+                set(),
+            )
+        b_u, b_p, received = self._stacks[key]
+        if z in received:
+            raise ValueError(f"Slice {z} of stack {key} was already added")
+
+        S0 = inten_normalization(
+            _as_working_array(S0, self.precision)[..., np.newaxis]
+        )[..., 0]
+        S0_f = self._fft2(S0)
+        b_u += np.conj(self.recon.Hu[:, :, z]) * S0_f
+        b_p += np.conj(self.recon.Hp[:, :, z]) * S0_f
+        received.add(z)
+
+        if len(received) < self.n_slices:
+            return None
+
+        del self._stacks[key]
+        return self._solve([b_u, b_p])
+
+    def _solve(self, b_vec):
+        with _fft_backend(self.recon, None, None):
+            if self.method == "Tikhonov":
+                _, phase2D = Dual_variable_Tikhonov_deconv_2D(
+                    self._AHA, b_vec
+                )
+            else:
+                _, phase2D = Dual_variable_ADMM_TV_deconv_2D(
+                    self._AHA,
+                    b_vec,
+                    self.rho,
+                    self.LAMBDA_U,
+                    self.lambda_p,
+                    self.itr,
+                    False,
+                )
+
+        phase2D -= phase2D.mean()
+
+        return _as_working_array(phase2D, self.precision)
 
 
 class QLIPPBirefringenceCompute:
@@ -452,7 +917,22 @@ class QLIPPBirefringenceCompute:
         n_slices,
         bg_option,
         bg_data=None,
+        bg_path=None,
     ):
+        """
+
+        Parameters
+        ----------
+        shape:          (tuple) (Y, X) shape of the images
+        scheme:         (str) '4-State' or '5-State'
+        wavelength:     (float) wavelength in nm
+        swing:          (float) swing of the calibration
+        n_slices:       (int) number of z-slices
+        bg_option:      (str) waveorder background correction option
+        bg_data:        (nd-array or None) background images of shape (C, Y, X)
+        bg_path:        (str or None) background folder.  If given, the background Stokes saved
+                                in this folder are used instead of recomputing them from bg_data.
+        """
 
         self.shape = shape
         self.scheme = scheme
@@ -471,16 +951,20 @@ class QLIPPBirefringenceCompute:
             n_slices=self.n_slices,
         )
 
-        if bg_option != "None":
+        if bg_option != "None" and bg_path is not None:
+            self.bg_stokes = load_bg_stokes(
+                bg_path, self.reconstructor, *self.shape, scheme, swing
+            )
+        elif bg_option != "None":
             self.bg_stokes = reconstruct_qlipp_stokes(
                 bg_data, self.reconstructor
             )
         else:
             self.bg_stokes = None
 
-    def reconstruct(self, array):
+    def reconstruct_stokes(self, array):
         """
-        reconstructs raw data into birefringence data
+        reconstructs raw data into background corrected stokes
 
         Parameters
         ----------
@@ -488,16 +972,49 @@ class QLIPPBirefringenceCompute:
 
         Returns
         -------
-        birefringence:  (nd-array) birefringence array of size (2, Z, Y, X) or (2, Y, X)
-                                    first channel is retardance [nm] second channel is orientation [0, pi]
+        stokes:         (nd-array) stokes array of size (5, Z, Y, X) or (5, Y, X), S0 is stokes[0]
 
         """
-        stokes = reconstruct_qlipp_stokes(
+
+        return reconstruct_qlipp_stokes(
             array, self.reconstructor, self.bg_stokes
         )
+
+    def reconstruct_birefringence(self, stokes):
+        """
+        reconstructs stokes into birefringence data
+
+        Parameters
+        ----------
+        stokes:         (nd-array) stokes array of size (5, Z, Y, X) or (5, Y, X)
+
+        Returns
+        -------
+        birefringence:  (nd-array) birefringence array of size (2, Z, Y, X) or (2, Y, X)
+                                    first channel is retardance [nm] second channel is orientation [0, pi]
+
+        """
+
         birefringence = reconstruct_qlipp_birefringence(
             stokes, self.reconstructor
         )
         birefringence[0] = birefringence[0] / (2 * np.pi) * self.wavelength
 
         return birefringence[0:2]
+
+    def reconstruct(self, array):
+        """
+        reconstructs raw data into birefringence data
+
+        Parameters
+        ----------
+        array:          (nd-array) of image shape (C, Z, Y, X) or (C, Y, X) with minimum C=4
+
+        Returns
+        -------
+        birefringence:  (nd-array) birefringence array of size (2, Z, Y, X) or (2, Y, X)
+                                    first channel is retardance [nm] second channel is orientation [0, pi]
+
+        """
+
+        return self.reconstruct_birefringence(self.reconstruct_stokes(array))
@@ -0,0 +1,236 @@
+import hashlib
+import json
+import logging
+import os
+import pickle
+import shutil
+import numpy as np
+
+CACHE_FORMAT_VERSION = 1
+ATTRIBUTES_FILE = "attributes.pkl"
+ARRAYS_DIR = "arrays"
+MIN_ARRAY_BYTES = 2**20  # arrays below 1 MiB are pickled with the attributes
+
+
+def default_cache_dir():
+    """
+    Default location of the reconstructor cache.  Can be overridden with the
+    RECORDER_CACHE_DIR environment variable.
+
+    Returns
+    -------
+    cache_dir:      (str) path to the cache directory
+    """
+
+    return os.environ.get(
+        "RECORDER_CACHE_DIR",
+        os.path.join(
+            os.path.expanduser("~"), ".cache", "recOrder", "reconstructors"
+        ),
+    )
+
+
+def _waveorder_version():
+    try:
+        from importlib.metadata import version
+
+        return version("waveorder")
+    except Exception:
+        return "unknown"
+
+
+def _to_json(value):
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Cannot hash parameter of type {type(value)}")
+
+
+def reconstructor_key(recon_class, **params):
+    """
+    Content-addressed key of a reconstructor.  The key changes whenever any of the
+    parameters, the reconstructor class or the installed waveorder version change.
+
+    Parameters
+    ----------
+    recon_class:    (type) waveorder reconstructor class
+    params:         keyword arguments passed to the reconstructor class
+
+    Returns
+    -------
+    key:            (str) sha256 hex digest
+    """
+
+    payload = {
+        "format": CACHE_FORMAT_VERSION,
+        "waveorder": _waveorder_version(),
+        "class": f"{recon_class.__module__}.{recon_class.__qualname__}",
+        "params": params,
+    }
+    serialized = json.dumps(payload, sort_keys=True, default=_to_json)
+
+    return hashlib.sha256(serialized.encode()).hexdigest()
+
+
+class ReconstructorCache:
+    """
+    On-disk cache of initialized reconstructors.  Large arrays (the transfer functions)
+    are stored as .npy files and memory-mapped on load, every other attribute is pickled.
+    Entries are evicted in least-recently-used order once the cache exceeds max_size_gb.
+    """
+
+    def __init__(self, cache_dir=None, max_size_gb=20):
+        """
+
+        Parameters
+        ----------
+        cache_dir:      (str or None) cache directory, uses default_cache_dir() if None
+        max_size_gb:    (float) maximum size of the cache on disk in GB
+        """
+
+        self.cache_dir = cache_dir if cache_dir else default_cache_dir()
+        self.max_size_bytes = int(max_size_gb * 2**30)
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, key)
+
+    def load(self, key, recon_class):
+        """
+        Load a reconstructor from the cache.
+
+        Parameters
+        ----------
+        key:            (str) key generated by reconstructor_key
+        recon_class:    (type) waveorder reconstructor class
+
+        Returns
+        -------
+        recon:          (object or None) cached reconstructor, None if the key is not cached
+        """
+
+        entry = self._entry_path(key)
+        if not os.path.isdir(entry):
+            return None
+
+        try:
+            with open(os.path.join(entry, ATTRIBUTES_FILE), "rb") as file:
+                attributes = pickle.load(file)
+
+            array_dir = os.path.join(entry, ARRAYS_DIR)
+            for fname in os.listdir(array_dir):
+                name = os.path.splitext(fname)[0]
+                # copy-on-write so that waveorder can never modify the cache
+                attributes[name] = np.load(
+                    os.path.join(array_dir, fname), mmap_mode="c"
+                )
+        except (OSError, EOFError, pickle.UnpicklingError, ValueError) as ex:
+            logging.warning(f"Discarding corrupt cache entry {entry}: {ex}")
+            shutil.rmtree(entry, ignore_errors=True)
+            return None
+
+        recon = recon_class.__new__(recon_class)
+        recon.__dict__.update(attributes)
+
+        # mark as recently used
+        os.utime(entry)
+
+        return recon
+
+    def save(self, key, recon):
+        """
+        Save a reconstructor in the cache and evict old entries if needed.
+
+        Parameters
+        ----------
+        key:            (str) key generated by reconstructor_key
+        recon:          (object) initialized reconstructor
+
+        Returns
+        -------
+        saved:          (bool) True if the reconstructor was cached
+        """
+
+        entry = self._entry_path(key)
+        if os.path.isdir(entry):
+            return True
+
+        # write to a temporary directory first so concurrent processes never see partial entries
+        tmp_entry = f"{entry}.tmp-{os.getpid()}"
+        array_dir = os.path.join(tmp_entry, ARRAYS_DIR)
+        os.makedirs(array_dir, exist_ok=True)
+
+        attributes = dict()
+        try:
+            for name, value in recon.__dict__.items():
+                if (
+                    isinstance(value, np.ndarray)
+                    and value.dtype != object
+                    and value.nbytes >= MIN_ARRAY_BYTES
+                ):
+                    np.save(os.path.join(array_dir, name + ".npy"), value)
+                else:
+                    attributes[name] = value
+
+            with open(os.path.join(tmp_entry, ATTRIBUTES_FILE), "wb") as file:
+                pickle.dump(attributes, file)
+
+            os.rename(tmp_entry, entry)
+        except (
+            OSError,
+            TypeError,
+            AttributeError,
+            pickle.PicklingError,
+        ) as ex:
+            logging.warning(f"Could not cache reconstructor: {ex}")
+            shutil.rmtree(tmp_entry, ignore_errors=True)
+            return os.path.isdir(entry)
+
+        self.evict()
+
+        return True
+
+    def entries(self):
+        """
+        List the cache entries from least to most recently used.
+
+        Returns
+        -------
+        entries:        (list) list of (key, last access time, size in bytes) tuples
+        """
+
+        entries = []
+        for key in os.listdir(self.cache_dir):
+            entry = self._entry_path(key)
+            if not os.path.isdir(entry) or ".tmp-" in key:
+                continue
+            size = 0
+            for root, _, files in os.walk(entry):
+                for fname in files:
+                    size += os.path.getsize(os.path.join(root, fname))
+            entries.append((key, os.path.getmtime(entry), size))
+
+        return sorted(entries, key=lambda x: x[1])
+
+    def evict(self):
+        """
+        Remove least recently used entries until the cache fits in max_size_gb.
+        The most recently used entry is always kept.
+        """
+
+        entries = self.entries()
+        total = sum(size for _, _, size in entries)
+        for key, _, size in entries[:-1]:
+            if total <= self.max_size_bytes:
+                break
+            shutil.rmtree(self._entry_path(key), ignore_errors=True)
+            total -= size
+
+    def clear(self):
+        """
+        Remove every entry from the cache.
+        """
+
+        for key, _, _ in self.entries():
+            shutil.rmtree(self._entry_path(key), ignore_errors=True)
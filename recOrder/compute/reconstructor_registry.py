@@ -0,0 +1,147 @@
+import json
+import threading
+from collections import OrderedDict
+from recOrder.compute.reconstructions import initialize_reconstructor
+from recOrder.compute.reconstructor_cache import _to_json
+
+
+def fingerprint(name, **params):
+    """
+    Fingerprint of a memoized value, identical for identical parameters
+
+    Parameters
+    ----------
+    name:           (str) name of the value, e.g. the reconstruction pipeline
+    params:         parameters the value is computed from
+
+    Returns
+    -------
+    fingerprint:    (str) serialized name and parameters
+    """
+
+    return json.dumps(
+        {"name": name, "params": params}, sort_keys=True, default=_to_json
+    )
+
+
+class ReconstructorRegistry:
+    """
+    In-memory registry of initialized reconstructors of every pipeline, memoized by a fingerprint
+    of their initialize_reconstructor parameters (which include the background correction).
+    Repeated acquisitions with unchanged parameters reuse their reconstructor without any
+    re-initialization or comparison of the reconstructor attributes.
+
+    invalidate is called when a reconstruction parameter is edited.  Entries are then stale:
+    entries requested again are kept (the edit didn't change their parameters), the other stale
+    entries are released as soon as a new entry is computed.
+    """
+
+    def __init__(self, max_entries=8):
+        """
+
+        Parameters
+        ----------
+        max_entries:    (int) number of entries kept, the least recently used entry is released
+                        beyond
+        """
+
+        self.max_entries = max_entries
+        self.n_computed = 0
+        self._entries = OrderedDict()
+        self._stale = set()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def memoize(self, name, compute, **params):
+        """
+        Value of a computation, computed once for every set of parameters
+
+        Parameters
+        ----------
+        name:           (str) name of the value
+        compute:        (callable) function computing the value, called without arguments
+        params:         parameters the value is computed from
+
+        Returns
+        -------
+        value:          (object) memoized or newly computed value
+
+        """
+
+        key = fingerprint(name, **params)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self._stale.discard(key)
+                return self._entries[key][1]
+
+            # parameters changed, release entries not requested since
+            for stale_key in self._stale:
+                self._entries.pop(stale_key, None)
+            self._stale = set()
+
+            value = compute()
+            self.n_computed += 1
+            self._entries[key] = (name, value)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+            return value
+
+    def get(self, pipeline, **params):
+        """
+        Reconstructor of a pipeline, initialized once for every set of parameters
+
+        Parameters
+        ----------
+        pipeline:       (str) 'birefringence', 'QLIPP', 'PhaseFromBF' or 'fluorescence'
+        params:         keyword arguments of initialize_reconstructor
+
+        Returns
+        -------
+        reconstructor:  (object) memoized or newly initialized reconstructor
+
+        """
+
+        return self.memoize(
+            pipeline,
+            lambda: initialize_reconstructor(pipeline, **params),
+            **params,
+        )
+
+    def invalidate(self, *args):
+        """
+        Marks every entry as stale.  Can be connected to any GUI signal, its arguments are ignored.
+        """
+
+        with self._lock:
+            self._stale = set(self._entries)
+
+    def discard(self, name):
+        """
+        Releases every entry of a name, e.g. when the files it was computed from were replaced
+
+        Parameters
+        ----------
+        name:           (str) name of the values
+        """
+
+        with self._lock:
+            for key in [
+                key
+                for key, (entry_name, _) in self._entries.items()
+                if entry_name == name
+            ]:
+                del self._entries[key]
+                self._stale.discard(key)
+
+    def clear(self):
+        """
+        Releases every entry
+        """
+
+        with self._lock:
+            self._entries.clear()
+            self._stale = set()
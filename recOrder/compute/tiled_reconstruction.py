@@ -0,0 +1,241 @@
+import itertools
+import numpy as np
+from recOrder.compute.reconstructions import (
+    initialize_reconstructor,
+    reconstruct_phase3D,
+)
+from recOrder.compute.process_pool import worker_state, ordered_results
+
+
+def phase_halo_px(
+    wavelength_nm,
+    NA_obj,
+    mag,
+    pixel_size_um,
+    n_slices,
+    z_step_um,
+    n_obj_media=1.3,
+    pad_z=0,
+    in_focus_slice=None,
+    airy_rings=3,
+    **kwargs,
+):
+    """
+    Lateral extent of the 3D phase PSF in pixels: the radius of the defocus blur at the
+    furthest (padded) slice plus a margin of Airy rings.  Tiles overlapping by this halo see
+    all the data their interior depends on, but they only approximate the full-field
+    reconstruction: intensity normalization and regularization act per tile and the FFTs are
+    periodic over the tile.  On the phantoms the interior structure matches (correlation
+    > 0.999) while the phase amplitude differs by up to ~10%.
+
+    Parameters
+    ----------
+    wavelength_nm:  (float) illumination wavelength in nm
+    NA_obj:         (float) numerical aperture of the objective
+    mag:            (float) magnification
+    pixel_size_um:  (float) camera pixel size in um
+    n_slices:       (int) number of z-slices
+    z_step_um:      (float) z-step size in um
+    n_obj_media:    (float) refractive index of the objective immersion media
+    pad_z:          (int) number of slices padded by the phase reconstruction
+    in_focus_slice: (int or None) index of the in-focus slice, n_slices // 2 if None
+    airy_rings:     (int) number of Airy radii added as margin
+    kwargs:         other reconstructor arguments, ignored
+
+    Returns
+    -------
+    halo:           (int) halo in pixels
+    """
+
+    if in_focus_slice is None:
+        in_focus_slice = n_slices // 2
+
+    max_defocus = (
+        max(in_focus_slice, n_slices - 1 - in_focus_slice) + pad_z
+    ) * z_step_um
+    NA = min(NA_obj, 0.99 * n_obj_media)
+    blur_radius = max_defocus * NA / np.sqrt(n_obj_media**2 - NA**2)
+    airy_radius = 0.61 * wavelength_nm / 1000 / NA
+
+    ps = pixel_size_um / mag
+
+    return int(np.ceil((blur_radius + airy_rings * airy_radius) / ps))
+
+
+def tile_starts(length, tile_size, halo):
+    """
+    Start indices of tiles of size tile_size covering an axis of the given length.
+    Neighbouring tiles overlap by at least 2 * halo, the last tile ends at the border.
+
+    Parameters
+    ----------
+    length:         (int) length of the axis
+    tile_size:      (int) size of the tiles along the axis
+    halo:           (int) halo in pixels
+
+    Returns
+    -------
+    starts:         (list) start index of every tile
+    """
+
+    if length <= tile_size:
+        return [0]
+
+    step = tile_size - 2 * halo
+    if step <= 0:
+        raise ValueError(
+            f"tile_size {tile_size} must be larger than twice the halo ({halo} px)"
+        )
+
+    return list(range(0, length - tile_size, step)) + [length - tile_size]
+
+
+def blend_weights(length, tile_size, halo):
+    """
+    Normalized 1D blending weights of the tiles along one axis.  Weights ramp linearly
+    over 2 * halo pixels at the tile edges facing a neighbour and sum to one at every pixel.
+
+    Parameters
+    ----------
+    length:         (int) length of the axis
+    tile_size:      (int) size of the tiles along the axis
+    halo:           (int) halo in pixels
+
+    Returns
+    -------
+    weights:        (list) list of (start, weight) tuples, one per tile
+    """
+
+    tile_size = min(tile_size, length)
+    ramp_width = max(min(2 * halo, tile_size // 2), 1)
+    ramp = np.minimum((np.arange(tile_size) + 0.5) / ramp_width, 1)
+
+    weights = []
+    total = np.zeros(length)
+    for start in tile_starts(length, tile_size, halo):
+        weight = np.ones(tile_size)
+        if start > 0:
+            weight *= ramp
+        if start + tile_size < length:
+            weight *= ramp[::-1]
+        total[start : start + tile_size] += weight
+        weights.append((start, weight))
+
+    return [
+        (start, weight / total[start : start + tile_size])
+        for start, weight in weights
+    ]
+
+
+def _init_tile_worker(S0, recon, phase_kwargs):
+    worker_state["S0"] = S0
+    worker_state["recon"] = recon
+    worker_state["phase_kwargs"] = phase_kwargs
+
+
+def _reconstruct_tile(y_slice, x_slice):
+    tile = np.asarray(worker_state["S0"][:, y_slice, x_slice])
+
+    return reconstruct_phase3D(
+        tile, worker_state["recon"], **worker_state["phase_kwargs"]
+    ).astype(np.float32)
+
+
+def reconstruct_phase3D_tiled(
+    S0,
+    reconstructor_args,
+    tile_size=1024,
+    halo=None,
+    out=None,
+    num_processes=1,
+    method="Tikhonov",
+    reg_re=1e-4,
+    rho=1e-3,
+    lambda_re=1e-4,
+    itr=50,
+    precision=None,
+):
+    """
+    Reconstruct 3D phase of a large field in overlapping tiles.  Every tile is reconstructed
+    with the same tile-sized reconstructor and blended into the output with linear ramps,
+    so memory is bounded by the tile size rather than by the field of view.  The result
+    approximates the full-field reconstruction (see phase_halo_px).
+
+    Parameters
+    ----------
+    S0:                     (nd-array or zarr array) BF/S0 stack of dimensions (Z, Y, X).
+                                    Only the tiles being reconstructed are read into memory.
+    reconstructor_args:     (dict) keyword arguments of initialize_reconstructor for the PhaseFromBF
+                                    pipeline, without image_dim and n_slices.  Pass cache_dir to
+                                    reuse the tile reconstructor between calls.
+    tile_size:              (int) lateral size of the tiles in pixels, including the halo
+    halo:                   (int or None) overlap margin in pixels, computed from the PSF extent
+                                    with phase_halo_px if None
+    out:                    (nd-array or zarr array or None) zero-filled float32 array of shape (Z, Y, X)
+                                    receiving the phase, e.g. a zarr array for fields larger than RAM.
+                                    A numpy array is allocated if None.
+    num_processes:          (int) number of worker processes reconstructing tiles in parallel
+    method:                 (str) Regularization method 'Tikhonov' or 'TV'
+    reg_re:                 (float) Tikhonov regularization parameter
+    rho:                    (float) TV regularization parameter
+    lambda_re:              (float) TV regularization parameter
+    itr:                    (int) TV Regularization number of iterations
+    precision:              (str or None) working dtype of the S0 data, 'float32' or 'float64', the
+                                    precision of the reconstructor (see reconstructor_args) if None
+
+    Returns
+    -------
+    phase3D:                (nd-array or zarr array) Phase3D of size (Z, Y, X), the out array if given
+    """
+
+    Z, Y, X = S0.shape
+    reconstructor_args = dict(reconstructor_args, mode="3D")
+    if halo is None:
+        halo = phase_halo_px(n_slices=Z, **reconstructor_args)
+
+    tile_y, tile_x = min(tile_size, Y), min(tile_size, X)
+    recon = initialize_reconstructor(
+        "PhaseFromBF",
+        image_dim=(tile_y, tile_x),
+        n_slices=Z,
+        **reconstructor_args,
+    )
+
+    if out is None:
+        out = np.zeros((Z, Y, X), dtype=np.float32)
+
+    weights = list(
+        itertools.product(
+            blend_weights(Y, tile_size, halo),
+            blend_weights(X, tile_size, halo),
+        )
+    )
+    tiles = [
+        (slice(y, y + tile_y), slice(x, x + tile_x))
+        for (y, _), (x, _) in weights
+    ]
+    phase_kwargs = dict(
+        method=method,
+        reg_re=reg_re,
+        rho=rho,
+        lambda_re=lambda_re,
+        itr=itr,
+        precision=precision,
+    )
+
+    for ((_, w_y), (_, w_x)), (y_slice, x_slice), phase in zip(
+        weights,
+        tiles,
+        ordered_results(
+            _reconstruct_tile,
+            tiles,
+            num_processes,
+            _init_tile_worker,
+            (S0, recon, phase_kwargs),
+        ),
+    ):
+        out[:, y_slice, x_slice] = out[:, y_slice, x_slice] + phase * (
+            w_y[:, np.newaxis] * w_x[np.newaxis, :]
+        ).astype(np.float32)
+
+    return out
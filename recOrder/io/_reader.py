@@ -1,4 +1,5 @@
 from waveorder.io.reader import WaveorderReader
+from recOrder.io.sharded_store import is_sharded, position_arrays
 import zarr
 from typing import Tuple, List, Dict, Union
 
@@ -16,6 +17,13 @@ def napari_get_reader(path):
 def ome_zarr_reader(
     path: Union[str, List[str]]
 ) -> List[Tuple[zarr.Array, Dict]]:
+    if is_sharded(path):
+        # chunks are read lazily from the shard files
+        return [
+            (array, {"name": name.split("/")[-1]})
+            for name, array in position_arrays(path)
+        ]
+
     reader = WaveorderReader(path)
     results = list()
 
@@ -0,0 +1,123 @@
+import os
+import time
+import shutil
+import tempfile
+import numpy as np
+import zarr
+from waveorder.io import WaveorderReader
+from recOrder.io.zarr_converter import CHUNK_PROFILES, get_chunk_profile
+
+
+def _store_size(path):
+    size = 0
+    for root, _, files in os.walk(path):
+        for file in files:
+            size += os.path.getsize(os.path.join(root, file))
+    return size
+
+
+def _timed(function):
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def benchmark_chunk_profile(sample, profile, output_dir, tile_size=256):
+    """
+    Writes a sample of shape (T, C, Z, Y, X) with one chunking/compression profile and times
+    writes and common read patterns.
+
+    Parameters
+    ----------
+    sample:         (nd-array) sample data of dimensions (T, C, Z, Y, X)
+    profile:        (str) name of the profile, one of CHUNK_PROFILES
+    output_dir:     (str) directory receiving the temporary zarr store
+    tile_size:      (int) lateral size of the tile read
+
+    Returns
+    -------
+    result:         (dict) write and read speeds in MB/s and compression ratio of the profile
+
+    """
+
+    T, C, Z, Y, X = sample.shape
+    chunk_size, compressor = get_chunk_profile(profile, sample.shape)
+    path = os.path.join(output_dir, f"{profile}.zarr")
+    array = zarr.open(
+        path,
+        "w",
+        shape=sample.shape,
+        chunks=chunk_size,
+        dtype=sample.dtype,
+        compressor=compressor,
+    )
+
+    # each write fills whole chunks, as the converter's write units
+    def write():
+        chunk_z = chunk_size[2]
+        for t in range(T):
+            for c in range(C):
+                for z in range(0, Z, chunk_z):
+                    z_slice = slice(z, z + chunk_z)
+                    array[t, c, z_slice] = sample[t, c, z_slice]
+
+    def read_planes():
+        for z in range(Z):
+            array[0, 0, z]
+
+    def read_zstack():
+        array[0, 0]
+
+    def read_tile():
+        array[0, 0, :, : min(tile_size, Y), : min(tile_size, X)]
+
+    megabytes = sample.nbytes / 1e6
+    plane_megabytes = megabytes / (T * C)
+    tile_megabytes = plane_megabytes * min(tile_size, Y) * min(tile_size, X)
+    tile_megabytes /= Y * X
+    result = {
+        "profile": profile,
+        "chunks": chunk_size,
+        "compressor": compressor.cname,
+        "write_MBps": megabytes / _timed(write),
+        "plane_read_MBps": plane_megabytes / _timed(read_planes),
+        "zstack_read_MBps": plane_megabytes / _timed(read_zstack),
+        "tile_read_MBps": tile_megabytes / _timed(read_tile),
+        "compression_ratio": sample.nbytes / _store_size(path),
+    }
+    shutil.rmtree(path)
+
+    return result
+
+
+def benchmark_chunk_profiles(
+    input_dir, profiles=None, position=0, time_point=0, output_dir=None
+):
+    """
+    Benchmarks chunking/compression profiles on one position and timepoint of a dataset.
+
+    Parameters
+    ----------
+    input_dir:      (str) path to the raw ome-tiff or zarr dataset
+    profiles:       (list or None) names of the profiles, all of CHUNK_PROFILES if None
+    position:       (int) position of the sample
+    time_point:     (int) timepoint of the sample
+    output_dir:     (str or None) directory receiving the temporary zarr stores,
+                    a temporary directory if None
+
+    Returns
+    -------
+    results:        (list) result of benchmark_chunk_profile for every profile
+
+    """
+
+    reader = WaveorderReader(input_dir)
+    array = reader.get_array(position)
+    sample = np.asarray(array[time_point : time_point + 1])
+
+    profiles = CHUNK_PROFILES if profiles is None else profiles
+    with tempfile.TemporaryDirectory(dir=output_dir) as tmp_dir:
+        return [
+            benchmark_chunk_profile(sample, profile, tmp_dir)
+            for profile in profiles
+        ]
@@ -0,0 +1,129 @@
+import json
+import sqlite3
+
+
+class ConversionJournal:
+    """
+    Small sqlite journal of a zarr conversion.  Records the zarr group of every position, the
+    (p, t, c, z) coordinates and checksums of every written image and the state needed to
+    resume the conversion after a crash.
+    """
+
+    def __init__(self, path):
+        """
+
+        Parameters
+        ----------
+        path:           (str) path to the sqlite journal file, created if it does not exist
+        """
+
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS state (
+                key TEXT PRIMARY KEY, value TEXT
+            );
+            CREATE TABLE IF NOT EXISTS positions (
+                p INTEGER PRIMARY KEY, path TEXT
+            );
+            CREATE TABLE IF NOT EXISTS planes (
+                p INTEGER, t INTEGER, c INTEGER, z INTEGER, checksum INTEGER,
+                PRIMARY KEY (p, t, c, z)
+            );
+            """
+        )
+        self.connection.commit()
+
+    def get_state(self, key, default=None):
+        """
+        Get a JSON-serializable value stored with set_state
+
+        Parameters
+        ----------
+        key:            (str) name of the value
+        default:        value returned if the key is not in the journal
+
+        Returns
+        -------
+        value:          stored value
+        """
+
+        row = self.connection.execute(
+            "SELECT value FROM state WHERE key = ?", (key,)
+        ).fetchone()
+
+        return json.loads(row[0]) if row else default
+
+    def set_state(self, key, value):
+        """
+        Store a JSON-serializable value, committed with the next call to commit
+
+        Parameters
+        ----------
+        key:            (str) name of the value
+        value:          JSON-serializable value
+        """
+
+        self.connection.execute(
+            "INSERT OR REPLACE INTO state VALUES (?, ?)",
+            (key, json.dumps(value)),
+        )
+
+    def add_position(self, p, path):
+        """
+        Record the zarr group path of a position
+
+        Parameters
+        ----------
+        p:              (int) position index
+        path:           (str) path of the position group within the zarr store
+        """
+
+        self.connection.execute(
+            "INSERT OR REPLACE INTO positions VALUES (?, ?)", (p, path)
+        )
+
+    def positions(self):
+        """
+        Returns
+        -------
+        positions:      (dict) zarr group path of each recorded position
+        """
+
+        return dict(
+            self.connection.execute("SELECT p, path FROM positions ORDER BY p")
+        )
+
+    def add_planes(self, planes):
+        """
+        Record written images
+
+        Parameters
+        ----------
+        planes:         (list) list of (p, t, c, z, checksum) tuples
+        """
+
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO planes VALUES (?, ?, ?, ?, ?)", planes
+        )
+
+    def completed(self):
+        """
+        Returns
+        -------
+        completed:      (dict) checksum of every committed image keyed by (p, t, c, z)
+        """
+
+        return {
+            (p, t, c, z): checksum
+            for p, t, c, z, checksum in self.connection.execute(
+                "SELECT p, t, c, z, checksum FROM planes"
+            )
+        }
+
+    def commit(self):
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
@@ -0,0 +1,151 @@
+import threading
+import numpy as np
+
+CLIM_CLIP = 0.01  # default clims ignore 1% of pixels on either end
+MAX_FLOAT_SAMPLES = 2**16  # pixels sampled from every floating point image
+# dtypes histogrammed exactly, the counts of wider dtypes can exceed the RAM
+HISTOGRAM_DTYPES = [np.uint8, np.uint16]
+
+
+def histogram_percentile(counts, q):
+    """
+    Percentile of integer samples given by their histogram, interpolated linearly between the
+    closest ranks as np.percentile does
+
+    Parameters
+    ----------
+    counts:         (nd-array) counts[v] is the number of samples of value v
+    q:              (float) percentile between 0 and 100
+
+    Returns
+    -------
+    value:          (float) percentile of the samples
+
+    """
+
+    cdf = np.cumsum(counts)
+    n_samples = int(cdf[-1])
+    rank = q / 100 * (n_samples - 1)
+    low = int(np.floor(rank))
+    value_low = np.searchsorted(cdf, low, side="right")
+    value_high = (
+        np.searchsorted(cdf, low + 1, side="right")
+        if low + 1 < n_samples
+        else value_low
+    )
+
+    return float(value_low + (rank - low) * (value_high - value_low))
+
+
+def _digest(image):
+    """
+    histogram of a uint8 or uint16 image, subsampled pixels of other images
+    """
+
+    image = np.asarray(image)
+    if image.dtype in HISTOGRAM_DTYPES:
+        return np.bincount(image.ravel()), None
+
+    step = max(1, image.size // MAX_FLOAT_SAMPLES)
+    return None, image.ravel()[::step].astype(np.float64)
+
+
+class _Histogram:
+    """
+    Running histogram of uint8 and uint16 images, images of other dtypes are subsampled
+    """
+
+    def __init__(self):
+        self.counts = None
+        self.samples = []
+        self.n_images = 0
+
+    def add(self, counts, samples):
+        if counts is None:
+            self.samples.append(samples)
+        elif self.counts is None:
+            self.counts = counts
+        elif len(counts) > len(self.counts):
+            counts[: len(self.counts)] += self.counts
+            self.counts = counts
+        else:
+            self.counts[: len(counts)] += counts
+        self.n_images += 1
+
+    def clims(self, clip):
+        if self.counts is not None:
+            return (
+                histogram_percentile(self.counts, clip * 100),
+                histogram_percentile(self.counts, (1 - clip) * 100),
+            )
+
+        samples = np.concatenate(self.samples)
+        return (
+            float(np.percentile(samples, clip * 100)),
+            float(np.percentile(samples, (1 - clip) * 100)),
+        )
+
+
+class ChannelHistograms:
+    """
+    Contrast limits of every (position, channel) computed from running histograms of their
+    images.  Images are added while they are converted, so that contrast limits need no extra
+    reads of the raw data.  The histogram of a (position, channel) is dropped as soon as all of
+    its images were added, only its contrast limits are kept.
+
+    uint8 and uint16 images are histogrammed exactly, the contrast limits equal np.percentile of
+    all pixels.  Images of other dtypes are subsampled.
+    """
+
+    def __init__(self, n_images, clip=CLIM_CLIP):
+        """
+
+        Parameters
+        ----------
+        n_images:       (int) number of images of every (position, channel)
+        clip:           (float) fraction of pixels ignored on either end of the contrast limits
+        """
+
+        self.n_images = n_images
+        self.clip = clip
+        self._histograms = dict()
+        self._clims = dict()
+        self._lock = threading.Lock()
+
+    def add(self, p, c, image):
+        """
+        Adds an image to the histogram of its (position, channel).  Safe to call from multiple
+        threads.
+
+        Parameters
+        ----------
+        p:              (int) position of the image
+        c:              (int) channel of the image
+        image:          (nd-array) image array
+        """
+
+        counts, samples = _digest(image)
+        with self._lock:
+            histogram = self._histograms.setdefault((p, c), _Histogram())
+            histogram.add(counts, samples)
+            if histogram.n_images >= self.n_images:
+                self._clims[(p, c)] = histogram.clims(self.clip)
+                del self._histograms[(p, c)]
+
+    def clims(self, p, c):
+        """
+        Contrast limits of a (position, channel)
+
+        Parameters
+        ----------
+        p:              (int) position
+        c:              (int) channel
+
+        Returns
+        -------
+        clims:          (tuple or None) (min, max) contrast limits, None if not all images of
+                        the (position, channel) were added
+
+        """
+
+        return self._clims.get((p, c))
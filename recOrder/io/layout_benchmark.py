@@ -0,0 +1,172 @@
+import os
+import time
+import shutil
+import tempfile
+import numpy as np
+from waveorder.io.writer import WaveorderWriter
+from recOrder.io.utils import (
+    create_grid_from_coordinates,
+    default_hcs_metadata,
+    init_position_arrays,
+)
+
+
+def synthetic_position_list(rows, columns, seed=0):
+    """
+    XY stage positions of a tiled acquisition, acquired in random order
+
+    Parameters
+    ----------
+    rows:           (int) number of rows of the grid
+    columns:        (int) number of columns of the grid
+    seed:           (int) seed of the acquisition order
+
+    Returns
+    -------
+    xy_coords:      (list) list of (X, Y) tuples in acquisition order
+
+    """
+
+    x, y = np.meshgrid(
+        np.arange(columns) * 100.0, np.arange(rows) * 100.0, indexing="xy"
+    )
+    coords = np.stack([x.ravel(), y.ravel()], axis=1)
+    np.random.default_rng(seed).shuffle(coords)
+
+    return [tuple(pos) for pos in coords]
+
+
+def benchmark_grid_assignment(n_positions, seed=0):
+    """
+    Times the assignment of a synthetic position list to its acquisition grid
+
+    Parameters
+    ----------
+    n_positions:    (int) approximate number of positions, rounded to a square grid
+    seed:           (int) seed of the acquisition order
+
+    Returns
+    -------
+    result:         (dict) number of positions, grid shape and assignment time in seconds
+
+    """
+
+    columns = max(1, int(round(np.sqrt(n_positions))))
+    rows = max(1, int(round(n_positions / columns)))
+    xy_coords = synthetic_position_list(rows, columns, seed)
+
+    start = time.perf_counter()
+    create_grid_from_coordinates(xy_coords, rows, columns)
+
+    return {
+        "n_positions": rows * columns,
+        "grid": (rows, columns),
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def benchmark_position_layout(
+    n_positions,
+    output_dir,
+    data_shape=(1, 1, 1, 64, 64),
+    num_workers=4,
+    bulk=True,
+):
+    """
+    Times the creation of the default one row, one column per position layout of a zarr store
+    and the initialization of the position arrays
+
+    Parameters
+    ----------
+    n_positions:    (int) number of positions
+    output_dir:     (str) directory receiving the temporary zarr store
+    data_shape:     (tuple) shape (T, C, Z, Y, X) of the position arrays
+    num_workers:    (int) number of threads initializing the positions
+    bulk:           (bool) create the layout in one pass and initialize the positions concurrently
+                    (as the converter does).  Otherwise position by position w/ waveorder's default writer.
+
+    Returns
+    -------
+    result:         (dict) number of positions and layout time in seconds
+
+    """
+
+    name = f"layout_{n_positions}_{'bulk' if bulk else 'default'}.zarr"
+    chan_names = [f"Channel_{c}" for c in range(data_shape[1])]
+    clims = [[(0, 1)] * data_shape[1]] * n_positions
+    chunk_size = (1, 1, 1) + tuple(data_shape[3:])
+
+    start = time.perf_counter()
+    if bulk:
+        writer = WaveorderWriter(
+            output_dir,
+            hcs=True,
+            hcs_meta=default_hcs_metadata(
+                [f"Pos_{pos:03d}" for pos in range(n_positions)],
+                os.path.splitext(name)[0],
+            ),
+        )
+        writer.create_zarr_root(name)
+        init_position_arrays(
+            writer,
+            data_shape=data_shape,
+            chunk_size=chunk_size,
+            chan_names=chan_names,
+            dtype="uint16",
+            clims=clims,
+            num_workers=num_workers,
+        )
+    else:
+        writer = WaveorderWriter(output_dir)
+        writer.create_zarr_root(name)
+        for pos in range(n_positions):
+            writer.init_array(
+                pos,
+                data_shape=data_shape,
+                chunk_size=chunk_size,
+                chan_names=chan_names,
+                dtype="uint16",
+                clims=clims[pos],
+            )
+    seconds = time.perf_counter() - start
+    shutil.rmtree(os.path.join(output_dir, name))
+
+    return {"n_positions": n_positions, "bulk": bulk, "seconds": seconds}
+
+
+def benchmark_hcs_layout(
+    grid_sizes=(1000, 10000, 100000),
+    layout_sizes=(100, 1000),
+    output_dir=None,
+    num_workers=4,
+):
+    """
+    Benchmarks the grid assignment of synthetic position lists and the creation of zarr
+    layouts, bulk and position by position.
+
+    Parameters
+    ----------
+    grid_sizes:     (tuple) numbers of positions of the grid assignment benchmarks
+    layout_sizes:   (tuple) numbers of positions of the layout benchmarks
+    output_dir:     (str or None) directory receiving the temporary zarr stores,
+                    a temporary directory if None
+    num_workers:    (int) number of threads initializing the positions
+
+    Returns
+    -------
+    grid_results:   (list) result of benchmark_grid_assignment for every grid size
+    layout_results: (list) result of benchmark_position_layout for every layout size, bulk and not
+
+    """
+
+    grid_results = [benchmark_grid_assignment(n) for n in grid_sizes]
+    with tempfile.TemporaryDirectory(dir=output_dir) as tmp_dir:
+        layout_results = [
+            benchmark_position_layout(
+                n, tmp_dir, num_workers=num_workers, bulk=bulk
+            )
+            for n in layout_sizes
+            for bulk in (True, False)
+        ]
+
+    return grid_results, layout_results
@@ -0,0 +1,243 @@
+import json
+import logging
+import numpy as np
+import zarr
+from numcodecs import VLenUTF8
+
+COORDINATES = ["p", "t", "c", "z"]
+INDEX_ARRAY = "index"
+COLUMNS_GROUP = "columns"
+CHUNK_ROWS = 4096
+KEY_SEPARATOR = "."  # joins nested keys, '/' would create nested zarr groups
+
+
+def flatten_metadata(metadata, prefix=""):
+    """
+    Flattens nested image-plane metadata into a single level dictionary.  Nested keys are joined
+    with KEY_SEPARATOR and '/' within keys is replaced by '_', so that every key is a column of
+    the columns group.  Lists and other non-scalar values are stored as JSON strings.
+
+    Parameters
+    ----------
+    metadata:       (dict) image-plane metadata
+    prefix:         (str) prefix of the keys
+
+    Returns
+    -------
+    flat:           (dict) dictionary of scalar values
+
+    """
+
+    if not isinstance(metadata, dict):
+        metadata = {"value": metadata}
+
+    flat = dict()
+    for key, value in metadata.items():
+        name = prefix + str(key).replace("/", "_")
+        if isinstance(value, dict):
+            flat.update(flatten_metadata(value, name + KEY_SEPARATOR))
+        elif value is None or isinstance(value, (str, int, float)):
+            flat[name] = value
+        else:
+            flat[name] = json.dumps(value)
+
+    return flat
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+class PlaneMetadataWriter:
+    """
+    Columnar image-plane metadata store.  Every metadata key is a zarr array with one row per
+    image and an index array of shape (P, T, C, Z) maps each image to its row.  Numeric keys are
+    stored as float64 (NaN if missing), every other key as a string ('' if missing).
+    Rows are buffered and written in batches with flush.  Images that already have a row, e.g.
+    images converted again after resuming a conversion, overwrite their row.
+    """
+
+    def __init__(self, path, shape, resume=False):
+        """
+
+        Parameters
+        ----------
+        path:           (str) path to the zarr store
+        shape:          (tuple) (P, T, C, Z) dimensions of the dataset
+        resume:         (bool) append to an existing store instead of creating a new one
+        """
+
+        if resume:
+            self.root = zarr.open(path, "a")
+        if not resume or INDEX_ARRAY not in self.root:
+            self.root = zarr.open(path, "w")
+            self.root.full(
+                INDEX_ARRAY,
+                -1,
+                shape=shape,
+                chunks=(1,) + tuple(shape[1:]),
+                dtype=np.int64,
+            )
+            columns = self.root.create_group(COLUMNS_GROUP)
+            for name in COORDINATES:
+                columns.zeros(
+                    name, shape=(0,), chunks=(CHUNK_ROWS,), dtype=np.int32
+                )
+
+        self.index = self.root[INDEX_ARRAY]
+        self.columns = self.root[COLUMNS_GROUP]
+        self.rows = []
+        self._warned = set()
+
+    def append(self, coord, metadata):
+        """
+        Buffers the metadata of one image
+
+        Parameters
+        ----------
+        coord:          (tuple) (p, t, c, z) coordinate of the image
+        metadata:       (dict) image-plane metadata
+        """
+
+        self.rows.append((coord, flatten_metadata(metadata)))
+
+    def _create_column(self, name, numeric, n_rows):
+        if numeric:
+            column = self.columns.full(
+                name,
+                np.nan,
+                shape=(n_rows,),
+                chunks=(CHUNK_ROWS,),
+                dtype=np.float64,
+            )
+        else:
+            column = self.columns.full(
+                name,
+                "",
+                shape=(n_rows,),
+                chunks=(CHUNK_ROWS,),
+                dtype=object,
+                object_codec=VLenUTF8(),
+            )
+        return column
+
+    def flush(self):
+        """
+        Writes the buffered rows to the store
+        """
+
+        if not self.rows:
+            return
+
+        coords = np.array([coord for coord, _ in self.rows], dtype=np.int32)
+        # planes converted again on resume overwrite their existing row,
+        # other planes are appended
+        rows = np.asarray(
+            self.index.get_coordinate_selection(tuple(coords.T))
+        )
+        n_rows = self.columns["p"].shape[0]
+        new = rows < 0
+        rows[new] = np.arange(n_rows, n_rows + np.count_nonzero(new))
+        n_total = n_rows + np.count_nonzero(new)
+
+        for i, name in enumerate(COORDINATES):
+            self.columns[name].resize(n_total)
+            self.columns[name].set_coordinate_selection(rows, coords[:, i])
+
+        keys = set().union(*(metadata.keys() for _, metadata in self.rows))
+        for key in keys:
+            if key not in self.columns:
+                numeric = all(
+                    _is_number(metadata[key])
+                    for _, metadata in self.rows
+                    if metadata.get(key) is not None
+                )
+                self._create_column(key, numeric, n_rows)
+
+        for key, column in self.columns.arrays():
+            if key in COORDINATES:
+                continue
+
+            values = [metadata.get(key) for _, metadata in self.rows]
+            column.resize(n_total)
+            if column.dtype == object:
+                values = ["" if v is None else str(v) for v in values]
+                column.set_coordinate_selection(
+                    rows, np.array(values, dtype=object)
+                )
+            else:
+                numbers = np.full(len(values), np.nan)
+                for i, value in enumerate(values):
+                    if _is_number(value):
+                        numbers[i] = value
+                    elif value is not None and key not in self._warned:
+                        logging.warning(
+                            f"Non-numeric values of {key} are stored as NaN"
+                        )
+                        self._warned.add(key)
+                column.set_coordinate_selection(rows, numbers)
+
+        self.index.set_coordinate_selection(tuple(coords.T), rows)
+        self.rows = []
+
+
+class PlaneMetadataReader:
+    """
+    Reads image-plane metadata written by PlaneMetadataWriter.  Only the rows of the
+    requested images are read.
+    """
+
+    def __init__(self, path):
+        """
+
+        Parameters
+        ----------
+        path:           (str) path to the zarr store
+        """
+
+        self.root = zarr.open(path, "r")
+        self.index = self.root[INDEX_ARRAY]
+        self.columns = self.root[COLUMNS_GROUP]
+
+    @property
+    def keys(self):
+        """
+        Names of the metadata columns
+        """
+
+        return list(self.columns.array_keys())
+
+    def query(self, keys, p=None, t=None, c=None, z=None):
+        """
+        Gets metadata values of a selection of images
+
+        Parameters
+        ----------
+        keys:           (list) names of the metadata columns to read
+        p:              (int, slice or None) position selection, all positions if None
+        t:              (int, slice or None) time selection, all timepoints if None
+        c:              (int, slice or None) channel selection, all channels if None
+        z:              (int, slice or None) z selection, all slices if None
+
+        Returns
+        -------
+        values:         (dict) array of values for every key and for 'p', 't', 'c', 'z',
+                        one entry per selected image that has metadata
+
+        """
+
+        selection = tuple(
+            slice(None) if dim is None else dim for dim in (p, t, c, z)
+        )
+        rows = np.asarray(self.index[selection]).ravel()
+        rows = np.sort(rows[rows >= 0])
+
+        values = dict()
+        for key in COORDINATES + [k for k in keys if k not in COORDINATES]:
+            values[key] = (
+                self.columns[key].get_coordinate_selection(rows)
+                if len(rows)
+                else np.array([], dtype=self.columns[key].dtype)
+            )
+
+        return values
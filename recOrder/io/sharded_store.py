@@ -0,0 +1,339 @@
+import os
+import json
+import shutil
+import struct
+import threading
+from collections import OrderedDict
+from collections.abc import MutableMapping
+import zarr
+
+SHARD_MARKER = ".zshards"
+SHARD_VERSION = 1
+SHARD_SUFFIX = ".shard"
+SHARD_LAYOUTS = {"position": 0, "time": 1}
+MAX_OPEN_SHARDS = 64
+
+# every record of a shard file: magic, key length, value length, key, value
+RECORD_MAGIC = b"ZSHD"
+RECORD_HEADER = struct.Struct("<4sIQ")
+TOMBSTONE = 2**64 - 1
+
+
+def is_sharded(path):
+    """
+    Whether the zarr store at path was written with a ShardedStore
+    """
+
+    return os.path.isfile(os.path.join(path, SHARD_MARKER))
+
+
+def open_store(path):
+    """
+    Store of the zarr dataset at path, to be passed to zarr.open
+
+    Parameters
+    ----------
+    path:           (str) path to the zarr store
+
+    Returns
+    -------
+    store:          (ShardedStore or str) a ShardedStore if the dataset is sharded, path otherwise
+
+    """
+
+    return ShardedStore(path) if is_sharded(path) else path
+
+
+class _Shard:
+    """
+    Chunk index of one shard file: (offset, length) of the latest value of every key
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.index = dict()
+        self.scanned = 0
+
+    def scan(self):
+        """
+        Indexes the records appended since the last scan.  A partially written record at the
+        end of the file, left by an interrupted write, is ignored.
+        """
+
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, "rb") as file:
+            file.seek(self.scanned)
+            while True:
+                header = file.read(RECORD_HEADER.size)
+                if len(header) < RECORD_HEADER.size:
+                    break
+                magic, key_length, value_length = RECORD_HEADER.unpack(header)
+                if magic != RECORD_MAGIC:
+                    break
+                key = file.read(key_length)
+                if len(key) < key_length:
+                    break
+                start = file.tell()
+                if value_length == TOMBSTONE:
+                    end = start
+                else:
+                    end = start + value_length
+                    if end > os.fstat(file.fileno()).st_size:
+                        break
+
+                key = key.decode()
+                if value_length == TOMBSTONE:
+                    self.index.pop(key, None)
+                else:
+                    self.index[key] = (start, value_length)
+                file.seek(end)
+                self.scanned = end
+
+
+class ShardedStore(MutableMapping):
+    """
+    zarr store that keeps many chunks of an array in one shard file, cutting the number of files
+    of a dataset by orders of magnitude.  Group and array metadata are stored as regular files in
+    the layout of a zarr DirectoryStore, chunks are appended to shard files next to the .zarray of
+    their array.  The first shard_dims indices of a chunk select its shard: 0 stores every chunk of
+    an array in one shard, 1 one shard per timepoint of (T, C, Z, Y, X) arrays.
+
+    Overwritten chunks are appended again, the latest record wins.  Shards can be written by multiple
+    threads of one process and read by any number of processes.
+    """
+
+    def __init__(self, path, shard_dims=None):
+        """
+
+        Parameters
+        ----------
+        path:           (str) path to the zarr store
+        shard_dims:     (int or None) number of leading chunk indices selecting the shard of a chunk.
+                        Creates a new sharded store if given, reads it from an existing store if None.
+        """
+
+        self.path = path
+        marker = os.path.join(path, SHARD_MARKER)
+        if shard_dims is None:
+            with open(marker) as file:
+                shard_dims = json.load(file)["shard_dims"]
+        else:
+            os.makedirs(path, exist_ok=True)
+            with open(marker, "w") as file:
+                json.dump(
+                    {"version": SHARD_VERSION, "shard_dims": shard_dims}, file
+                )
+        self.shard_dims = shard_dims
+
+        self._shards = dict()
+        self._handles = OrderedDict()
+        self._lock = threading.RLock()
+
+    def __getstate__(self):
+        return self.path, self.shard_dims
+
+    def __setstate__(self, state):
+        self.path, self.shard_dims = state
+        self._shards = dict()
+        self._handles = OrderedDict()
+        self._lock = threading.RLock()
+
+    def _split(self, key):
+        """
+        splits a key into its shard file and chunk key, shard file is None for metadata keys
+        """
+
+        parent, _, name = key.rpartition("/")
+        if name.startswith(".") or not name:
+            return None, key
+
+        shard = ".".join(name.split(".")[: self.shard_dims]) or "all"
+        shard_file = os.path.join(self.path, parent, shard + SHARD_SUFFIX)
+
+        return shard_file, name
+
+    def _get_shard(self, shard_file):
+        with self._lock:
+            shard = self._shards.get(shard_file)
+            if shard is None:
+                shard = _Shard(shard_file)
+                shard.scan()
+                self._shards[shard_file] = shard
+
+        return shard
+
+    def _append(self, shard_file, name, value):
+        with self._lock:
+            shard = self._get_shard(shard_file)
+            handle = self._handles.pop(shard_file, None)
+            if handle is None:
+                shard.scan()
+                os.makedirs(os.path.dirname(shard_file), exist_ok=True)
+                handle = open(shard_file, "ab")
+                # drop a partial record left by an interrupted write
+                handle.truncate(shard.scanned)
+                if len(self._handles) >= MAX_OPEN_SHARDS:
+                    self._handles.popitem(last=False)[1].close()
+            self._handles[shard_file] = handle
+
+            key = name.encode()
+            length = TOMBSTONE if value is None else len(value)
+            handle.write(RECORD_HEADER.pack(RECORD_MAGIC, len(key), length))
+            handle.write(key)
+            if value is not None:
+                handle.write(value)
+            handle.flush()
+
+            start = shard.scanned + RECORD_HEADER.size + len(key)
+            if value is None:
+                shard.index.pop(name, None)
+                shard.scanned = start
+            else:
+                shard.index[name] = (start, len(value))
+                shard.scanned = start + len(value)
+
+    def __getitem__(self, key):
+        shard_file, name = self._split(key)
+        if shard_file is None:
+            file_path = os.path.join(self.path, key)
+            if not os.path.isfile(file_path):
+                raise KeyError(key)
+            with open(file_path, "rb") as file:
+                return file.read()
+
+        shard = self._get_shard(shard_file)
+        if name not in shard.index and shard_file not in self._handles:
+            # pick up chunks appended by another process
+            with self._lock:
+                shard.scan()
+        if name not in shard.index:
+            raise KeyError(key)
+
+        offset, length = shard.index[name]
+        with open(shard_file, "rb") as file:
+            file.seek(offset)
+            return file.read(length)
+
+    def __setitem__(self, key, value):
+        shard_file, name = self._split(key)
+        value = bytes(memoryview(value))
+        if shard_file is None:
+            file_path = os.path.join(self.path, key)
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            tmp_path = file_path + ".partial"
+            with open(tmp_path, "wb") as file:
+                file.write(value)
+            os.replace(tmp_path, file_path)
+        else:
+            self._append(shard_file, name, value)
+
+    def __delitem__(self, key):
+        shard_file, name = self._split(key)
+        if shard_file is None:
+            file_path = os.path.join(self.path, key)
+            if not os.path.isfile(file_path):
+                raise KeyError(key)
+            os.remove(file_path)
+        else:
+            if name not in self._get_shard(shard_file).index:
+                raise KeyError(key)
+            self._append(shard_file, name, None)
+
+    def __contains__(self, key):
+        shard_file, name = self._split(key)
+        if shard_file is None:
+            return os.path.isfile(os.path.join(self.path, key))
+
+        return name in self._get_shard(shard_file).index
+
+    def _keys(self, path=""):
+        """
+        keys of the metadata files and chunks under path, relative to path
+        """
+
+        root = os.path.join(self.path, path)
+        for directory, _, files in os.walk(root):
+            prefix = os.path.relpath(directory, root).replace(os.sep, "/")
+            prefix = "" if prefix == "." else prefix + "/"
+            for file in files:
+                if file.endswith(SHARD_SUFFIX):
+                    shard = self._get_shard(os.path.join(directory, file))
+                    for name in list(shard.index):
+                        yield prefix + name
+                elif file != SHARD_MARKER and not file.endswith(".partial"):
+                    yield prefix + file
+
+    def __iter__(self):
+        return self._keys()
+
+    def __len__(self):
+        return sum(1 for _ in self._keys())
+
+    def listdir(self, path=""):
+        """
+        children of path: its groups and arrays, metadata files and chunk keys
+        """
+
+        directory = os.path.join(self.path, path)
+        if not os.path.isdir(directory):
+            return []
+
+        children = []
+        for name in sorted(os.listdir(directory)):
+            file_path = os.path.join(directory, name)
+            if name.endswith(SHARD_SUFFIX):
+                children.extend(self._get_shard(file_path).index)
+            elif name != SHARD_MARKER and not name.endswith(".partial"):
+                children.append(name)
+
+        return sorted(children)
+
+    def rmdir(self, path=""):
+        directory = os.path.join(self.path, path)
+        with self._lock:
+            for shard_file in list(self._shards):
+                if shard_file.startswith(os.path.join(directory, "")):
+                    handle = self._handles.pop(shard_file, None)
+                    if handle is not None:
+                        handle.close()
+                    del self._shards[shard_file]
+        if path and os.path.isdir(directory):
+            shutil.rmtree(directory)
+
+    def close(self):
+        with self._lock:
+            for handle in self._handles.values():
+                handle.close()
+            self._handles = OrderedDict()
+
+
+def position_arrays(path):
+    """
+    Lazy zarr arrays of the positions of an OME-zarr dataset, in the order of the plate metadata.
+    Reads sharded and unsharded datasets.
+
+    Parameters
+    ----------
+    path:           (str) path to the zarr store
+
+    Returns
+    -------
+    arrays:         (list) list of (position path, zarr array) tuples
+
+    """
+
+    root = zarr.open(open_store(path), "r")
+    arrays = []
+    for well in root.attrs["plate"]["wells"]:
+        well_group = root[well["path"]]
+        for image in well_group.attrs["well"]["images"]:
+            arrays.append(
+                (
+                    f"{well['path']}/{image['path']}",
+                    well_group[image["path"]]["arr_0"],
+                )
+            )
+
+    return arrays
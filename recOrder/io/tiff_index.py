@@ -0,0 +1,445 @@
+import os
+import glob
+import struct
+import hashlib
+import threading
+import json
+import numpy as np
+
+TIFF_INDEX_VERSION = 1
+
+# Micro-Manager multipage tiff constants
+INDEX_MAP_OFFSET_HEADER = 54773648
+INDEX_MAP_HEADER = 3453623
+MM_METADATA_TAG = 51123
+
+# tiff tags read from the image file directories
+IMAGE_WIDTH = 256
+IMAGE_LENGTH = 257
+BITS_PER_SAMPLE = 258
+COMPRESSION = 259
+STRIP_OFFSETS = 273
+SAMPLES_PER_PIXEL = 277
+STRIP_BYTE_COUNTS = 279
+SAMPLE_FORMAT = 339
+
+# struct formats of the tiff field types used by the tags above
+TAG_FORMATS = {1: "B", 2: "s", 3: "H", 4: "I"}
+
+INDEX_DTYPE = np.dtype(
+    [
+        ("p", np.int32),
+        ("t", np.int32),
+        ("c", np.int32),
+        ("z", np.int32),
+        ("file", np.int32),
+        ("offset", np.int64),
+        ("height", np.int32),
+        ("width", np.int32),
+        ("dtype", "U8"),
+        ("meta_offset", np.int64),
+        ("meta_length", np.int64),
+    ]
+)
+
+
+def _tiff_fingerprint(files):
+    """
+    Hash of the names, sizes and modification times of the tiff files
+    """
+
+    fingerprint = hashlib.sha256()
+    for file in files:
+        stat = os.stat(file)
+        fingerprint.update(
+            f"{os.path.basename(file)}:{stat.st_size}:{stat.st_mtime_ns}".encode()
+        )
+
+    return fingerprint.hexdigest()
+
+
+def _sample_dtype(byte_order, bits, sample_format):
+    kind = {1: "u", 2: "i", 3: "f"}.get(sample_format)
+    if kind is None or not isinstance(bits, int) or bits % 8:
+        return None
+
+    return np.dtype(f"{byte_order}{kind}{bits // 8}").str
+
+
+def _read_ifd(buffer, byte_order, offset):
+    """
+    Reads the tags of one image file directory needed to locate its pixel data and metadata.
+
+    Returns
+    -------
+    tags:           (dict) value or (count, value offset) of the tags, keyed by tag number
+
+    """
+
+    (n_tags,) = struct.unpack_from(byte_order + "H", buffer, offset)
+    tags = dict()
+    for i in range(n_tags):
+        tag, field_type, count, value = struct.unpack_from(
+            byte_order + "HHII", buffer, offset + 2 + 12 * i
+        )
+        if tag == MM_METADATA_TAG:
+            # ascii string, stored at the value offset
+            tags[tag] = (count, value)
+        elif field_type in (3, 4) and count == 1:
+            tags[tag] = struct.unpack_from(
+                byte_order + TAG_FORMATS[field_type],
+                buffer,
+                offset + 10 + 12 * i,
+            )[0]
+        elif field_type in (3, 4):
+            # multiple strips, the strips must be contiguous to be read at once
+            size = struct.calcsize(TAG_FORMATS[field_type])
+            tags[tag] = (
+                struct.unpack_from(
+                    f"{byte_order}{count}{TAG_FORMATS[field_type]}",
+                    buffer,
+                    value if count * size > 4 else offset + 10 + 12 * i,
+                )
+                if tag in (STRIP_OFFSETS, STRIP_BYTE_COUNTS)
+                else None
+            )
+
+    return tags
+
+
+def image_location(buffer, byte_order, ifd_offset):
+    """
+    Locates the pixel data and the Micro-Manager metadata of one image from its image file
+    directory
+
+    Parameters
+    ----------
+    buffer:         (nd-array or bytes) contents of the tiff file
+    byte_order:     (str) '<' or '>'
+    ifd_offset:     (int) offset of the image file directory
+
+    Returns
+    -------
+    location:       (tuple or None) offset, height, width and dtype of the pixel data, offset and
+                    length of the metadata.  None if the image can't be read directly
+                    (compressed, RGB, ...)
+
+    """
+
+    tags = _read_ifd(buffer, byte_order, ifd_offset)
+    height, width = tags.get(IMAGE_LENGTH), tags.get(IMAGE_WIDTH)
+    strip_offsets = tags.get(STRIP_OFFSETS)
+    strip_byte_counts = tags.get(STRIP_BYTE_COUNTS)
+    dtype = _sample_dtype(
+        byte_order,
+        tags.get(BITS_PER_SAMPLE, 0),
+        tags.get(SAMPLE_FORMAT, 1),
+    )
+    if (
+        tags.get(COMPRESSION, 1) != 1
+        or tags.get(SAMPLES_PER_PIXEL, 1) != 1
+        or None in (height, width, strip_offsets, strip_byte_counts, dtype)
+    ):
+        return None
+
+    if isinstance(strip_offsets, tuple):
+        ends = np.add(strip_offsets, strip_byte_counts)
+        if np.any(ends[:-1] != strip_offsets[1:]):
+            return None
+        strip_offsets = strip_offsets[0]
+    meta_length, meta_offset = tags.get(MM_METADATA_TAG, (0, 0))
+
+    return strip_offsets, height, width, dtype, meta_offset, meta_length
+
+
+def _index_file(path, file_id):
+    """
+    Indexes the images of one Micro-Manager multipage tiff file from its IndexMap.
+
+    Returns
+    -------
+    entries:        (list) INDEX_DTYPE tuples of the images in the file, None if the file has
+                    no IndexMap or images that can't be read directly (compressed, RGB, ...)
+
+    """
+
+    buffer = np.memmap(path, dtype=np.uint8, mode="r")
+    if len(buffer) < 16 or bytes(buffer[:2]) not in (b"II", b"MM"):
+        return None
+    byte_order = "<" if bytes(buffer[:2]) == b"II" else ">"
+
+    header, index_map_offset = struct.unpack_from(
+        byte_order + "II", buffer, 8
+    )
+    if header != INDEX_MAP_OFFSET_HEADER or index_map_offset == 0:
+        return None
+    header, count = struct.unpack_from(
+        byte_order + "II", buffer, index_map_offset
+    )
+    if header != INDEX_MAP_HEADER:
+        return None
+    index_map = np.frombuffer(
+        buffer,
+        dtype=np.dtype(byte_order + "u4"),
+        count=5 * count,
+        offset=index_map_offset + 8,
+    ).reshape(count, 5)
+
+    entries = []
+    for c, z, t, p, ifd_offset in index_map:
+        if ifd_offset == 0:
+            # Micro-Manager pre-allocates the IndexMap, unused entries are zero
+            continue
+        location = image_location(buffer, byte_order, int(ifd_offset))
+        if location is None:
+            return None
+
+        entries.append((p, t, c, z, file_id) + location)
+
+    return entries
+
+
+class TiffIndex:
+    """
+    Index of the images of a Micro-Manager OME-TIFF dataset: the file, byte offset, shape and dtype
+    of the pixel data and the location of the image-plane metadata of every (p, t, c, z) coordinate.
+    The index is built in a single pass over the IndexMap of every file, images and metadata are
+    then read directly from memory-mapped files without parsing tiff tags.
+    """
+
+    def __init__(self, data_dir, files, entries):
+        """
+
+        Parameters
+        ----------
+        data_dir:       (str) folder containing the tiff files
+        files:          (list) file names relative to data_dir
+        entries:        (nd-array) structured array of INDEX_DTYPE, one row per image
+        """
+
+        self.data_dir = data_dir
+        self.files = list(files)
+        self.entries = entries
+        self.lookup = {
+            (int(p), int(t), int(c), int(z)): i
+            for i, (p, t, c, z) in enumerate(
+                zip(entries["p"], entries["t"], entries["c"], entries["z"])
+            )
+        }
+        self._buffers = dict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, coord):
+        return tuple(coord) in self.lookup
+
+    @classmethod
+    def build(cls, data_dir):
+        """
+        Builds the index from the IndexMaps of the tiff files in data_dir
+
+        Parameters
+        ----------
+        data_dir:       (str) folder containing the tiff files
+
+        Returns
+        -------
+        index:          (TiffIndex or None) None if a file can't be indexed
+
+        """
+
+        paths = sorted(glob.glob(os.path.join(data_dir, "*.tif")))
+        entries = []
+        for file_id, path in enumerate(paths):
+            file_entries = _index_file(path, file_id)
+            if file_entries is None:
+                return None
+            entries.extend(file_entries)
+        if not entries:
+            return None
+
+        return cls(
+            data_dir,
+            [os.path.basename(path) for path in paths],
+            np.array(entries, dtype=INDEX_DTYPE),
+        )
+
+    @classmethod
+    def load(cls, data_dir, index_path):
+        """
+        Loads an index saved with save
+
+        Parameters
+        ----------
+        data_dir:       (str) folder containing the tiff files
+        index_path:     (str) path to the saved index
+
+        Returns
+        -------
+        index:          (TiffIndex or None) None if there is no saved index or if the tiff files
+                        changed since it was saved
+
+        """
+
+        if not os.path.exists(index_path):
+            return None
+
+        paths = sorted(glob.glob(os.path.join(data_dir, "*.tif")))
+        with np.load(index_path) as file:
+            valid = (
+                int(file["version"]) == TIFF_INDEX_VERSION
+                and str(file["fingerprint"]) == _tiff_fingerprint(paths)
+            )
+            if not valid:
+                return None
+
+            return cls(data_dir, file["files"].tolist(), file["entries"])
+
+    @classmethod
+    def load_or_build(cls, data_dir, index_path):
+        """
+        Loads the saved index of data_dir, builds and saves it if it is missing or outdated
+
+        Parameters
+        ----------
+        data_dir:       (str) folder containing the tiff files
+        index_path:     (str) path to the saved index
+
+        Returns
+        -------
+        index:          (TiffIndex or None) None if the dataset can't be indexed
+
+        """
+
+        index = cls.load(data_dir, index_path)
+        if index is None:
+            index = cls.build(data_dir)
+            if index is not None:
+                index.save(index_path)
+
+        return index
+
+    def save(self, index_path):
+        """
+        Saves the index with a fingerprint of the tiff files it was built from
+
+        Parameters
+        ----------
+        index_path:     (str) path to the saved index, should end with .npz
+        """
+
+        paths = [os.path.join(self.data_dir, file) for file in self.files]
+        tmp_path = index_path[: -len(".npz")] + ".tmp.npz"
+        np.savez(
+            tmp_path,
+            version=TIFF_INDEX_VERSION,
+            fingerprint=_tiff_fingerprint(paths),
+            files=np.array(self.files),
+            entries=self.entries,
+        )
+        os.replace(tmp_path, index_path)
+
+    def _buffer(self, file_id):
+        buffer = self._buffers.get(file_id)
+        if buffer is None:
+            with self._lock:
+                buffer = self._buffers.get(file_id)
+                if buffer is None:
+                    buffer = np.memmap(
+                        os.path.join(self.data_dir, self.files[file_id]),
+                        dtype=np.uint8,
+                        mode="r",
+                    )
+                    self._buffers[file_id] = buffer
+
+        return buffer
+
+    def get_image(self, p, t, c, z):
+        """
+        Reads one image.  Safe to call from multiple threads.
+
+        Parameters
+        ----------
+        p:                  (int) position coordinate
+        t:                  (int) time coordinate
+        c:                  (int) channel coordinate
+        z:                  (int) z coordinate
+
+        Returns
+        -------
+        image:              (nd-array) image array of shape (Y, X) in native byte order
+
+        """
+
+        entry = self.entries[self.lookup[(p, t, c, z)]]
+        dtype = np.dtype(str(entry["dtype"]))
+        image = np.ndarray(
+            (int(entry["height"]), int(entry["width"])),
+            dtype=dtype,
+            buffer=self._buffer(int(entry["file"])),
+            offset=int(entry["offset"]),
+        )
+
+        return image.astype(dtype.newbyteorder("="))
+
+    def get_array(self, p):
+        """
+        Reads all images of one position
+
+        Parameters
+        ----------
+        p:                  (int) position coordinate
+
+        Returns
+        -------
+        array:              (nd-array) array of dimensions (T, C, Z, Y, X)
+
+        """
+
+        entries = self.entries[self.entries["p"] == p]
+        shape = tuple(
+            int(entries[dim].max()) + 1 for dim in ("t", "c", "z")
+        ) + (int(entries["height"][0]), int(entries["width"][0]))
+        array = np.zeros(
+            shape, dtype=np.dtype(str(entries["dtype"][0])).newbyteorder("=")
+        )
+        for t, c, z in zip(entries["t"], entries["c"], entries["z"]):
+            array[t, c, z] = self.get_image(p, int(t), int(c), int(z))
+
+        return array
+
+    def get_metadata(self, p, t, c, z):
+        """
+        Reads the Micro-Manager image-plane metadata of one image
+
+        Parameters
+        ----------
+        p:                  (int) position coordinate
+        t:                  (int) time coordinate
+        c:                  (int) channel coordinate
+        z:                  (int) z coordinate
+
+        Returns
+        -------
+        metadata:           (dict or None) image-plane metadata, None if the image has none
+
+        """
+
+        entry = self.entries[self.lookup[(p, t, c, z)]]
+        if entry["meta_length"] == 0:
+            return None
+
+        start = int(entry["meta_offset"])
+        raw = bytes(
+            self._buffer(int(entry["file"]))[
+                start : start + int(entry["meta_length"])
+            ]
+        )
+
+        return json.loads(raw.rstrip(b"\0").decode("utf-8"))
+
+    def close(self):
+        with self._lock:
+            self._buffers = dict()
@@ -1,12 +1,15 @@
 import glob
+import hashlib
 import logging
 import os
 import psutil
 import textwrap
+from concurrent.futures import ThreadPoolExecutor
 import tifffile as tiff
 import numpy as np
 from colorspacious import cspace_convert
 from matplotlib.colors import hsv_to_rgb
+from numcodecs import Blosc
 from waveorder.waveorder_reconstructor import waveorder_microscopy
 
 
@@ -99,6 +102,132 @@ def load_bg(bg_path, height, width, ROI=None):
     return bg_img_arr  # CYX
 
 
+BG_STOKES_FILE = "bg_stokes.npz"
+BG_STOKES_VERSION = 1
+
+
+def _bg_fingerprint(bg_path):
+    """
+    Hash of the names, sizes and modification times of the background images
+    """
+
+    fingerprint = hashlib.sha256()
+    for file in sorted(glob.glob(os.path.join(bg_path, "*.tif"))):
+        stat = os.stat(file)
+        fingerprint.update(
+            f"{os.path.basename(file)}:{stat.st_size}:{stat.st_mtime_ns}".encode()
+        )
+
+    return fingerprint.hexdigest()
+
+
+def save_bg_stokes(bg_path, bg_stokes, calibration_scheme, swing):
+    """
+    Save background Stokes parameters next to the background images they were computed from.
+
+    Parameters
+    ----------
+    bg_path             : (str) path to the folder containing background images
+    bg_stokes           : (ndarray) transformed background Stokes w/ dimensions (5, Y, X)
+    calibration_scheme  : (str) '4-State' or '5-State'
+    swing               : (float) swing used to compute the Stokes parameters
+    """
+
+    bg_stokes_path = os.path.join(bg_path, BG_STOKES_FILE)
+    tmp_path = bg_stokes_path + f".tmp-{os.getpid()}.npz"
+    np.savez(
+        tmp_path,
+        version=BG_STOKES_VERSION,
+        fingerprint=_bg_fingerprint(bg_path),
+        calibration_scheme=calibration_scheme,
+        swing=swing,
+        bg_stokes=bg_stokes,
+    )
+    os.replace(tmp_path, bg_stokes_path)
+
+
+def read_bg_stokes(bg_path, height, width, calibration_scheme, swing):
+    """
+    Read background Stokes parameters saved by save_bg_stokes.
+
+    Parameters
+    ----------
+    bg_path             : (str) path to the folder containing background images
+    height              : (int) height of image in pixels
+    width               : (int) width of image in pixels
+    calibration_scheme  : (str) '4-State' or '5-State'
+    swing               : (float) swing of the current calibration
+
+    Returns
+    -------
+    bg_stokes           : (ndarray or None) background Stokes w/ dimensions (5, Y, X), None if the
+                          saved Stokes are missing or were computed from different images or settings
+    """
+
+    bg_stokes_path = os.path.join(bg_path, BG_STOKES_FILE)
+    if not os.path.exists(bg_stokes_path):
+        return None
+
+    try:
+        with np.load(bg_stokes_path) as file:
+            valid = (
+                int(file["version"]) == BG_STOKES_VERSION
+                and str(file["fingerprint"]) == _bg_fingerprint(bg_path)
+                and str(file["calibration_scheme"]) == calibration_scheme
+                and np.isclose(float(file["swing"]), swing)
+                and file["bg_stokes"].shape[1:] == (height, width)
+            )
+            bg_stokes = file["bg_stokes"] if valid else None
+    except (OSError, ValueError, KeyError) as ex:
+        logging.warning(f"Could not read {bg_stokes_path}: {ex}")
+        return None
+
+    if bg_stokes is None:
+        logging.debug(f"{bg_stokes_path} is out of date")
+
+    return bg_stokes
+
+
+def load_bg_stokes(
+    bg_path, reconstructor, height, width, calibration_scheme, swing, ROI=None
+):
+    """
+    Load background Stokes parameters, computing and saving them from the background images
+    if no up-to-date Stokes are saved in the background folder.
+
+    Parameters
+    ----------
+    bg_path             : (str) path to the folder containing background images
+    reconstructor       : (waveorder_microscopy) reconstructor initialized with calibration_scheme and swing
+    height              : (int) height of image in pixels
+    width               : (int) width of image in pixels
+    calibration_scheme  : (str) '4-State' or '5-State'
+    swing               : (float) swing of the current calibration
+    ROI                 : (tuple) ROI of the background images, passed to load_bg
+
+    Returns
+    -------
+    bg_stokes           : (ndarray) transformed background Stokes w/ dimensions (5, Y, X)
+    """
+
+    bg_stokes = read_bg_stokes(
+        bg_path, height, width, calibration_scheme, swing
+    )
+    if bg_stokes is not None:
+        return bg_stokes
+
+    bg_data = load_bg(bg_path, height, width, ROI)
+    bg_stokes = reconstructor.Stokes_recon(bg_data)
+    bg_stokes = reconstructor.Stokes_transform(bg_stokes)
+
+    try:
+        save_bg_stokes(bg_path, bg_stokes, calibration_scheme, swing)
+    except OSError as ex:
+        logging.warning(f"Could not save background Stokes: {ex}")
+
+    return bg_stokes
+
+
 def create_grid_from_coordinates(xy_coords, rows, columns):
     """
     Function to create a grid from XY-position coordinates.  Useful for generating HCS Zarr metadata.
@@ -115,29 +244,189 @@ def create_grid_from_coordinates(xy_coords, rows, columns):
                                 corresponds to the position index at that location.
     """
 
-    coords = dict()
-    coords_list = []
-    for idx, pos in enumerate(xy_coords):
-        coords[idx] = pos
-        coords_list.append(pos)
+    coords = np.asarray(xy_coords, dtype=float).reshape(-1, 2)
+    if len(coords) != rows * columns:
+        raise ValueError(
+            f"{len(coords)} positions do not fill a grid of {rows} rows and {columns} columns"
+        )
 
-    # sort by X and then by Y
-    coords_list.sort(key=lambda x: x[0])
-    coords_list.sort(key=lambda x: x[1])
+    # sort by Y and then by X, the position indices sorted this way fill the grid row by row
+    order = np.lexsort((coords[:, 0], coords[:, 1]))
+    dtype = (
+        "uint16" if len(coords) <= np.iinfo(np.uint16).max + 1 else "uint32"
+    )
+    pos_index_grid = order.reshape(rows, columns).astype(dtype)
 
-    # reshape XY coordinates into their proper 2D shape
-    grid = np.reshape(coords_list, (rows, columns, 2))
-    pos_index_grid = np.zeros((rows, columns), "uint16")
-    keys = list(coords.keys())
-    vals = list(coords.values())
+    return pos_index_grid
 
-    for row in range(rows):
-        for col in range(columns):
 
-            # append position index (key) into a final grid by indexed into the coordinate map (values)
-            pos_index_grid[row, col] = keys[vals.index(list(grid[row, col]))]
+def default_hcs_metadata(position_names, name):
+    """
+    HCS metadata of the default layout of non-HCS datasets: one row, one column per position.
+    Reproduces the layout and metadata of waveorder's default writer, which rewrites the plate
+    metadata for every new position.  Writing with this metadata creates the hierarchy in one pass.
 
-    return pos_index_grid
+    Parameters
+    ----------
+    position_names:     (list) names of the position subgroups, in order of the position indices
+    name:               (str) name of the plate, usually the name of the dataset
+
+    Returns
+    -------
+    hcs_meta            (dict) HCS metadata accepted by WaveorderWriter(hcs=True)
+    """
+
+    columns = [f"Col_{i}" for i in range(len(position_names))]
+
+    return {
+        "plate": {
+            "acquisitions": [
+                {
+                    "id": 1,
+                    "maximumfieldcount": 1,
+                    "name": "Dataset",
+                    "starttime": 0,
+                }
+            ],
+            "columns": [{"name": col} for col in columns],
+            "field_count": 1,
+            "name": name,
+            "rows": [{"name": "Row_0"}],
+            "version": "0.1",
+            "wells": [{"path": f"Row_0/{col}"} for col in columns],
+        },
+        "well": [
+            {"images": [{"path": pos_name}], "version": "0.1"}
+            for pos_name in position_names
+        ],
+    }
+
+
+def position_channel_attributes(writer, chan_names, clims, dtype):
+    """
+    OME-zarr metadata of one position, as written by WaveorderWriter.init_array
+
+    Parameters
+    ----------
+    writer:             (WaveorderWriter) writer of the dataset
+    chan_names:         (list) channel names
+    clims:              (list or None) (start, end) or (start, end, min, max) contrast limits of the channels
+    dtype:              (str or np.dtype) data type of the position array
+
+    Returns
+    -------
+    attributes          (dict) multiscales and omero metadata of the position
+    """
+
+    dtype = np.dtype(dtype)
+    if clims and len(chan_names) < len(clims):
+        raise ValueError(
+            "Contrast Limits specified exceed the number of channels given"
+        )
+
+    channels = []
+    for i, chan_name in enumerate(chan_names):
+        clim = None
+        if clims and i < len(clims):
+            clim = tuple(float(c) for c in clims[i])
+            if len(clim) == 2:
+                if "float" in dtype.name:
+                    clim += (-1000, 1000)
+                else:
+                    info = np.iinfo(dtype)
+                    clim += (info.min, info.max)
+            elif len(clim) != 4:
+                raise ValueError(
+                    "clim specification must a tuple of length 2 or 4"
+                )
+        channels.append(
+            writer.sub_writer.create_channel_dict(
+                chan_name, clim, first_chan=i == 0
+            )
+        )
+
+    return {
+        "multiscales": [{"datasets": [{"path": "arr_0"}], "version": "0.1"}],
+        "omero": {
+            "channels": channels,
+            "rdefs": {
+                "defaultT": 0,
+                "model": "color",
+                "projection": "normal",
+                "defaultZ": 0,
+            },
+            "version": 0.1,
+        },
+    }
+
+
+def init_position_arrays(
+    writer,
+    data_shape,
+    chunk_size,
+    chan_names,
+    dtype,
+    clims=None,
+    compressor=None,
+    store=None,
+    num_workers=4,
+):
+    """
+    Initializes the arrays of all positions of a zarr store created by an HCS WaveorderWriter.
+    Equivalent to calling writer.init_array for every position, the metadata and empty arrays
+    of the positions are written concurrently.
+
+    Parameters
+    ----------
+    writer:             (WaveorderWriter) HCS writer whose zarr root was created
+    data_shape:         (tuple) shape of the arrays (T, C, Z, Y, X)
+    chunk_size:         (tuple) chunk size of the arrays (T, C, Z, Y, X)
+    chan_names:         (list) channel names
+    dtype:              (str or np.dtype) data type of the arrays
+    clims:              (list or None) contrast limits of the channels of every position,
+                                    default contrast limits if None
+    compressor:         (numcodecs Codec or None) compressor of the arrays, the writer's Blosc zstd
+                                    w/ bitshuffle if None
+    store:              (zarr Group or None) root group the arrays are created in, the writer's
+                                    store if None
+    num_workers:        (int) number of threads writing the metadata and arrays
+
+    Returns
+    -------
+    groups:             (list) zarr groups of the positions, in order of the position indices
+    arrays:             (list) zarr arrays of the positions, in order of the position indices
+    """
+
+    store = writer.store if store is None else store
+    compressor = (
+        Blosc(cname="zstd", clevel=1, shuffle=Blosc.BITSHUFFLE)
+        if compressor is None
+        else compressor
+    )
+    positions = writer.sub_writer.positions
+
+    def init_position(pos):
+        info = positions[pos]
+        group = store[f"{info['row']}/{info['col']}/{info['name']}"]
+        group.attrs.put(
+            position_channel_attributes(
+                writer, chan_names, clims[pos] if clims else None, dtype
+            )
+        )
+        array = group.zeros(
+            "arr_0",
+            shape=data_shape,
+            chunks=chunk_size,
+            dtype=dtype,
+            compressor=compressor,
+            overwrite=True,
+        )
+        return group, array
+
+    with ThreadPoolExecutor(max(1, num_workers)) as executor:
+        results = list(executor.map(init_position, sorted(positions)))
+
+    return [group for group, _ in results], [array for _, array in results]
 
 
 class MockEmitter:
@@ -215,6 +504,27 @@ def ram_message():
     return (is_warning, message)
 
 
+def max_pending_stacks(stack_nbytes, limit=4, memory_fraction=0.25):
+    """
+    Number of acquired stacks that can wait for reconstruction without exhausting the RAM.
+    Reconstructions need several times the memory of their stack, only a fraction of the
+    available RAM is used for waiting stacks.
+
+    Parameters
+    ----------
+    stack_nbytes:       (int) size of one stack in bytes
+    limit:              (int) maximum number of waiting stacks
+    memory_fraction:    (float) fraction of the available RAM used for waiting stacks
+
+    Returns
+    -------
+    max_pending:        (int) number of stacks, at least 1
+    """
+
+    available = psutil.virtual_memory().available * memory_fraction
+    return int(max(1, min(limit, available // max(1, stack_nbytes))))
+
+
 def rec_bkg_to_wo_bkg(recorder_option) -> str:
     """
     Converts recOrder's background options to waveorder's background options.
@@ -1,12 +1,132 @@
 import os
+import zlib
+import itertools
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from tqdm import tqdm
 import numpy as np
 import tifffile as tiff
 from waveorder.io.writer import WaveorderWriter
 from waveorder.io.reader import WaveorderReader
-from recOrder.io.utils import create_grid_from_coordinates
+from recOrder.io.utils import (
+    create_grid_from_coordinates,
+    default_hcs_metadata,
+    init_position_arrays,
+    position_channel_attributes,
+)
+from recOrder.io.conversion_journal import ConversionJournal
+from recOrder.io.plane_metadata import PlaneMetadataWriter
+from recOrder.io.tiff_index import TiffIndex
+from recOrder.io.histograms import ChannelHistograms
+from recOrder.io.sharded_store import (
+    SHARD_LAYOUTS,
+    ShardedStore,
+    open_store,
+)
 import copy
-import json
+import zarr
+from numcodecs import Blosc
+
+VERIFY_MODES = ["full", "sample", "none"]
+VERIFY_SAMPLE_INTERVAL = 100  # verify every 100th chunk in "sample" mode
+CHECKSUM_ARRAY = "plane_checksums"
+CHECKSUM_KEY = "recOrder-CRC32"
+JOURNAL_COMMIT_INTERVAL = 64  # chunks written between journal commits
+CHUNK_PROFILES = ["plane", "zstack", "tile-512", "plane-lz4"]
+CLIM_MODES = ["focus", "stack"]
+
+
+def get_chunk_profile(profile, data_shape):
+    """
+    Chunk size and compressor of a named chunking/compression profile.
+
+    'plane':        one (Y, X) image per chunk, Blosc zstd w/ bitshuffle
+    'zstack':       one (Z, Y, X) stack per chunk, Blosc zstd w/ bitshuffle. Fast z-stack reads for 3D reconstruction
+    'tile-512':     (Z, 512, 512) tiles, Blosc zstd w/ bitshuffle.  Fast reads of sub-regions of large images
+    'plane-lz4':    one (Y, X) image per chunk, Blosc lz4 w/ bitshuffle.  Faster, lower compression
+
+    Parameters
+    ----------
+    profile:        (str) name of the profile, one of CHUNK_PROFILES
+    data_shape:     (tuple) (T, C, Z, Y, X) shape of the array
+
+    Returns
+    -------
+    chunk_size:     (tuple) chunk size of the array
+    compressor:     (numcodecs Codec) compressor of the array
+
+    """
+
+    T, C, Z, Y, X = data_shape
+    zstd = Blosc(cname="zstd", clevel=1, shuffle=Blosc.BITSHUFFLE)
+
+    if profile == "plane":
+        return (1, 1, 1, Y, X), zstd
+    elif profile == "zstack":
+        return (1, 1, Z, Y, X), zstd
+    elif profile == "tile-512":
+        return (1, 1, Z, min(Y, 512), min(X, 512)), zstd
+    elif profile == "plane-lz4":
+        return (1, 1, 1, Y, X), Blosc(
+            cname="lz4", clevel=5, shuffle=Blosc.BITSHUFFLE
+        )
+    else:
+        raise ValueError(
+            f"Chunk profile {profile} not understood, use one of {CHUNK_PROFILES}"
+        )
+
+
+def plane_checksum(image):
+    """
+    CRC32 checksum of an image plane
+
+    Parameters
+    ----------
+    image:          (nd-array) image array
+
+    Returns
+    -------
+    checksum:       (int) CRC32 checksum of the image bytes
+
+    """
+
+    return zlib.crc32(np.ascontiguousarray(image))
+
+
+def verify_checksums(zarr_path):
+    """
+    Verifies every image of a converted zarr store against the checksums recorded at
+    conversion time.
+
+    Parameters
+    ----------
+    zarr_path:      (str) path to the zarr store
+
+    Returns
+    -------
+    mismatches:     (list) list of (position path, t, c, z) tuples of images that do not match
+    n_checked:      (int) number of verified images
+
+    """
+
+    mismatches = []
+    n_checked = 0
+    groups = [zarr.open(open_store(zarr_path), "r")]
+    while groups:
+        group = groups.pop()
+        groups.extend(child for _, child in group.groups())
+        if "arr_0" not in group or CHECKSUM_ARRAY not in group:
+            continue
+
+        array = group["arr_0"]
+        checksums = group[CHECKSUM_ARRAY][:]
+        for t, c, z in np.ndindex(checksums.shape):
+            if plane_checksum(array[t, c, z]) != checksums[t, c, z]:
+                mismatches.append((group.path, t, c, z))
+            n_checked += 1
+
+    return mismatches, n_checked
 
 
 class ZarrConverter:
@@ -24,6 +144,12 @@ class ZarrConverter:
         data_type=None,
         replace_position_names=False,
         format_hcs=False,
+        num_workers=4,
+        verify="full",
+        resume=False,
+        chunk_profile="plane",
+        shards=None,
+        clim_mode="focus",
     ):
         """
 
@@ -37,17 +163,54 @@ class ZarrConverter:
             input data type, optional
         replace_position_names: bool
         format_hcs: bool
+        num_workers: int
+            number of reader and of writer threads used during conversion
+        verify: str
+            verification of the written images against the CRC32 checksums computed at read time.
+            'full' verifies every image, 'sample' every 100th chunk, 'none' skips verification.
+            Verification runs in the background while the conversion continues, chunks are recorded
+            in the conversion journal once verified.  The checksums are always saved in the store
+            and can be verified later with verify_checksums.
+        resume: bool
+            resume an interrupted conversion into output_dir.  Chunks recorded as written in the
+            conversion journal are skipped.  Starts a new conversion if there is nothing to resume.
+            The journal and the index of the raw files are deleted once the conversion completes.
+        chunk_profile: str
+            chunking and compression profile of the output arrays, one of CHUNK_PROFILES
+            (see get_chunk_profile)
+        shards: str or None
+            sharded storage layout of the output arrays, chunks are stored in one file per position
+            ('position') or per position and timepoint ('time') instead of one file per chunk.
+            None writes a regular zarr DirectoryStore.  Sharded stores are read with
+            recOrder.io.sharded_store.open_store.
+        clim_mode: str
+            images the contrast limits of every position and channel are computed from, 'focus'
+            for the middle slice of the first timepoint, 'stack' for all images.  Contrast limits
+            are computed from histograms accumulated during conversion and ignore 1% of pixels
+            on either end.
         """
 
         if not output_dir.endswith(".zarr"):
             raise ValueError("Please specify .zarr at the end of your output")
+        if verify not in VERIFY_MODES:
+            raise ValueError(
+                f"verify must be one of {VERIFY_MODES}, got {verify}"
+            )
+        if clim_mode not in CLIM_MODES:
+            raise ValueError(
+                f"clim_mode must be one of {CLIM_MODES}, got {clim_mode}"
+            )
+        if shards is not None and shards not in SHARD_LAYOUTS:
+            raise ValueError(
+                f"shards must be None or one of {list(SHARD_LAYOUTS)}, got {shards}"
+            )
 
         # Init File IO Properties
         self.version = "recOrder converter version=0.5"
         self.data_directory = input_dir
         self.save_directory = os.path.dirname(output_dir)
         # self.files = glob.glob(os.path.join(self.data_directory, '*.tif'))
-        self.meta_file = None
+        self.plane_metadata = None
 
         print("Initializing Data...")
         self.reader = WaveorderReader(
@@ -60,19 +223,43 @@ class ZarrConverter:
             self.reader.mm_meta["Summary"] if self.reader.mm_meta else None
         )
         self.save_name = os.path.basename(output_dir)
-        if self.data_type != "upti":
-            self.mfile_name = os.path.join(
+        self.journal_file = os.path.join(
+            self.save_directory,
+            f"{os.path.splitext(self.save_name)[0]}_ConversionJournal.sqlite",
+        )
+        self.resume = (
+            resume
+            and os.path.exists(self.journal_file)
+            and os.path.exists(output_dir)
+        )
+        self.journal = None
+        self.mfile_name = (
+            os.path.join(
                 self.save_directory,
-                f'{self.save_name.strip(".zarr")}_ImagePlaneMetadata.txt',
+                f"{os.path.splitext(self.save_name)[0]}_ImagePlaneMetadata.zarr",
             )
-            self.meta_file = open(self.mfile_name, "a")
+            if self.data_type != "upti"
+            else None
+        )
 
         self.replace_position_names = replace_position_names
         self.format_hcs = format_hcs
+        self.num_workers = max(1, num_workers)
+        self.verify = verify
+        self.shards = shards
 
         if not os.path.exists(self.save_directory):
             os.mkdir(self.save_directory)
 
+        # index of the raw images, read directly instead of parsing tiff tags
+        self.index_file = os.path.join(
+            self.save_directory,
+            f"{os.path.splitext(self.save_name)[0]}_TiffIndex.npz",
+        )
+        self.tiff_index = (
+            self._load_tiff_index() if self.data_type == "ometiff" else None
+        )
+
         # Generate Data Specific Properties
         self.coords = None
         self.coord_map = dict()
@@ -91,7 +278,32 @@ class ZarrConverter:
         self.x = self.reader.width
         self.dim = (self.p, self.t, self.c, self.z, self.y, self.x)
         self.focus_z = self.z // 2
+        self.data_shape = (
+            self.t if self.t != 0 else 1,
+            self.c if self.c != 0 else 1,
+            self.z if self.z != 0 else 1,
+            self.y,
+            self.x,
+        )
+        self.chunk_profile = chunk_profile
+        self.chunk_size, self.compressor = get_chunk_profile(
+            chunk_profile, self.data_shape
+        )
+        self.clim_mode = clim_mode
+        self.histograms = ChannelHistograms(
+            self.data_shape[0] * self.data_shape[2]
+            if clim_mode == "stack"
+            else 1
+        )
+        self.position_groups = dict()
+        self.arrays = dict()
+        self.checksums = dict()
         self.prefix_list = []
+
+        # per-thread TiffFiles and a lock for readers that aren't thread-safe
+        self._thread_local = threading.local()
+        self._open_files = []
+        self._read_lock = threading.RLock()
         print(
             f"Found Dataset {self.save_name} w/ dimensions (P, T, C, Z, Y, X): {self.dim}"
         )
@@ -104,17 +316,55 @@ class ZarrConverter:
         self.metadata["recOrder_Converter_Version"] = self.version
         self.metadata["Summary"] = self.summary_metadata
 
-        # initialize metadata if HCS desired, init writer
+        # initialize HCS metadata, the default layout of non-HCS datasets is written as an HCS plate
+        # so that the whole hierarchy is created in one pass
+        self._get_position_names()
         self.hcs_meta = (
-            self._generate_hcs_metadata() if self.format_hcs else None
+            self._generate_hcs_metadata()
+            if self.format_hcs
+            else self._generate_default_hcs_metadata()
         )
         self.writer = WaveorderWriter(
             self.save_directory,
-            hcs=self.format_hcs,
+            hcs=True,
             hcs_meta=self.hcs_meta,
             verbose=False,
         )
-        self.writer.create_zarr_root(self.save_name)
+        if self.resume:
+            self.store = zarr.open(open_store(output_dir), "r+")
+        else:
+            if os.path.exists(self.journal_file):
+                os.remove(self.journal_file)
+            self.writer.create_zarr_root(self.save_name)
+            self.store = self.writer.store
+            if self.shards is not None:
+                self.store = zarr.open(
+                    ShardedStore(output_dir, SHARD_LAYOUTS[self.shards]), "r+"
+                )
+
+    def _load_tiff_index(self):
+        """
+        loads the index of the raw ome-tiff files, building and saving it next to the output
+        if it is missing or outdated
+
+        Returns
+        -------
+        tiff_index:     (TiffIndex or None) None if the files can't be indexed or the index does
+                        not match the images found by the reader
+
+        """
+
+        tiff_index = TiffIndex.load_or_build(
+            self.data_directory, self.index_file
+        )
+        if tiff_index is not None and set(tiff_index.lookup) != set(
+            self.reader.reader.coord_map
+        ):
+            tiff_index = None
+        if tiff_index is None:
+            print("Could not index the tiff files, reading tiff tags instead")
+
+        return tiff_index
 
     def _gen_coordset(self):
         """
@@ -237,6 +487,27 @@ class ZarrConverter:
 
         return hcs_meta
 
+    def _generate_default_hcs_metadata(self):
+        """
+        generates the HCS metadata of the default layout: one row, one column per position
+
+        Returns
+        -------
+        hcs_meta:       (dict) HCS metadata
+
+        """
+
+        position_names = [
+            name
+            if self.replace_position_names and name
+            else f"Pos_{pos:03d}"
+            for pos, name in enumerate(self.pos_names)
+        ]
+
+        return default_hcs_metadata(
+            position_names, os.path.splitext(self.save_name)[0]
+        )
+
     def _generate_plane_metadata(self, tiff_file, page):
         """
         generates the img plane metadata by saving the MicroManagerMetadata written in the tiff tags.
@@ -260,30 +531,26 @@ class ZarrConverter:
             else:
                 continue
 
-    def _perform_image_check(self, tiff_image, coord):
+    def _perform_image_check(self, checksum, coord):
         """
-        checks to make sure the memory mapped image matches the saved zarr image to ensure
+        checks to make sure the saved zarr image matches the checksum of the raw image to ensure
         a successful conversion.
 
         Parameters
         ----------
-        tiff_image:     (nd-array) memory mapped array
+        checksum:       (int) CRC32 checksum of the raw image
         coord:          (tuple) coordinate of the image location
 
         Returns
         -------
-        True/False:     (bool) True if arrays are equal, false otherwise
+        True/False:     (bool) True if the checksums are equal, false otherwise
 
         """
 
-        zarr_array = self.writer.sub_writer.current_pos_group["arr_0"]
-        zarr_img = zarr_array[
-            coord[self.dim_order.index("time")],
-            coord[self.dim_order.index("channel")],
-            coord[self.dim_order.index("z")],
-        ]
+        p, t, c, z = self._reorder_coord(coord)
+        zarr_img = self.arrays[p][t, c, z]
 
-        return np.array_equal(zarr_img, tiff_image)
+        return plane_checksum(zarr_img) == checksum
 
     def _get_channel_names(self):
         """
@@ -356,12 +623,24 @@ class ZarrConverter:
         """
 
         # get image at given coordinate
-        return np.asarray(self.reader.get_image(p, t, c, z))
+        if self.tiff_index is not None:
+            return self.tiff_index.get_image(p, t, c, z)
+
+        with self._read_lock:
+            return np.asarray(self.reader.get_image(p, t, c, z))
+
+    def _adds_to_histogram(self, t, z):
+        """
+        whether an image contributes to the contrast limits of its position and channel
+        """
+
+        return self.clim_mode == "stack" or (t == 0 and z == self.focus_z)
 
     def get_channel_clims(self, pos):
         """
-        generate contrast limits for each channel.  Grabs the middle image of the stack to compute contrast limits
-        Default clim is to ignore 1% of pixels on either end
+        generate contrast limits for each channel from the histograms accumulated during conversion.
+        Channels whose images were not all converted in this run (resumed conversions) are
+        histogrammed from the converted zarr array.  Default clim is to ignore 1% of pixels on either end
 
         Returns
         -------
@@ -372,138 +651,447 @@ class ZarrConverter:
         clims = []
 
         for chan in range(self.c):
-            img = self.get_image_array(pos, t=0, c=chan, z=self.focus_z)
-            clip = 0.01
-            low = np.percentile(img, clip * 100)
-            high = np.percentile(img, (1 - clip) * 100)
-            clims.append((low, high))
+            if self.histograms.clims(pos, chan) is None:
+                histograms = ChannelHistograms(self.histograms.n_images)
+                for t, z in itertools.product(
+                    range(self.data_shape[0]), range(self.data_shape[2])
+                ):
+                    if self._adds_to_histogram(t, z):
+                        histograms.add(
+                            pos, chan, self.arrays[pos][t, chan, z]
+                        )
+                clims.append(histograms.clims(pos, chan))
+            else:
+                clims.append(self.histograms.clims(pos, chan))
 
         return clims
 
+    def _write_clims(self):
+        """
+        writes the OME-zarr metadata of every position with the contrast limits of its channels
+        """
+
+        chan_names = self._get_channel_names()
+        with ThreadPoolExecutor(self.num_workers) as executor:
+            clims = list(executor.map(self.get_channel_clims, range(self.p)))
+        for pos, group in self.position_groups.items():
+            group.attrs.update(
+                position_channel_attributes(
+                    self.writer, chan_names, clims[pos], self.dtype
+                )
+            )
+
     def init_zarr_structure(self):
         """
         Initiates the zarr store.  Will create a zarr store with user-specified name or original name of data
         if not provided.  Store will contain a group called 'arr_0' with contains an array of original
-        data dtype of dimensions (T, C, Z, Y, X).  Appends OME-zarr metadata with clims,chan_names
+        data dtype of dimensions (T, C, Z, Y, X).  Appends OME-zarr metadata with chan_names, clims are
+        added after conversion (see get_channel_clims)
 
-        Current compressor is Blosc zstd w/ bitshuffle (~1.5x compression, faster compared to best 1.6x compressor)
+        Chunk size and compressor are set by the chunk profile. The default 'plane' profile uses Blosc zstd
+        w/ bitshuffle (~1.5x compression, faster compared to best 1.6x compressor)
 
         Returns
         -------
 
         """
 
-        chan_names = self._get_channel_names()
-        self._get_position_names()
-        for pos in range(self.p):
-
-            clims = self.get_channel_clims(pos)
-            name = self.pos_names[pos] if self.replace_position_names else None
-            self.writer.init_array(
-                pos,
-                data_shape=(
-                    self.t if self.t != 0 else 1,
-                    self.c if self.c != 0 else 1,
-                    self.z if self.z != 0 else 1,
-                    self.y,
-                    self.x,
-                ),
-                chunk_size=(1, 1, 1, self.y, self.x),
-                chan_names=chan_names,
-                clims=clims,
-                dtype=self.dtype,
-                position_name=name,
+        # position arrays of all positions are written concurrently, contrast limits are written
+        # after conversion
+        groups, arrays = init_position_arrays(
+            self.writer,
+            data_shape=self.data_shape,
+            chunk_size=self.chunk_size,
+            chan_names=self._get_channel_names(),
+            dtype=self.dtype,
+            compressor=self.compressor,
+            store=self.store,
+            num_workers=self.num_workers,
+        )
+        for pos, (group, array) in enumerate(zip(groups, arrays)):
+            self.position_groups[pos] = group
+            self.arrays[pos] = array
+            self.checksums[pos] = np.zeros(array.shape[:3], dtype=np.uint32)
+
+    def _start_journal(self):
+        """
+        opens the conversion journal.  A new conversion records the zarr structure in the journal,
+        a resumed conversion restores it from the journal.
+
+        Returns
+        -------
+        completed:      (dict) checksums of the images already written, keyed by (p, t, c, z)
+
+        """
+
+        self.journal = ConversionJournal(self.journal_file)
+
+        if not self.resume:
+            self.journal.set_state(
+                "input", os.path.abspath(self.data_directory)
+            )
+            self.journal.set_state("dim", [int(d) for d in self.dim])
+            for pos, group in self.position_groups.items():
+                self.journal.add_position(pos, group.path)
+            self.journal.commit()
+            return dict()
+
+        if self.journal.get_state("input") != os.path.abspath(
+            self.data_directory
+        ) or self.journal.get_state("dim") != [int(d) for d in self.dim]:
+            raise ValueError(
+                f"{self.journal_file} belongs to a different conversion, cannot resume"
             )
 
-    def run_conversion(self):
+        for pos, path in self.journal.positions().items():
+            self.position_groups[pos] = self.store[path]
+            self.arrays[pos] = self.position_groups[pos]["arr_0"]
+            self.checksums[pos] = np.zeros(
+                self.arrays[pos].shape[:3], dtype=np.uint32
+            )
+
+        completed = self.journal.completed()
+        for (p, t, c, z), checksum in completed.items():
+            self.checksums[p][t, c, z] = checksum
+
+        return completed
+
+    def _commit_journal(self):
         """
-        Runs the data conversion through memory mapping and performs an image check to make sure conversion did not
-        alter any data values.
+        commits the written images to the journal after writing their image-plane metadata
+        """
+
+        if self.plane_metadata:
+            self.plane_metadata.flush()
+        self.journal.commit()
+
+    def _journal_verified(self, verifications, max_pending=0):
+        """
+        records the planes of verified write units in the journal, in the order they were
+        written.  Raises the error of a failed verification, its planes and those of the units
+        after it are never journaled.
+
+        Parameters
+        ----------
+        verifications:  (deque) (verification future or None, planes) of every written unit,
+                        None for units that aren't verified
+        max_pending:    (int) number of unfinished verifications left pending, waits for the
+                        oldest verifications beyond
+
+        """
+
+        while verifications and (
+            verifications[0][0] is None
+            or verifications[0][0].done()
+            or len(verifications) > max_pending
+        ):
+            verification, planes = verifications.popleft()
+            if verification is not None:
+                verification.result()
+            self.journal.add_planes(planes)
+
+    def _reorder_coord(self, coord):
+        """
+        re-orders a coordinate from acquisition order into zarr order
+
+        Parameters
+        ----------
+        coord:          (tuple) coordinate in acquisition order
 
         Returns
         -------
+        (p, t, c, z):   (tuple) coordinate in zarr order
 
         """
 
-        # Run setup
-        print("Running Conversion...")
-        print("Setting up zarr")
-        # self._gather_index_maps()
-        self.init_zarr_structure()
-        last_file = None
+        return (
+            coord[self.p_dim],
+            coord[self.t_dim],
+            coord[self.c_dim],
+            coord[self.z_dim],
+        )
 
-        # Format bar for CLI display
-        bar_format = "Status: |{bar}|{n_fmt}/{total_fmt} (Time Remaining: {remaining}), {rate_fmt}{postfix}]"
+    def _gen_write_units(self):
+        """
+        groups the coordinates into units that each fill exactly one zarr chunk.  Units are
+        ordered by the acquisition order of their first image, coordinates within a unit by z.
 
-        # Run through every coordinate and convert image + grab image metadata, statistics
-        # loop is done in order in which the images were acquired
-        print("Converting Images...")
-        for coord in tqdm(self.coords, bar_format=bar_format):
-            if self.data_type == "ometiff":
-                # re-order coordinates into zarr format
-                coord_reorder = (
-                    coord[self.p_dim],
-                    coord[self.t_dim],
-                    coord[self.c_dim],
-                    coord[self.z_dim],
-                )
+        Returns
+        -------
+        list(list(tuples)) w/ length [N_chunks]
+
+        """
+
+        chunk_z = self.chunk_size[2]
+        units = dict()
+        for coord in self.coords:
+            p, t, c, z = self._reorder_coord(coord)
+            units.setdefault((p, t, c, z // chunk_z), []).append(coord)
+
+        return [
+            sorted(unit, key=lambda coord: coord[self.z_dim])
+            for unit in units.values()
+        ]
+
+    def _get_tiff_file(self, path):
+        """
+        returns a TiffFile opened by the calling thread, TiffFile objects are not thread-safe
+
+        Parameters
+        ----------
+        path:           (str) path to the tiff file
+
+        Returns
+        -------
+        tf:             (TiffFile Object) Opened TiffFile Object
+
+        """
+
+        local = self._thread_local
+        if self.check_file_changed(getattr(local, "file", None), path):
+            if getattr(local, "tf", None) is not None:
+                local.tf.close()
+            local.tf = tiff.TiffFile(path)
+            local.file = path
+            with self._read_lock:
+                self._open_files.append(local.tf)
+
+        return local.tf
+
+    def _read_unit(self, unit):
+        """
+        reads the images, their checksums and the image-plane metadata of one write unit.
+        Runs in the reader threads.
+
+        Parameters
+        ----------
+        unit:           (list(tuples)) coordinates in acquisition order
+
+        Returns
+        -------
+        images:         (list) image arrays of shape (Y, X)
+        checksums:      (list) CRC32 checksums of the images
+        metadata:       (list) image-plane metadata of the images, None if not available
+
+        """
 
-                # Only load tiff file if it has changed from previous run
-                current_file = self.reader.reader.coord_map[coord_reorder][0]
-                if self.check_file_changed(last_file, current_file):
-                    tf = tiff.TiffFile(current_file)
-                    last_file = current_file
+        images = []
+        checksums = []
+        metadata = []
+        for coord in unit:
+            coord_reorder = self._reorder_coord(coord)
 
-                # Get the metadata
-                page = self.reader.reader.coord_map[coord_reorder][1]
+            if self.tiff_index is not None:
+                plane_meta = self.tiff_index.get_metadata(*coord_reorder)
+                images.append(self.tiff_index.get_image(*coord_reorder))
+            elif self.data_type == "ometiff":
+                file, page = self.reader.reader.coord_map[coord_reorder][:2]
+                tf = self._get_tiff_file(file)
 
-                meta = dict()
                 plane_meta = self._generate_plane_metadata(tf, page)
-                meta[f"{coord_reorder}"] = plane_meta
-
-                json.dump(meta, self.meta_file, indent=1)
-            elif self.data_type == "pycromanager":
-                # write page metadata
-                plane_metadata = self.reader.reader.get_image_metadata(
-                    coord[self.p_dim],
-                    coord[self.t_dim],
-                    coord[self.c_dim],
-                    coord[self.z_dim],
-                )
+                images.append(tf.pages[page].asarray())
+            else:
+                with self._read_lock:
+                    if self.data_type == "pycromanager":
+                        plane_meta = self.reader.reader.get_image_metadata(
+                            *coord_reorder
+                        )
+                    else:
+                        plane_meta = None
+
+                    images.append(self.get_image_array(*coord_reorder))
+
+            checksums.append(plane_checksum(images[-1]))
+            p, t, c, z = coord_reorder
+            if self._adds_to_histogram(t, z):
+                self.histograms.add(p, c, images[-1])
+            if isinstance(plane_meta, dict):
+                plane_meta[CHECKSUM_KEY] = checksums[-1]
+            metadata.append(plane_meta)
+
+        return images, checksums, metadata
+
+    def _write_unit(self, unit, images):
+        """
+        writes the images of one write unit into its zarr chunk.  Runs in the writer threads.
 
-                json.dump(
-                    {
-                        f"FrameKey-{coord[self.p_dim]}-{coord[self.t_dim]}-"
-                        f"{coord[self.c_dim]}-{coord[self.z_dim]}": plane_metadata
-                    },
-                    self.meta_file,
-                    indent=1,
+        Parameters
+        ----------
+        unit:           (list(tuples)) coordinates in acquisition order
+        images:         (list) image arrays of shape (Y, X)
+
+        """
+
+        p, t, c, z = self._reorder_coord(unit[0])
+        self.arrays[p][t, c, z : z + len(images)] = np.stack(images)
+
+    def _verify_unit(self, unit, checksums):
+        """
+        verifies the written images of one write unit against their checksums.  Runs in the
+        verification threads.
+
+        Parameters
+        ----------
+        unit:           (list(tuples)) coordinates in acquisition order
+        checksums:      (list) CRC32 checksums of the raw images
+
+        """
+
+        for coord, checksum in zip(unit, checksums):
+            if not self._perform_image_check(checksum, coord):
+                raise ValueError(
+                    f"Converted zarr image at {self._reorder_coord(coord)} does not match the raw data. "
+                    f"Conversion Failed"
                 )
 
-            # get the memory mapped image
-            img_raw = self.get_image_array(
-                coord[self.p_dim],
-                coord[self.t_dim],
-                coord[self.c_dim],
-                coord[self.z_dim],
+    def _save_checksums(self):
+        """
+        saves the checksums of every position as a (T, C, Z) array next to the image array
+        """
+
+        for pos, checksums in self.checksums.items():
+            self.position_groups[pos].array(
+                CHECKSUM_ARRAY, checksums, overwrite=True
             )
 
-            # Write the data
-            self.writer.write(
-                img_raw,
-                coord[self.p_dim],
-                coord[self.t_dim],
-                coord[self.c_dim],
-                coord[self.z_dim],
+    def run_conversion(self):
+        """
+        Runs the data conversion and verifies the written data against checksums of the raw data
+        to make sure conversion did not alter any data values (see verify).  A pool of reader threads
+        feeds a pool of writer threads, at most 2 * num_workers chunks are read ahead and at most
+        2 * num_workers chunks wait to be written.
+
+        Returns
+        -------
+
+        """
+
+        # Run setup
+        print("Running Conversion...")
+        print("Setting up zarr")
+        # self._gather_index_maps()
+        if not self.resume:
+            self.init_zarr_structure()
+        completed = self._start_journal()
+        if self.mfile_name:
+            self.plane_metadata = PlaneMetadataWriter(
+                self.mfile_name,
+                (self.p,) + self.arrays[0].shape[:3],
+                resume=self.resume,
+            )
+        units = [
+            unit
+            for unit in self._gen_write_units()
+            if not all(
+                self._reorder_coord(coord) in completed for coord in unit
+            )
+        ]
+        if self.resume:
+            print(
+                f"Resuming conversion, {len(completed)} images already converted"
             )
 
-            # Perform image check
-            if not self._perform_image_check(img_raw, coord):
-                raise ValueError(
-                    "Converted zarr image does not match the raw data. Conversion Failed"
-                )
+        # Format bar for CLI display
+        bar_format = "Status: |{bar}|{n_fmt}/{total_fmt} (Time Remaining: {remaining}), {rate_fmt}{postfix}]"
 
-        # Put summary metadata into zarr store and cleanup
-        self.writer.store.attrs.update(self.metadata)
-        if self.meta_file:
-            self.meta_file.close()
+        # Run through every chunk and convert images + grab image metadata
+        # chunks are read in the order in which the images were acquired
+        print("Converting Images...")
+        window = 2 * self.num_workers
+        progress = tqdm(
+            total=sum(len(unit) for unit in units), bar_format=bar_format
+        )
+        units = iter(units)
+        readers = ThreadPoolExecutor(self.num_workers)
+        writers = ThreadPoolExecutor(self.num_workers)
+        verifiers = ThreadPoolExecutor(self.num_workers)
+        verifications = deque()
+        try:
+            reads = deque(
+                (unit, readers.submit(self._read_unit, unit))
+                for unit in itertools.islice(units, window)
+            )
+            writes = deque()
+            n_written = 0
+            while reads or writes:
+                if reads and len(writes) < window:
+                    unit, read = reads.popleft()
+                    images, checksums, metadata = read.result()
+                    writes.append(
+                        (
+                            unit,
+                            checksums,
+                            metadata,
+                            writers.submit(self._write_unit, unit, images),
+                        )
+                    )
+                    unit = next(units, None)
+                    if unit is not None:
+                        reads.append(
+                            (unit, readers.submit(self._read_unit, unit))
+                        )
+
+                if writes and (
+                    writes[0][3].done() or len(writes) >= window or not reads
+                ):
+                    unit, checksums, metadata, write = writes.popleft()
+                    write.result()
+
+                    # record the written chunk and its image-plane metadata
+                    planes = []
+                    for coord, checksum, plane_meta in zip(
+                        unit, checksums, metadata
+                    ):
+                        p, t, c, z = self._reorder_coord(coord)
+                        self.checksums[p][t, c, z] = checksum
+                        planes.append((p, t, c, z, checksum))
+                        if self.plane_metadata and plane_meta is not None:
+                            self.plane_metadata.append(
+                                (p, t, c, z), plane_meta
+                            )
+                    # journaled once verified, right away if not verified
+                    verifications.append(
+                        (
+                            verifiers.submit(
+                                self._verify_unit, unit, checksums
+                            )
+                            if self.verify == "full"
+                            or (
+                                self.verify == "sample"
+                                and n_written % VERIFY_SAMPLE_INTERVAL == 0
+                            )
+                            else None,
+                            planes,
+                        )
+                    )
+                    # surface failures early and bound the verification backlog
+                    self._journal_verified(verifications, 4 * window)
+                    n_written += 1
+                    if n_written % JOURNAL_COMMIT_INTERVAL == 0:
+                        self._commit_journal()
+                    progress.update(len(unit))
+
+            self._journal_verified(verifications)
+        finally:
+            self._commit_journal()
+            readers.shutdown()
+            writers.shutdown()
+            verifiers.shutdown()
+            progress.close()
+            for tf in self._open_files:
+                tf.close()
+            self._open_files = []
+            if self.tiff_index is not None:
+                self.tiff_index.close()
+
+        self._save_checksums()
+        self._write_clims()
+        self.journal.close()
+        os.remove(self.journal_file)
+        if os.path.exists(self.index_file):
+            os.remove(self.index_file)
+
+        # Put summary metadata into zarr store
+        self.store.attrs.update(self.metadata)
+        if isinstance(self.store.store, ShardedStore):
+            self.store.store.close()
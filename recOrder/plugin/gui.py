@@ -613,6 +613,12 @@ class Ui_Form(object):
         self.le_zstart = QtWidgets.QLineEdit(self.acq_settings)
         self.le_zstart.setObjectName("le_zstart")
         self.gridLayout_8.addWidget(self.le_zstart, 2, 0, 1, 1)
+        self.label_n_timepoints = QtWidgets.QLabel(self.acq_settings)
+        self.label_n_timepoints.setObjectName("label_n_timepoints")
+        self.gridLayout_8.addWidget(self.label_n_timepoints, 5, 0, 1, 1)
+        self.le_n_timepoints = QtWidgets.QLineEdit(self.acq_settings)
+        self.le_n_timepoints.setObjectName("le_n_timepoints")
+        self.gridLayout_8.addWidget(self.le_n_timepoints, 5, 1, 1, 1)
         self.gridLayout_15.addWidget(self.acq_settings, 1, 0, 1, 1)
         self.ReconSettings = QtWidgets.QGroupBox(self.scrollAreaWidgetContents_4)
         sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Preferred, QtWidgets.QSizePolicy.Fixed)
@@ -1161,7 +1167,8 @@ class Ui_Form(object):
         Form.setTabOrder(self.le_zend, self.le_zstep)
         Form.setTabOrder(self.le_zstep, self.cb_acq_mode)
         Form.setTabOrder(self.cb_acq_mode, self.cb_acq_channel)
-        Form.setTabOrder(self.cb_acq_channel, self.le_save_dir)
+        Form.setTabOrder(self.cb_acq_channel, self.le_n_timepoints)
+        Form.setTabOrder(self.le_n_timepoints, self.le_save_dir)
         Form.setTabOrder(self.le_save_dir, self.qbutton_browse_save_dir)
         Form.setTabOrder(self.qbutton_browse_save_dir, self.le_data_save_name)
         Form.setTabOrder(self.le_data_save_name, self.cb_bg_method)
@@ -1252,6 +1259,7 @@ class Ui_Form(object):
         self.label_zstep.setText(_translate("Form", "Z Step (um)"))
         self.label_zend.setText(_translate("Form", "Z End (um)"))
         self.labe_acq_channel.setText(_translate("Form", "BF Channel"))
+        self.label_n_timepoints.setText(_translate("Form", "Timepoints"))
         self.ReconSettings.setTitle(_translate("Form", "General Reconstruction Settings"))
         self.qbutton_browse_bg_path.setText(_translate("Form", "Browse"))
         self.le_n_media.setText(_translate("Form", "1.003"))
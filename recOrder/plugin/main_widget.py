@@ -21,6 +21,7 @@ from recOrder.plugin import gui
 from recOrder.io.core_functions import set_lc_state, snap_and_average
 from recOrder.io.metadata_reader import MetadataReader
 from recOrder.io.utils import ret_ori_overlay
+from recOrder.compute.reconstructor_registry import ReconstructorRegistry
 from waveorder.io.reader import WaveorderReader
 from waveorder.waveorder_reconstructor import waveorder_microscopy
 from pathlib import Path, PurePath
@@ -164,6 +165,12 @@ class MainWidget(QWidget):
         self.ui.le_zstep.setText("1")
         self.enter_zstep()
 
+        self.ui.le_n_timepoints.editingFinished.connect(
+            self.enter_n_timepoints
+        )
+        self.ui.le_n_timepoints.setText("1")
+        self.enter_n_timepoints()
+
         self.ui.chb_use_gpu.stateChanged[int].connect(self.enter_use_gpu)
         self.ui.le_gpu_id.editingFinished.connect(self.enter_gpu_id)
 
@@ -304,6 +311,7 @@ class MainWidget(QWidget):
         self.orientation_offset = False
         self.pad_z = 0
         self.phase_reconstructor = None
+        self.reconstructor_registry = ReconstructorRegistry()
         self.acq_bg_directory = None
         self.auto_shutter = True
         self.lca_dac = None
@@ -325,6 +333,30 @@ class MainWidget(QWidget):
         recorder_dir = dirname(dirname(dirname(os.path.abspath(__file__))))
         self.worker = None
 
+        # Reconstructors are memoized by their parameters, stale reconstructors
+        # are released after any reconstruction parameter was edited
+        for signal in [
+            self.ui.le_swing.editingFinished,
+            self.ui.le_wavelength.editingFinished,
+            self.ui.cb_calib_scheme.currentIndexChanged[int],
+            self.ui.le_zstart.editingFinished,
+            self.ui.le_zend.editingFinished,
+            self.ui.le_zstep.editingFinished,
+            self.ui.chb_use_gpu.stateChanged[int],
+            self.ui.le_gpu_id.editingFinished,
+            self.ui.le_recon_wavelength.editingFinished,
+            self.ui.le_obj_na.editingFinished,
+            self.ui.le_cond_na.editingFinished,
+            self.ui.le_mag.editingFinished,
+            self.ui.le_ps.editingFinished,
+            self.ui.le_n_media.editingFinished,
+            self.ui.le_pad_z.editingFinished,
+            self.ui.cb_acq_mode.currentIndexChanged[int],
+            self.ui.cb_bg_method.currentIndexChanged[int],
+            self.ui.le_bg_path.editingFinished,
+        ]:
+            signal.connect(self.reconstructor_registry.invalidate)
+
         ## Initialize calibration plot
         self.plot_item = self.ui.plot_widget.getPlotItem()
         self.plot_item.enableAutoRange()
@@ -1435,6 +1467,11 @@ class MainWidget(QWidget):
     def enter_zstep(self):
         self.z_step = float(self.ui.le_zstep.text())
 
+    @Slot()
+    def enter_n_timepoints(self):
+        self.n_timepoints = max(1, int(self.ui.le_n_timepoints.text()))
+        self.ui.le_n_timepoints.setText(str(self.n_timepoints))
+
     @Slot()
     def enter_acq_mode(self):
         state = self.ui.cb_acq_mode.currentIndex()
@@ -1485,6 +1522,8 @@ class MainWidget(QWidget):
             self.acq_bg_directory = path
             self.current_bg_path = path
             self.ui.le_bg_path.setText(path)
+            # the captured background may replace the one of a previous capture
+            self.reconstructor_registry.discard("bg_stokes")
         else:
             msg = """ 
                 Background acquisition was not successful.
@@ -2019,7 +2058,7 @@ class MainWidget(QWidget):
 
         # Init Worker and thread
         self.worker = PolarizationAcquisitionWorker(
-            self, self.calib, "birefringence"
+            self, self.calib, "birefringence", self.n_timepoints
         )
 
         # Connect Handlers
@@ -2063,7 +2102,9 @@ class MainWidget(QWidget):
         self._check_requirements_for_acq("phase")
 
         # Init worker and thread
-        self.worker = PolarizationAcquisitionWorker(self, self.calib, "all")
+        self.worker = PolarizationAcquisitionWorker(
+            self, self.calib, "all", self.n_timepoints
+        )
 
         # connect handlers
         self.worker.phase_image_emitter.connect(self.handle_phase_image_update)
@@ -2103,6 +2144,7 @@ class MainWidget(QWidget):
                 "Z Start": self.z_start,
                 "Z End": self.z_end,
                 "Z Step": self.z_step,
+                "Timepoints": self.n_timepoints,
                 "Acquisition Mode": self.acq_mode,
                 "BF Channel": self.ui.cb_acq_channel.itemText(
                     self.ui.cb_acq_channel.currentIndex()
@@ -1,3 +1,5 @@
+import sys
+import json
 import click
 import napari
 import numpy as np
@@ -6,8 +8,29 @@ import numpy as np
 # Create napari Viewer before other imports
 v = napari.Viewer()
 v.close()
-from recOrder.io.zarr_converter import ZarrConverter
+from recOrder.io.zarr_converter import (
+    ZarrConverter,
+    VERIFY_MODES,
+    CHUNK_PROFILES,
+    CLIM_MODES,
+    verify_checksums,
+)
+from recOrder.io.chunk_benchmark import benchmark_chunk_profiles
+from recOrder.io.sharded_store import SHARD_LAYOUTS
+from recOrder.compute.batch_reconstruction import (
+    PIPELINES,
+    run_reconstruction,
+)
+from recOrder.compute.reconstructor_cache import default_cache_dir
+from recOrder.compute.fft_backends import FFT_BACKENDS
+from recOrder.compute.fft_benchmark import benchmark_fft_backends
+from recOrder.compute.recon_benchmark import (
+    BENCHMARKS,
+    IMAGE_SIZES,
+    benchmark_reconstructions,
+)
 from waveorder.io import WaveorderReader
+from importlib_metadata import version
 
 
 @click.group()
@@ -135,9 +158,466 @@ def view(filename, position=None, layers=None):
     type=bool,
     help='whether or not to format the data as an HCS "well-plate"',
 )
-def convert(input, output, data_type, replace_pos_name, format_hcs):
+@click.option(
+    "--num_workers",
+    "-j",
+    default=4,
+    type=int,
+    help="number of reader and of writer threads",
+)
+@click.option(
+    "--verify",
+    default="full",
+    type=click.Choice(VERIFY_MODES),
+    help="verify every chunk (full), every 100th chunk (sample) or none against read-time checksums",
+)
+@click.option(
+    "--resume",
+    is_flag=True,
+    help="resume an interrupted conversion, skipping chunks that were already written",
+)
+@click.option(
+    "--chunk_profile",
+    default="plane",
+    type=click.Choice(CHUNK_PROFILES),
+    help="chunking and compression profile of the zarr arrays",
+)
+@click.option(
+    "--shards",
+    default=None,
+    type=click.Choice(list(SHARD_LAYOUTS)),
+    help="store the chunks of each position (position) or of each position and timepoint (time) in one file",
+)
+@click.option(
+    "--clim_mode",
+    default="focus",
+    type=click.Choice(CLIM_MODES),
+    help="compute contrast limits from the middle slice of the first timepoint (focus) or from all images (stack)",
+)
+def convert(
+    input,
+    output,
+    data_type,
+    replace_pos_name,
+    format_hcs,
+    num_workers,
+    verify,
+    resume,
+    chunk_profile,
+    shards,
+    clim_mode,
+):
     """Convert MicroManager ome-tiff to ome-zarr"""
     converter = ZarrConverter(
-        input, output, data_type, replace_pos_name, format_hcs
+        input,
+        output,
+        data_type,
+        replace_pos_name,
+        format_hcs,
+        num_workers,
+        verify,
+        resume,
+        chunk_profile,
+        shards,
+        clim_mode,
     )
     converter.run_conversion()
+
+
+@cli.command()
+@click.help_option("-h", "--help")
+@click.option(
+    "--input",
+    required=True,
+    type=click.Path(exists=True),
+    help="path to the raw ome-tiff or zarr dataset",
+)
+@click.option(
+    "--profile",
+    default=None,
+    multiple=True,
+    type=click.Choice(CHUNK_PROFILES),
+    help="profiles to benchmark. Accepts multiple profiles: --profile plane --profile zstack. Default: all profiles.",
+)
+@click.option(
+    "--position", "-p", default=0, type=int, help="position of the sample"
+)
+@click.option(
+    "--time", "-t", default=0, type=int, help="timepoint of the sample"
+)
+@click.option(
+    "--tmp_dir",
+    default=None,
+    type=click.Path(exists=True),
+    help="directory receiving the temporary zarr stores",
+)
+def benchmark_chunks(input, profile, position, time, tmp_dir):
+    """Benchmark chunking and compression profiles on a sample of a dataset"""
+    results = benchmark_chunk_profiles(
+        input, list(profile) or None, position, time, tmp_dir
+    )
+    print(
+        f"{'profile':<12}{'write':>10}{'plane':>10}{'z-stack':>10}"
+        f"{'tile':>10}{'ratio':>8}   (MB/s)"
+    )
+    for r in results:
+        print(
+            f"{r['profile']:<12}{r['write_MBps']:>10.1f}"
+            f"{r['plane_read_MBps']:>10.1f}{r['zstack_read_MBps']:>10.1f}"
+            f"{r['tile_read_MBps']:>10.1f}{r['compression_ratio']:>8.2f}"
+        )
+
+
+@cli.command()
+@click.help_option("-h", "--help")
+@click.option(
+    "--backend",
+    default=None,
+    multiple=True,
+    type=click.Choice(FFT_BACKENDS),
+    help="FFT backends to benchmark. Accepts multiple backends: --backend numpy --backend scipy. Default: all backends.",
+)
+@click.option(
+    "--workers",
+    default=None,
+    type=int,
+    help="number of FFT threads. Default: all cores",
+)
+@click.option(
+    "--precision",
+    default="float32",
+    type=click.Choice(["float32", "float64"]),
+    help="precision of the reconstruction",
+)
+def benchmark_fft(backend, workers, precision):
+    """Benchmark the FFT backends on the 3D phase reconstruction of a phantom"""
+    results = benchmark_fft_backends(list(backend) or None, workers, precision)
+    print(f"{'backend':<10}{'init':>10}{'phase3D':>10}{'speedup':>10}   (s)")
+    for r in results:
+        speedup = f"{r['speedup']:.2f}" if r["speedup"] else "-"
+        print(
+            f"{r['backend']:<10}{r['init_seconds']:>10.2f}"
+            f"{r['reconstruct_seconds']:>10.2f}{speedup:>10}"
+        )
+
+
+@cli.command()
+@click.help_option("-h", "--help")
+@click.option(
+    "--benchmark",
+    "-b",
+    default=None,
+    multiple=True,
+    type=click.Choice(BENCHMARKS),
+    help="benchmarks to run. Accepts multiple benchmarks: -b stokes -b phase3D_TV. Default: all benchmarks.",
+)
+@click.option(
+    "--size",
+    "-s",
+    default=IMAGE_SIZES,
+    multiple=True,
+    type=int,
+    help=f"(Y, X) size of the images in pixels. Accepts multiple sizes: -s 256 -s 1024. Default: {IMAGE_SIZES}",
+)
+@click.option(
+    "--precision",
+    default="float32",
+    type=click.Choice(["float32", "float64"]),
+    help="precision of the reconstructions",
+)
+@click.option(
+    "--repeats",
+    default=3,
+    type=int,
+    help="number of timed runs of every benchmark, the fastest is reported",
+)
+@click.option(
+    "--output",
+    "-o",
+    default=None,
+    type=click.Path(),
+    help="json file receiving the results and the recOrder and waveorder versions",
+)
+def benchmark_recon(benchmark, size, precision, repeats, output):
+    """Benchmark the reconstructions on phantoms of several image sizes"""
+    results = benchmark_reconstructions(
+        list(benchmark) or None, size, precision, repeats
+    )
+    print(
+        f"{'benchmark':<22}{'size':>6}{'time':>10}{'MPx/s':>10}"
+        f"{'peak RSS':>10}{'allocated':>11}   (s, MB)"
+    )
+    for r in results:
+        print(
+            f"{r['benchmark']:<22}{r['size']:>6}{r['seconds']:>10.3f}"
+            f"{r['MPx_per_s']:>10.2f}{r['peak_rss_MB']:>10.0f}"
+            f"{r['peak_allocated_MB']:>11.1f}"
+        )
+
+    if output:
+        with open(output, "w") as file:
+            json.dump(
+                {
+                    "recOrder-napari version": version("recOrder-napari"),
+                    "waveorder version": version("waveorder"),
+                    "precision": precision,
+                    "results": results,
+                },
+                file,
+                indent=1,
+            )
+
+
+@cli.command()
+@click.help_option("-h", "--help")
+@click.argument("filename")
+def verify(filename):
+    """Verify a converted zarr store against the checksums recorded during conversion"""
+    mismatches, n_checked = verify_checksums(filename)
+    for path, t, c, z in mismatches:
+        print(f"Mismatch: {path} (T, C, Z) = ({t}, {c}, {z})")
+    print(f"Verified {n_checked} images, {len(mismatches)} mismatches")
+    if mismatches:
+        sys.exit(1)
+
+
+@cli.command()
+@click.help_option("-h", "--help")
+@click.option(
+    "--input",
+    required=True,
+    type=click.Path(exists=True),
+    help="path to the raw ome-tiff or zarr dataset",
+)
+@click.option(
+    "--output",
+    required=True,
+    type=str,
+    help="full path to save the reconstruction zarr store (../../Reconstruction.zarr)",
+)
+@click.option(
+    "--pipeline",
+    required=True,
+    type=click.Choice(PIPELINES),
+    help="reconstruction pipeline",
+)
+@click.option(
+    "--position",
+    "-p",
+    default=None,
+    multiple=True,
+    type=int,
+    help="Integer positions to reconstruct. Accepts multiple positions: -p 0 -p 1 -p 10. Default: all positions.",
+)
+@click.option(
+    "--time",
+    "-t",
+    default=None,
+    multiple=True,
+    type=int,
+    help="Integer timepoints to reconstruct. Accepts multiple timepoints: -t 0 -t 1. Default: all timepoints.",
+)
+@click.option(
+    "--mode",
+    default="3D",
+    type=click.Choice(["2D", "3D"]),
+    help="phase reconstruction mode",
+)
+@click.option(
+    "--wavelength_nm",
+    required=True,
+    type=float,
+    help="wavelength of illumination in nm",
+)
+@click.option(
+    "--calibration_scheme",
+    default="4-State",
+    type=click.Choice(["4-State", "5-State"]),
+    help="calibration scheme (polarization pipelines only)",
+)
+@click.option(
+    "--swing",
+    default=None,
+    type=float,
+    help="swing used for calibration in waves (required by the polarization pipelines)",
+)
+@click.option(
+    "--bg_correction",
+    default="None",
+    type=click.Choice(["None", "global", "local_fit", "local_fit+"]),
+    help="background correction method (polarization pipelines only)",
+)
+@click.option(
+    "--bg_path",
+    default=None,
+    type=click.Path(exists=True),
+    help="path to the folder containing background images",
+)
+@click.option(
+    "--NA_obj",
+    "NA_obj",
+    default=1.3,
+    type=float,
+    help="numerical aperture of the detection objective",
+)
+@click.option(
+    "--NA_illu",
+    "NA_illu",
+    default=0.5,
+    type=float,
+    help="numerical aperture of the illumination condenser",
+)
+@click.option(
+    "--mag", default=None, type=float, help="magnification of the objective"
+)
+@click.option(
+    "--pixel_size_um",
+    default=None,
+    type=float,
+    help="pixel size of the camera in um",
+)
+@click.option(
+    "--z_step_um",
+    default=None,
+    type=float,
+    help="z step size in um. Default: read from the dataset metadata",
+)
+@click.option(
+    "--n_obj_media",
+    default=1.3,
+    type=float,
+    help="refractive index of the objective immersion media",
+)
+@click.option(
+    "--pad_z",
+    default=0,
+    type=int,
+    help="slices to pad for phase reconstruction",
+)
+@click.option(
+    "--bf_channel",
+    default=0,
+    type=int,
+    help="index of the brightfield channel (PhaseFromBF only)",
+)
+@click.option(
+    "--regularizer",
+    default="Tikhonov",
+    type=click.Choice(["Tikhonov", "TV"]),
+    help="phase regularization method",
+)
+@click.option(
+    "--strength", default=1e-4, type=float, help="regularization strength"
+)
+@click.option("--rho", default=1.0, type=float, help="TV rho parameter")
+@click.option("--itr", default=50, type=int, help="TV iterations")
+@click.option(
+    "--cache_dir",
+    default=None,
+    type=str,
+    help="reconstructor cache directory. Default: ~/.cache/recOrder/reconstructors",
+)
+@click.option(
+    "--precision",
+    default="float32",
+    type=click.Choice(["float32", "float64"]),
+    help="precision of the transfer functions and of the computation",
+)
+@click.option(
+    "--fft_backend",
+    default="numpy",
+    type=click.Choice(FFT_BACKENDS),
+    help="FFT backend of the phase and fluorescence reconstructions (pyfftw requires pyFFTW)",
+)
+@click.option(
+    "--fft_workers",
+    default=None,
+    type=int,
+    help="number of FFT threads of the scipy and pyfftw backends. Default: all cores",
+)
+@click.option(
+    "--num_processes",
+    "-j",
+    default=1,
+    type=int,
+    help="number of worker processes reconstructing positions/timepoints in parallel",
+)
+@click.option(
+    "--shards",
+    default=None,
+    type=click.Choice(list(SHARD_LAYOUTS)),
+    help="store the chunks of each position (position) or of each position and timepoint (time) in one file",
+)
+def reconstruct(
+    input,
+    output,
+    pipeline,
+    position,
+    time,
+    mode,
+    wavelength_nm,
+    calibration_scheme,
+    swing,
+    bg_correction,
+    bg_path,
+    NA_obj,
+    NA_illu,
+    mag,
+    pixel_size_um,
+    z_step_um,
+    n_obj_media,
+    pad_z,
+    bf_channel,
+    regularizer,
+    strength,
+    rho,
+    itr,
+    cache_dir,
+    precision,
+    fft_backend,
+    fft_workers,
+    num_processes,
+    shards,
+):
+    """Reconstruct a dataset position by position into an ome-zarr store"""
+    if pipeline != "PhaseFromBF" and swing is None:
+        raise click.UsageError(
+            f"--swing is required by the {pipeline} pipeline"
+        )
+
+    reconstructor_args = {
+        "wavelength_nm": wavelength_nm,
+        "NA_obj": NA_obj,
+        "NA_illu": NA_illu,
+        "mag": mag,
+        "z_step_um": z_step_um,
+        "pad_z": pad_z,
+        "pixel_size_um": pixel_size_um,
+        "bg_correction": bg_correction,
+        "n_obj_media": n_obj_media,
+        "mode": mode,
+        "cache_dir": cache_dir if cache_dir else default_cache_dir(),
+        "precision": precision,
+        "fft_backend": fft_backend,
+        "fft_workers": fft_workers,
+    }
+    if pipeline != "PhaseFromBF":
+        reconstructor_args["swing"] = swing
+        reconstructor_args["calibration_scheme"] = calibration_scheme
+
+    run_reconstruction(
+        input,
+        output,
+        pipeline,
+        reconstructor_args,
+        positions=position,
+        timepoints=time,
+        bg_path=bg_path,
+        bf_channel=bf_channel,
+        regularizer=regularizer,
+        strength=strength,
+        rho=rho,
+        itr=itr,
+        num_processes=num_processes,
+        shards=shards,
+    )
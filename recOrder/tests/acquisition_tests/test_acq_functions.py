@@ -0,0 +1,109 @@
+from types import SimpleNamespace
+import numpy as np
+import pytest
+from recOrder.acq.acq_functions import acquire_to_buffer
+
+settings = {
+    "useFrames": True,
+    "numFrames": 2,
+    "useChannels": True,
+    "channels": [{}, {}, {}],
+    "useSlices": True,
+    "slices": [0.0, 1.0],
+}
+
+
+class FakeCoordsBuilder:
+    def __init__(self):
+        self.coords = dict()
+
+    def __getattr__(self, axis):
+        def set_axis(index):
+            self.coords[axis] = index
+            return self
+
+        return set_axis
+
+    def build(self):
+        return tuple(self.coords[axis] for axis in "tcz")
+
+
+class FakeImage:
+    def __init__(self, pixels, bytes_per_pixel):
+        self.pixels = pixels
+        self.bytes_per_pixel = bytes_per_pixel
+
+    def getRawPixels(self):
+        return self.pixels.ravel().tolist()
+
+    def getHeight(self):
+        return self.pixels.shape[0]
+
+    def getWidth(self):
+        return self.pixels.shape[1]
+
+    def getBytesPerPixel(self):
+        return self.bytes_per_pixel
+
+
+class FakeDatastore:
+    def __init__(self, data, bytes_per_pixel, missing=()):
+        # (T, C, Z, Y, X) images, the missing (t, c, z) weren't acquired
+        self.images = {
+            coords: FakeImage(data[coords], bytes_per_pixel)
+            for coords in np.ndindex(*data.shape[:3])
+            if coords not in missing
+        }
+
+    def getImage(self, coords):
+        return self.images.get(coords)
+
+    def getAnyImage(self):
+        return next(iter(self.images.values()), None)
+
+
+def fake_mm(datastore):
+    acquisition_settings = SimpleNamespace(
+        fromJSONStream=lambda json_settings: acquisition_settings
+    )
+    manager = SimpleNamespace(
+        getAcquisitionSettings=lambda: acquisition_settings,
+        setAcquisitionSettings=lambda settings: None,
+        runAcquisitionWithSettings=lambda settings, block: datastore,
+    )
+
+    return SimpleNamespace(
+        getAcquisitionManager=lambda: manager,
+        data=lambda: SimpleNamespace(createCoordsBuilder=FakeCoordsBuilder),
+    )
+
+
+@pytest.mark.parametrize(
+    "dtype,bytes_per_pixel", [(np.uint8, 1), (np.uint16, 2)]
+)
+def test_acquire_to_buffer(dtype, bytes_per_pixel):
+    data = np.random.randint(0, 200, (2, 3, 2, 8, 6)).astype(dtype)
+    mm = fake_mm(FakeDatastore(data, bytes_per_pixel))
+
+    with acquire_to_buffer(mm, settings) as buffer:
+        assert buffer.complete
+        assert buffer.array.dtype == dtype
+        assert np.array_equal(buffer.array, data)
+
+
+def test_acquire_to_buffer_errors():
+    data = np.random.randint(0, 1000, (2, 3, 2, 8, 6)).astype(np.uint16)
+
+    # an image is missing from the datastore
+    mm = fake_mm(FakeDatastore(data, 2, missing=[(1, 2, 0)]))
+    with pytest.raises(RuntimeError, match="11 of 12 images"):
+        acquire_to_buffer(mm, settings)
+
+    mm = fake_mm(FakeDatastore(data, 2, missing=list(np.ndindex(2, 3, 2))))
+    with pytest.raises(RuntimeError):
+        acquire_to_buffer(mm, settings)
+
+    # RGB images
+    mm = fake_mm(FakeDatastore(data, 4))
+    with pytest.raises(ValueError):
+        acquire_to_buffer(mm, settings)
@@ -0,0 +1,114 @@
+import os
+import pytest
+import numpy as np
+from tifffile import TiffFile
+from waveorder.io import WaveorderReader
+from recOrder.acq.image_sources import (
+    RingBuffer,
+    FakeImageSource,
+    StackAssembler,
+    TiffTailSource,
+    AcquisitionBuffer,
+    source_frames,
+)
+
+
+def _drain(buffer):
+    frames = []
+    while not buffer.exhausted:
+        frame = buffer.get(timeout=1)
+        if frame is not None:
+            frames.append(frame._replace(image=frame.image.copy()))
+    return frames
+
+
+def test_ring_buffer():
+
+    buffer = RingBuffer(capacity=2)
+    assert buffer.put(0, 0, 0, 0, np.zeros((4, 4)))
+    assert buffer.put(0, 0, 1, 0, np.ones((4, 4)))
+    # full, the put times out
+    assert not buffer.put(0, 0, 2, 0, np.ones((4, 4)), timeout=0.01)
+
+    frame = buffer.get()
+    assert (frame.p, frame.t, frame.c, frame.z) == (0, 0, 0, 0)
+    assert np.all(frame.image == 0)
+    # the slot of the frame is held until the next get
+    assert not buffer.put(0, 0, 2, 0, np.ones((4, 4)), timeout=0.01)
+
+    buffer.close()
+    assert buffer.get().c == 1
+    assert buffer.get() is None
+    assert buffer.exhausted
+
+
+@pytest.mark.parametrize("acq_order", [0, 1, 2, 3])
+def test_fake_source_stacks(acq_order):
+
+    data = np.random.randint(0, 1000, (2, 2, 4, 3, 8, 8)).astype(np.uint16)
+    source = FakeImageSource(data, acq_order)
+    buffer = RingBuffer(capacity=3)
+    source.start(buffer)
+    frames = _drain(buffer)
+    source.stop()
+    assert len(frames) == data[..., 0, 0].size
+
+    channel_first = acq_order in (0, 2)
+    assembler = StackAssembler(4, 3, channel_first)
+    stacks = []
+    for frame in frames:
+        stacks.extend(assembler.add(frame))
+
+    assert len(stacks) == (2 * 2 * 3 if channel_first else 2 * 2)
+    for p, t, z, array in stacks:
+        expected = data[p, t, :, z] if channel_first else data[p, t]
+        assert np.array_equal(array, expected)
+        assert array.dtype == np.uint16
+
+
+def test_tiff_tail_source(get_ometiff_data_dir):
+
+    folder, ometiff_data = get_ometiff_data_dir
+    reader = WaveorderReader(ometiff_data, extract_data=False)
+    file = reader.reader.coord_map[(0, 0, 0, 0)][0]
+    n_images = sum(1 for coord in reader.reader.coord_map if coord[0] == 0)
+
+    # the images of position 0 are in one file, read it as a live acquisition
+    data_dir, name = os.path.split(file)
+    source = TiffTailSource(data_dir, name, n_images)
+    source.file_path = lambda file_count: file
+    buffer = RingBuffer()
+    source.start(buffer)
+    frames = _drain(buffer)
+    source.stop()
+
+    assert source.error is None
+    assert len(frames) == n_images
+    with TiffFile(file) as tf:
+        for p, t, c, z, image in frames:
+            page = reader.reader.coord_map[(p, t, c, z)][1]
+            assert np.array_equal(image, tf.pages[page].asarray())
+
+
+@pytest.mark.parametrize("file_backed", [False, True])
+def test_acquisition_buffer(tmp_path, file_backed):
+
+    data = np.random.randint(0, 1000, (1, 2, 4, 3, 8, 8)).astype(np.uint16)
+    source = FakeImageSource(data, acq_order=0)
+
+    with AcquisitionBuffer(
+        data.shape[1:],
+        max_ram_bytes=0 if file_backed else None,
+        file_dir=str(tmp_path),
+    ) as buffer:
+        assert buffer.file_backed == file_backed
+        assert buffer.fill(source_frames(source, capacity=2))
+        stack = buffer.array
+
+    # the array outlives the buffer
+    assert np.array_equal(stack, data[0])
+
+    with AcquisitionBuffer(data.shape[1:]) as buffer:
+        buffer.add(0, 0, 0, data[0, 0, 0, 0])
+        assert buffer.n_received == 1
+        assert not buffer.complete
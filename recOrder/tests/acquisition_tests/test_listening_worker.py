@@ -0,0 +1,117 @@
+import os
+from types import SimpleNamespace
+import numpy as np
+import pytest
+from recOrder.acq.acquisition_workers import ListeningWorker
+from recOrder.acq.image_sources import FakeImageSource
+from recOrder.compute.reconstructions import (
+    initialize_reconstructor,
+    reconstruct_phase2D,
+    QLIPPBirefringenceCompute,
+)
+
+reconstructor_args = {
+    "wavelength_nm": 532,
+    "mag": 20,
+    "pixel_size_um": 6.5,
+    "z_step_um": 2,
+    "NA_obj": 0.4,
+    "NA_illu": 0.2,
+    "n_obj_media": 1.0,
+}
+
+
+def fake_calib_window(root, prefix, data, acq_order):
+    # Micro-Manager's acquisition settings of a (P, T, C, Z, Y, X) dataset
+    P, T, C, Z = data.shape[:4]
+    settings = SimpleNamespace(
+        root=lambda: root,
+        prefix=lambda: prefix,
+        useFrames=lambda: True,
+        numFrames=lambda: T,
+        intervalMs=lambda: 0,
+        useChannels=lambda: True,
+        channels=lambda: SimpleNamespace(size=lambda: C),
+        slices=lambda: SimpleNamespace(size=lambda: Z),
+        usePositionList=lambda: True,
+        acqOrderMode=lambda: acq_order,
+    )
+    acquisitions = SimpleNamespace(
+        isAcquisitionRunning=lambda: True,
+        getAcquisitionSettings=lambda: settings,
+    )
+    position_list = SimpleNamespace(getNumberOfPositions=lambda: P)
+    mm = SimpleNamespace(
+        acquisitions=lambda: acquisitions,
+        getPositionListManager=lambda: SimpleNamespace(
+            getPositionList=lambda: position_list
+        ),
+    )
+    ui = SimpleNamespace(
+        le_phase_strength=SimpleNamespace(text=lambda: "1e-2"),
+        le_rho=SimpleNamespace(text=lambda: "1"),
+        le_itr=SimpleNamespace(text=lambda: "50"),
+    )
+
+    return SimpleNamespace(
+        mm=mm,
+        ui=ui,
+        calib_scheme="5-State",
+        wavelength=532,
+        swing=0.1,
+        bg_option="None",
+        phase_regularizer="Tikhonov",
+    )
+
+
+@pytest.mark.parametrize("acq_order", [0, 1])
+def test_listening_worker(setup_data_save_folder, acq_order):
+    P, T, C, Z, Y, X = 2, 2, 5, 3, 16, 16
+    rng = np.random.default_rng(0)
+    data = rng.integers(1000, 2000, (P, T, C, Z, Y, X)).astype(np.uint16)
+
+    # the worker reconstructs the last dataset of the acquisition's prefix
+    os.makedirs(os.path.join(setup_data_save_folder, "Live_1"))
+    calib_window = fake_calib_window(
+        setup_data_save_folder, "Live", data, acq_order
+    )
+    phase_reconstructor = initialize_reconstructor(
+        "PhaseFromBF",
+        image_dim=(Y, X),
+        n_slices=Z,
+        mode="2D",
+        **reconstructor_args,
+    )
+    worker = ListeningWorker(
+        calib_window,
+        None,
+        source=FakeImageSource(data, acq_order),
+        phase_reconstructor=phase_reconstructor,
+    )
+    written = []
+    worker.dim_emitter.connect(written.append)
+    worker.work()
+
+    assert worker.prefix == "Live_1"
+    assert written[-1] == (P - 1, T - 1, Z - 1)
+    birefringence = worker.store["Birefringence"]
+    phase = worker.store["Phase2D"]
+    assert birefringence.shape == (P, T, 2, Z, Y, X)
+    assert phase.shape == (P, T, 1, 1, Y, X)
+
+    # matches the reconstruction of the complete stacks
+    reconstructor = QLIPPBirefringenceCompute(
+        (Y, X), "5-State", 532, 0.1, Z, "None"
+    )
+    for p, t in np.ndindex(P, T):
+        stokes = reconstructor.reconstruct_stokes(data[p, t])
+        assert np.allclose(
+            birefringence[p, t],
+            reconstructor.reconstruct_birefringence(stokes),
+            atol=1e-5,
+        )
+        assert np.allclose(
+            phase[p, t, 0, 0],
+            reconstruct_phase2D(stokes[0], phase_reconstructor, reg_p=1e-2),
+            atol=1e-5,
+        )
@@ -0,0 +1,91 @@
+import time
+import zarr
+import pytest
+import numpy as np
+from recOrder.acq.pipeline import AsyncPipeline, WriteBehindArray
+
+
+def test_async_pipeline_order():
+    consumed = []
+
+    def consume(item):
+        time.sleep(0.01)
+        consumed.append(item)
+
+    pipeline = AsyncPipeline(consume, max_pending=2)
+    for i in range(10):
+        pipeline.put(i)
+    pipeline.close()
+
+    assert consumed == list(range(10))
+
+
+def test_async_pipeline_error():
+    consumed = []
+
+    def consume(item):
+        if item == 2:
+            raise ValueError("consumer failed")
+        consumed.append(item)
+
+    pipeline = AsyncPipeline(consume)
+    with pytest.raises(ValueError):
+        for i in range(10):
+            pipeline.put(i)
+        pipeline.close()
+
+    assert consumed == [0, 1]
+
+
+@pytest.mark.parametrize("block_shape", [None, (1, 1, 2, 3, 8, 8)])
+def test_write_behind_array(block_shape):
+
+    data = np.random.rand(2, 2, 2, 3, 8, 8).astype(np.float32)
+    array = zarr.zeros(data.shape, chunks=(1, 1, 1, 1, 8, 8), dtype="f4")
+    writer = WriteBehindArray(array, block_shape)
+
+    # slices of the first volume, then the remaining volumes in one write
+    for z in range(3):
+        writer[0, 0, :, z] = data[0, 0, :, z]
+    writer[0, 1] = data[0, 1]
+    writer[1] = data[1]
+    writer.close()
+
+    assert np.array_equal(array[:], data)
+
+
+def test_write_behind_array_flush_incomplete():
+
+    array = zarr.zeros((2, 4, 4), chunks=(1, 4, 4), dtype="u2")
+    writer = WriteBehindArray(array, (2, 4, 4))
+    writer[0] = 1
+    writer.close()
+
+    assert np.all(array[0] == 1)
+    assert np.all(array[1] == 0)
+
+
+def test_write_behind_array_on_write():
+
+    array = zarr.zeros((2, 3, 4, 4), chunks=(1, 1, 4, 4), dtype="u2")
+    written = []
+
+    def on_write(region):
+        # the block is in the array when the callback runs
+        assert np.all(array[region] == region[0].start + 1)
+        written.append((region[0].start, region[1].start))
+
+    writer = WriteBehindArray(array, (1, 1, 4, 4), on_write=on_write)
+    for p in range(2):
+        for z in range(3):
+            writer[p, z] = p + 1
+    writer.close()
+
+    assert written == [(p, z) for p in range(2) for z in range(3)]
+
+
+def test_write_behind_array_unaligned():
+
+    array = zarr.zeros((4, 8, 8), chunks=(2, 8, 8))
+    with pytest.raises(ValueError):
+        WriteBehindArray(array, (3, 8, 8))
@@ -0,0 +1,137 @@
+import os
+import shutil
+import numpy as np
+import pytest
+import zarr
+from waveorder.io.writer import WaveorderWriter
+from recOrder.compute.phantoms import (
+    pol_3D_from_phantom,
+    bf_3D_from_phantom,
+)
+from recOrder.compute.recon_benchmark import resize_phantom
+from recOrder.compute.batch_reconstruction import (
+    ReconstructionPipeline,
+    run_reconstruction,
+)
+from recOrder.io.utils import default_hcs_metadata, init_position_arrays
+
+reconstructor_args = {
+    "mag": 20,
+    "pixel_size_um": 6.5,
+    "z_step_um": 2,
+    "wavelength_nm": 532,
+    "NA_obj": 0.4,
+    "NA_illu": 0.2,
+    "n_obj_media": 1.0,
+    "pad_z": 5,
+    "swing": 0.1,
+    "calibration_scheme": "5-State",
+    "mode": "2D",
+}
+
+
+def write_dataset(save_dir, data):
+    # 2 positions and 2 timepoints of the scaled (C, Z, Y, X) data
+    C, Z, Y, X = data.shape
+    if os.path.exists(save_dir):
+        shutil.rmtree(save_dir)
+    os.makedirs(save_dir)
+    writer = WaveorderWriter(
+        save_dir,
+        hcs=True,
+        hcs_meta=default_hcs_metadata(["Pos_000", "Pos_001"], "Phantom"),
+    )
+    writer.create_zarr_root("Phantom.zarr")
+    _, arrays = init_position_arrays(
+        writer,
+        data_shape=(2, C, Z, Y, X),
+        chunk_size=(1, 1, 1, Y, X),
+        chan_names=[f"State{i}" for i in range(C)],
+        dtype="float32",
+    )
+    stacks = dict()
+    for p, array in enumerate(arrays):
+        for t in range(2):
+            stacks[(p, t)] = (data * (1 + 0.1 * p + 0.05 * t)).astype(
+                np.float32
+            )
+            array[t] = stacks[(p, t)]
+
+    return os.path.join(save_dir, "Phantom.zarr"), stacks
+
+
+@pytest.fixture
+def pol_dataset(setup_data_save_folder):
+    data, _ = pol_3D_from_phantom()
+    return write_dataset(
+        os.path.join(setup_data_save_folder, "batch"),
+        resize_phantom(data, 128),
+    )
+
+
+@pytest.fixture
+def bf_dataset(setup_data_save_folder):
+    data = bf_3D_from_phantom()
+    return write_dataset(
+        os.path.join(setup_data_save_folder, "batch_bf"),
+        resize_phantom(data, 128)[np.newaxis],
+    )
+
+
+@pytest.mark.parametrize("num_processes", [1, 2])
+def test_run_reconstruction(
+    pol_dataset, setup_data_save_folder, num_processes
+):
+    input_path, stacks = pol_dataset
+    C, Z, Y, X = stacks[(0, 0)].shape
+    output_path = os.path.join(
+        setup_data_save_folder, f"Reconstruction_{num_processes}.zarr"
+    )
+    if os.path.exists(output_path):
+        shutil.rmtree(output_path)
+
+    run_reconstruction(
+        input_path,
+        output_path,
+        "QLIPP",
+        reconstructor_args,
+        strength=1e-2,
+        num_processes=num_processes,
+    )
+
+    # matches the sequential reconstruction of every position and timepoint
+    pipeline = ReconstructionPipeline(
+        "QLIPP", (Y, X), Z, reconstructor_args, strength=1e-2
+    )
+    output = zarr.open(output_path, "r")
+    for (p, t), stack in stacks.items():
+        result = output["Row_0"][f"Col_{p}"][f"Pos_{p:03d}"]["arr_0"][t]
+        assert result.shape == (5, 1, Y, X)
+        assert np.allclose(result, pipeline.reconstruct(stack), atol=1e-6)
+
+
+def test_run_reconstruction_phase_from_bf(bf_dataset, setup_data_save_folder):
+    input_path, stacks = bf_dataset
+    C, Z, Y, X = stacks[(0, 0)].shape
+    output_path = os.path.join(
+        setup_data_save_folder, "Reconstruction_bf.zarr"
+    )
+    if os.path.exists(output_path):
+        shutil.rmtree(output_path)
+
+    # the polarization arguments of the CLI defaults are ignored
+    bf_args = dict(
+        reconstructor_args, calibration_scheme="4-State", swing=None
+    )
+    run_reconstruction(
+        input_path, output_path, "PhaseFromBF", bf_args, strength=1e-2
+    )
+
+    pipeline = ReconstructionPipeline(
+        "PhaseFromBF", (Y, X), Z, bf_args, strength=1e-2
+    )
+    output = zarr.open(output_path, "r")
+    for (p, t), stack in stacks.items():
+        result = output["Row_0"][f"Col_{p}"][f"Pos_{p:03d}"]["arr_0"][t]
+        assert result.shape == (1, 1, Y, X)
+        assert np.allclose(result, pipeline.reconstruct(stack), atol=1e-6)
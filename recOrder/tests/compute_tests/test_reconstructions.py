@@ -0,0 +1,335 @@
+import os
+import threading
+import numpy as np
+import pytest
+import tifffile as tiff
+from recOrder.compute.phantoms import (
+    pol_3D_from_phantom,
+    bf_3D_from_phantom,
+    fluorescence_from_phantom,
+)
+from recOrder.io.utils import load_bg_stokes, read_bg_stokes
+from recOrder.compute.reconstructions import (
+    initialize_reconstructor,
+    reconstruct_qlipp_stokes,
+    reconstruct_qlipp_birefringence,
+    reconstruct_qlipp_stokes_batch,
+    reconstruct_qlipp_birefringence_batch,
+    reconstruct_phase2D,
+    reconstruct_phase3D,
+    reconstruct_density_from_fluorescence,
+    StreamingPhase2D,
+)
+import waveorder.util
+from recOrder.compute.fft_backends import use_fft_backend
+from recOrder.compute.recon_benchmark import (
+    benchmark_reconstruction,
+    resize_phantom,
+)
+
+RTOL = 1e-3
+
+reconstructor_args = {
+    "mag": 20,
+    "pixel_size_um": 6.5,
+    "z_step_um": 2,
+    "wavelength_nm": 532,
+    "NA_obj": 0.4,
+    "NA_illu": 0.2,
+    "n_obj_media": 1.0,
+    "pad_z": 5,
+}
+
+
+def relative_error(result, reference):
+    return np.linalg.norm(result - reference) / np.linalg.norm(reference)
+
+
+def initialize_pair(pipeline, image_dim, n_slices, **kwargs):
+    return [
+        initialize_reconstructor(
+            pipeline,
+            image_dim=image_dim,
+            n_slices=n_slices,
+            precision=precision,
+            **reconstructor_args,
+            **kwargs,
+        )
+        for precision in ["float64", "float32"]
+    ]
+
+
+def test_float32_transfer_functions():
+    data = bf_3D_from_phantom()
+    Z, Y, X = data.shape
+    recon64, recon32 = initialize_pair("PhaseFromBF", (Y, X), Z, mode="3D")
+
+    assert recon64.precision == "float64"
+    assert recon32.precision == "float32"
+    for name, value in recon64.__dict__.items():
+        if isinstance(value, np.ndarray) and value.dtype == np.complex128:
+            assert getattr(recon32, name).dtype == np.complex64
+
+    with pytest.raises(ValueError):
+        initialize_reconstructor(
+            "PhaseFromBF",
+            image_dim=(Y, X),
+            n_slices=Z,
+            precision="float16",
+            **reconstructor_args,
+        )
+
+
+def test_birefringence_float32_accuracy():
+    data, bg_data = pol_3D_from_phantom()
+    C, Z, Y, X = data.shape
+    # the phantom background is unpolarized, its orientation is undefined and
+    # differs between precisions.  A slightly polarized background is used.
+    bg_data = bg_data * (1 + 0.02 * np.array([0, 1, -1, 0.5, -0.5]))[
+        :, np.newaxis, np.newaxis
+    ]
+    recon64, recon32 = initialize_pair(
+        "birefringence",
+        (Y, X),
+        Z,
+        swing=0.1,
+        calibration_scheme="5-State",
+        bg_correction="global",
+    )
+
+    results = []
+    for recon, precision in [(recon64, "float64"), (recon32, "float32")]:
+        bg_stokes = reconstruct_qlipp_stokes(
+            bg_data, recon, precision=precision
+        )
+        stokes = reconstruct_qlipp_stokes(
+            data, recon, bg_stokes, precision=precision
+        )
+        birefringence = reconstruct_qlipp_birefringence(
+            stokes, recon, precision=precision
+        )
+        for array in [bg_stokes, stokes, birefringence]:
+            assert array.dtype == precision
+        results.append(birefringence)
+
+    # orientation wraps around at 0 and pi, compare the other channels
+    for channel in [0, 2, 3]:
+        assert (
+            relative_error(results[1][channel], results[0][channel]) < RTOL
+        )
+
+    # without a precision, reconstructions work in the reconstructor's
+    for recon, precision in [(recon64, "float64"), (recon32, "float32")]:
+        assert np.array_equal(
+            reconstruct_qlipp_stokes(data, recon),
+            reconstruct_qlipp_stokes(data, recon, precision=precision),
+        )
+
+
+@pytest.mark.parametrize("mode", ["2D", "3D"])
+def test_phase_float32_accuracy(mode):
+    data = bf_3D_from_phantom()
+    Z, Y, X = data.shape
+    recon64, recon32 = initialize_pair("PhaseFromBF", (Y, X), Z, mode=mode)
+
+    if mode == "2D":
+        phase64 = reconstruct_phase2D(
+            data, recon64, reg_p=1e-2, precision="float64"
+        )
+        phase32 = reconstruct_phase2D(
+            data, recon32, reg_p=1e-2, precision="float32"
+        )
+    else:
+        phase64 = reconstruct_phase3D(
+            data, recon64, reg_re=1e-2, precision="float64"
+        )
+        phase32 = reconstruct_phase3D(
+            data, recon32, reg_re=1e-2, precision="float32"
+        )
+
+    assert phase64.dtype == np.float64
+    assert phase32.dtype == np.float32
+    assert relative_error(phase32, phase64) < RTOL
+
+
+@pytest.mark.parametrize("method", ["Tikhonov", "TV"])
+def test_streaming_phase2D(method):
+    data = bf_3D_from_phantom()
+    Z, Y, X = data.shape
+    recon = initialize_reconstructor(
+        "PhaseFromBF",
+        image_dim=(Y, X),
+        n_slices=Z,
+        mode="2D",
+        **reconstructor_args,
+    )
+    phase = reconstruct_phase2D(data, recon, method=method, reg_p=1e-2, itr=5)
+
+    streaming = StreamingPhase2D(recon, method=method, reg_p=1e-2, itr=5)
+    order = np.random.default_rng(0).permutation(Z)
+    results = [streaming.add(z, data[z], key=(0, 0)) for z in order]
+
+    assert all(result is None for result in results[:-1])
+    assert relative_error(results[-1], phase) < RTOL
+    with pytest.raises(IndexError):
+        streaming.add(Z, data[0])
+
+
+def numpy_fftn(backends):
+    with use_fft_backend("numpy"):
+        backends.append(waveorder.util.fftn)
+
+
+def test_scipy_fft_backend():
+    data = bf_3D_from_phantom()
+    Z, Y, X = data.shape
+    recon_numpy, recon_scipy = [
+        initialize_reconstructor(
+            "PhaseFromBF",
+            image_dim=(Y, X),
+            n_slices=Z,
+            mode="3D",
+            fft_backend=backend,
+            fft_workers=2,
+            **reconstructor_args,
+        )
+        for backend in ["numpy", "scipy"]
+    ]
+    assert recon_scipy.fft_backend == "scipy"
+
+    phase_numpy = reconstruct_phase3D(data, recon_numpy, reg_re=1e-2)
+    phase_scipy = reconstruct_phase3D(data, recon_scipy, reg_re=1e-2)
+    assert relative_error(phase_scipy, phase_numpy) < RTOL
+
+    # waveorder's FFTs are restored after the reconstruction
+    assert waveorder.util.fftn is np.fft.fftn
+    with use_fft_backend("scipy"):
+        assert waveorder.util.fftn is not np.fft.fftn
+        with use_fft_backend("numpy"):
+            assert waveorder.util.fftn is np.fft.fftn
+        assert waveorder.util.fftn is not np.fft.fftn
+    assert waveorder.util.fftn is np.fft.fftn
+
+    # a numpy reconstruction waits for another thread's backend to be restored
+    backends = []
+    with use_fft_backend("scipy"):
+        thread = threading.Thread(target=numpy_fftn, args=(backends,))
+        thread.start()
+        thread.join(timeout=0.5)
+        assert thread.is_alive()
+    thread.join()
+    assert backends == [np.fft.fftn]
+
+    with pytest.raises(ValueError):
+        initialize_reconstructor(
+            "PhaseFromBF",
+            image_dim=(Y, X),
+            n_slices=Z,
+            fft_backend="cufft",
+            **reconstructor_args,
+        )
+
+
+def test_resize_phantom():
+    data = np.random.random((3, 40, 50))
+    cropped = resize_phantom(data, 32)
+    assert np.array_equal(cropped, data[:, 4:36, 9:41])
+    tiled = resize_phantom(data, 100)
+    assert tiled.shape == (3, 100, 100)
+    assert np.array_equal(tiled[:, :40, :50], data)
+    assert np.array_equal(tiled[:, 40:80, 50:], data)
+
+
+def test_recon_benchmark():
+    data = np.random.random((5, 32, 32))
+    result = benchmark_reconstruction("phase2D_Tikhonov", data, repeats=1)
+
+    assert (result["benchmark"], result["size"]) == ("phase2D_Tikhonov", 32)
+    assert result["seconds"] > 0
+    assert result["peak_rss_MB"] > 0
+    assert result["peak_allocated_MB"] > 0
+
+
+def test_fluorescence_float32_accuracy():
+    data = fluorescence_from_phantom()
+    Z, Y, X = data.shape
+    recon64, recon32 = initialize_pair("fluorescence", (Y, X), Z, mode="3D")
+
+    density64 = reconstruct_density_from_fluorescence(
+        data, recon64, reg=1e-2, precision="float64"
+    )
+    density32 = reconstruct_density_from_fluorescence(
+        data, recon32, reg=1e-2, precision="float32"
+    )
+
+    assert density64.dtype == np.float64
+    assert density32.dtype == np.float32
+    assert relative_error(density32, density64) < RTOL
+
+
+@pytest.mark.parametrize(
+    "bg_correction", ["None", "global", "local", "local_fit"]
+)
+def test_stokes_batch(bg_correction):
+    data, bg_data = pol_3D_from_phantom()
+    C, Z, Y, X = data.shape
+    recon = initialize_reconstructor(
+        "birefringence",
+        image_dim=(Y, X),
+        n_slices=Z,
+        swing=0.1,
+        calibration_scheme="5-State",
+        bg_correction=bg_correction,
+        **reconstructor_args,
+    )
+    bg_stokes = reconstruct_qlipp_stokes(bg_data, recon)
+    batch = np.stack([data, 0.5 * data])
+
+    stokes = reconstruct_qlipp_stokes_batch(batch, recon, bg_stokes)
+    birefringence = reconstruct_qlipp_birefringence_batch(stokes, recon)
+
+    assert stokes.shape == (2, 5, Z, Y, X)
+    assert birefringence.shape == (2, 4, Z, Y, X)
+    for i in range(2):
+        expected = reconstruct_qlipp_stokes(batch[i], recon, bg_stokes)
+        assert np.allclose(stokes[i], expected, rtol=1e-4, atol=1e-6)
+        # orientation wraps around at 0 and pi, compare the other channels
+        channels = [0, 2, 3]
+        assert np.allclose(
+            birefringence[i, channels],
+            reconstruct_qlipp_birefringence(expected, recon)[channels],
+            rtol=1e-4,
+            atol=1e-6,
+        )
+
+
+def test_bg_stokes_cache(setup_data_save_folder):
+    data, bg_data = pol_3D_from_phantom()
+    C, Z, Y, X = data.shape
+    bg_path = os.path.join(setup_data_save_folder, "BG")
+    os.makedirs(bg_path, exist_ok=True)
+    for i, img in enumerate(bg_data):
+        tiff.imwrite(os.path.join(bg_path, f"State{i}.tif"), img)
+
+    recon = initialize_reconstructor(
+        "birefringence",
+        image_dim=(Y, X),
+        swing=0.1,
+        calibration_scheme="5-State",
+        bg_correction="global",
+        **reconstructor_args,
+    )
+    assert read_bg_stokes(bg_path, Y, X, "5-State", 0.1) is None
+
+    bg_stokes = load_bg_stokes(bg_path, recon, Y, X, "5-State", 0.1)
+    cached = read_bg_stokes(bg_path, Y, X, "5-State", 0.1)
+    assert np.array_equal(cached, bg_stokes)
+    assert np.array_equal(
+        load_bg_stokes(bg_path, recon, Y, X, "5-State", 0.1), bg_stokes
+    )
+
+    # different settings or updated background images invalidate the cache
+    assert read_bg_stokes(bg_path, Y, X, "5-State", 0.05) is None
+    assert read_bg_stokes(bg_path, Y, X, "4-State", 0.1) is None
+    os.utime(os.path.join(bg_path, "State0.tif"), (0, 0))
+    assert read_bg_stokes(bg_path, Y, X, "5-State", 0.1) is None
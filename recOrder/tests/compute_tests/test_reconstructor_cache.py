@@ -0,0 +1,109 @@
+import os
+import numpy as np
+from recOrder.compute.reconstructor_cache import (
+    ReconstructorCache,
+    reconstructor_key,
+)
+from recOrder.compute.reconstructor_registry import ReconstructorRegistry
+
+
+class DummyReconstructor:
+    def __init__(self, img_dim, NA_obj):
+        self.img_dim = img_dim
+        self.NA_obj = NA_obj
+        self.transfer_function = np.random.rand(*img_dim, 8) + 1j
+        self.small_array = np.arange(4)
+
+
+def test_reconstructor_key():
+    key = reconstructor_key(
+        DummyReconstructor, img_dim=(256, 256), NA_obj=0.4
+    )
+
+    assert key == reconstructor_key(
+        DummyReconstructor, NA_obj=0.4, img_dim=(256, 256)
+    )
+    assert key != reconstructor_key(
+        DummyReconstructor, img_dim=(256, 256), NA_obj=0.5
+    )
+    assert key != reconstructor_key(
+        DummyReconstructor,
+        img_dim=(256, 256),
+        NA_obj=0.4,
+        z_defocus=np.arange(3),
+    )
+
+
+def test_cache_roundtrip(setup_data_save_folder):
+    cache = ReconstructorCache(os.path.join(setup_data_save_folder, "cache"))
+    recon = DummyReconstructor((256, 256), 0.4)
+    key = reconstructor_key(
+        DummyReconstructor, img_dim=(256, 256), NA_obj=0.4
+    )
+
+    assert cache.load(key, DummyReconstructor) is None
+    assert cache.save(key, recon)
+
+    cached = cache.load(key, DummyReconstructor)
+    assert isinstance(cached, DummyReconstructor)
+    assert cached.img_dim == recon.img_dim
+    assert isinstance(cached.transfer_function, np.memmap)
+    assert np.array_equal(cached.transfer_function, recon.transfer_function)
+    assert np.array_equal(cached.small_array, recon.small_array)
+
+
+def test_cache_eviction(setup_data_save_folder):
+    # each entry is 256 * 256 * 8 * 16 bytes = 8 MiB
+    cache = ReconstructorCache(
+        os.path.join(setup_data_save_folder, "cache"), max_size_gb=20 / 1024
+    )
+
+    keys = []
+    for i, na in enumerate([0.1, 0.2, 0.3]):
+        key = reconstructor_key(
+            DummyReconstructor, img_dim=(256, 256), NA_obj=na
+        )
+        cache.save(key, DummyReconstructor((256, 256), na))
+        keys.append(key)
+        if i < 2:
+            # make access order independent of the file system time resolution
+            os.utime(os.path.join(cache.cache_dir, key), (i + 1, i + 1))
+
+    cached_keys = [key for key, _, _ in cache.entries()]
+    assert keys[0] not in cached_keys
+    assert keys[1:] == cached_keys
+
+
+def test_reconstructor_registry():
+    registry = ReconstructorRegistry()
+    params = {
+        "image_dim": (16, 16),
+        "calibration_scheme": "5-State",
+        "wavelength_nm": 532,
+        "swing": 0.1,
+        "n_slices": 1,
+    }
+
+    recon = registry.get("birefringence", bg_correction="None", **params)
+    assert (
+        registry.get("birefringence", bg_correction="None", **params) is recon
+    )
+    assert registry.n_computed == 1
+
+    # the background option is part of the fingerprint
+    recon_bg = registry.get("birefringence", bg_correction="global", **params)
+    assert recon_bg is not recon
+    assert len(registry) == 2
+
+    # entries requested after an invalidation are kept, the others are released
+    registry.invalidate()
+    assert (
+        registry.get("birefringence", bg_correction="None", **params) is recon
+    )
+    registry.get("birefringence", bg_correction="local", **params)
+    assert len(registry) == 2
+    assert registry.n_computed == 3
+
+    registry.memoize("bg_stokes", lambda: 0, path="BG")
+    registry.discard("bg_stokes")
+    assert registry.memoize("bg_stokes", lambda: 1, path="BG") == 1
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+from recOrder.compute.phantoms import bf_3D_from_phantom
+from recOrder.compute.reconstructions import (
+    initialize_reconstructor,
+    reconstruct_phase3D,
+)
+from recOrder.compute.tiled_reconstruction import (
+    blend_weights,
+    phase_halo_px,
+    reconstruct_phase3D_tiled,
+)
+
+reconstructor_args = {
+    "mag": 20,
+    "pixel_size_um": 6.5,
+    "z_step_um": 2,
+    "wavelength_nm": 532,
+    "NA_obj": 0.4,
+    "NA_illu": 0.2,
+    "n_obj_media": 1.0,
+    "pad_z": 5,
+}
+
+
+@pytest.mark.parametrize(
+    "length, tile_size, halo", [(512, 256, 32), (1000, 300, 20), (100, 256, 8)]
+)
+def test_blend_weights(length, tile_size, halo):
+    total = np.zeros(length)
+    for start, weight in blend_weights(length, tile_size, halo):
+        total[start : start + len(weight)] += weight
+
+    assert np.allclose(total, 1)
+
+
+def test_phase3D_tiled():
+    data = bf_3D_from_phantom()
+    Z, Y, X = data.shape
+
+    recon = initialize_reconstructor(
+        "PhaseFromBF", image_dim=(Y, X), n_slices=Z, **reconstructor_args
+    )
+    phase3D = reconstruct_phase3D(data, recon, reg_re=1e-2)
+    tiled = reconstruct_phase3D_tiled(
+        data, reconstructor_args, tile_size=320, reg_re=1e-2
+    )
+
+    assert tiled.shape == phase3D.shape
+    # tiles are normalized and regularized separately, their interior matches
+    # the full-field reconstruction up to a bounded error
+    halo = phase_halo_px(n_slices=Z, **reconstructor_args)
+    interior = (slice(None), slice(halo, Y - halo), slice(halo, X - halo))
+    error = np.linalg.norm(tiled[interior] - phase3D[interior])
+    assert error / np.linalg.norm(phase3D[interior]) < 0.1
+    assert (
+        np.corrcoef(tiled[interior].ravel(), phase3D[interior].ravel())[0, 1]
+        > 0.999
+    )
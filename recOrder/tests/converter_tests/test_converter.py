@@ -1,10 +1,33 @@
 import os
 import shutil
+import itertools
+import pytest
 import zarr
 from tifffile import TiffFile
 from waveorder.io import WaveorderReader, WaveorderWriter
 import numpy as np
-from recOrder.io.zarr_converter import ZarrConverter
+from recOrder.io.zarr_converter import (
+    ZarrConverter,
+    verify_checksums,
+    get_chunk_profile,
+    CHECKSUM_KEY,
+    CHUNK_PROFILES,
+)
+from recOrder.io.conversion_journal import ConversionJournal
+from recOrder.io.histograms import ChannelHistograms, CLIM_CLIP
+from recOrder.io.chunk_benchmark import benchmark_chunk_profiles
+from recOrder.io.plane_metadata import (
+    PlaneMetadataReader,
+    PlaneMetadataWriter,
+)
+from recOrder.io.tiff_index import TiffIndex
+from recOrder.io._reader import ome_zarr_reader
+from recOrder.io.utils import (
+    create_grid_from_coordinates,
+    default_hcs_metadata,
+    init_position_arrays,
+)
+from recOrder.io.layout_benchmark import synthetic_position_list
 
 
 def test_ometiff_converter_initialize(
@@ -64,7 +87,7 @@ def test_ometiff_converter_run(setup_data_save_folder, get_ometiff_data_dir):
 
     assert os.path.exists(
         os.path.join(
-            save_folder, "2T_3P_16Z_128Y_256X_Kazansky_ImagePlaneMetadata.txt"
+            save_folder, "2T_3P_16Z_128Y_256X_Kazansky_ImagePlaneMetadata.zarr"
         )
     )
 
@@ -145,7 +168,7 @@ def test_pycromanager_converter_run(
     assert os.path.exists(
         os.path.join(
             save_folder,
-            "mm2.0-20210713_pm0.13.2_2p_3t_2c_7z_1_ImagePlaneMetadata.txt",
+            "mm2.0-20210713_pm0.13.2_2p_3t_2c_7z_1_ImagePlaneMetadata.zarr",
         )
     )
 
@@ -160,3 +183,473 @@ def test_pycromanager_converter_run(
                     wo_image = wo_dataset.get_image(p, t, c, z)
                     assert np.array_equal(image, wo_image)
                     cnt += 1
+
+
+def test_converter_write_units(setup_data_save_folder, get_ometiff_data_dir):
+
+    folder, ometiff_data = get_ometiff_data_dir
+    save_folder = setup_data_save_folder
+
+    input = ometiff_data
+    output = os.path.join(save_folder, "2T_3P_16Z_128Y_256X_Kazansky.zarr")
+
+    if os.path.exists(output):
+        shutil.rmtree(output)
+
+    converter = ZarrConverter(input, output, num_workers=2)
+    units = converter._gen_write_units()
+
+    # every image is written exactly once, one plane per chunk
+    assert len(units) == len(converter.coords)
+    assert sorted(coord for unit in units for coord in unit) == sorted(
+        converter.coords
+    )
+
+
+@pytest.mark.parametrize("dtype", [np.uint16, np.uint32, np.float32])
+def test_channel_histograms(dtype):
+    rng = np.random.default_rng(0)
+    images = rng.integers(0, 4000, (4, 64, 64)).astype(dtype)
+    if dtype == np.uint32:
+        # a count per value up to 2**32 would not fit in memory
+        images[0, 0, 0] = 2**32 - 1
+    histograms = ChannelHistograms(len(images))
+    for image in images:
+        histograms.add(0, 0, image)
+
+    expected = np.percentile(images, [CLIM_CLIP * 100, (1 - CLIM_CLIP) * 100])
+    if dtype == np.uint16:
+        assert np.allclose(histograms.clims(0, 0), expected)
+    else:
+        # images of other dtypes are subsampled
+        assert np.allclose(histograms.clims(0, 0), expected, rtol=0.05)
+
+
+def test_get_chunk_profile():
+
+    # images larger than the tiles of the tile-512 profile
+    data_shape = (2, 3, 16, 1024, 1536)
+    chunks = {
+        profile: get_chunk_profile(profile, data_shape)[0]
+        for profile in CHUNK_PROFILES
+    }
+    assert chunks == {
+        "plane": (1, 1, 1, 1024, 1536),
+        "zstack": (1, 1, 16, 1024, 1536),
+        "tile-512": (1, 1, 16, 512, 512),
+        "plane-lz4": (1, 1, 1, 1024, 1536),
+    }
+    assert get_chunk_profile("plane-lz4", data_shape)[1].cname == "lz4"
+
+    # tiles are clipped to smaller images
+    chunk_size, _ = get_chunk_profile("tile-512", (1, 1, 4, 128, 256))
+    assert chunk_size == (1, 1, 4, 128, 256)
+
+    with pytest.raises(ValueError):
+        get_chunk_profile("tile-1024", data_shape)
+
+
+@pytest.mark.parametrize(
+    "chunk_profile,chunk_size",
+    [("plane", (1, 1, 1, 128, 256)), ("zstack", (1, 1, 16, 128, 256))],
+)
+def test_converter_chunk_profiles(
+    setup_data_save_folder, get_ometiff_data_dir, chunk_profile, chunk_size
+):
+
+    folder, ometiff_data = get_ometiff_data_dir
+    save_folder = setup_data_save_folder
+
+    input = ometiff_data
+    output = os.path.join(save_folder, "2T_3P_16Z_128Y_256X_Kazansky.zarr")
+
+    if os.path.exists(output):
+        shutil.rmtree(output)
+
+    converter = ZarrConverter(input, output, chunk_profile=chunk_profile)
+    assert converter.chunk_size == chunk_size
+    converter.run_conversion()
+
+    zs = zarr.open(output, "r")
+    array = zs["Row_0"]["Col_0"]["Pos_000"]["arr_0"]
+    assert array.chunks == chunk_size
+    tf = TiffFile(
+        os.path.join(
+            ometiff_data, "2T_3P_16Z_128Y_256X_Kazansky_1_MMStack_Pos0.ome.tif"
+        )
+    )
+    assert np.array_equal(array[0, 0, 0], tf.pages.get(0).asarray())
+    tf.close()
+
+    results = benchmark_chunk_profiles(input, [chunk_profile])
+    assert results[0]["profile"] == chunk_profile
+    assert results[0]["compression_ratio"] > 1
+
+
+def test_converter_checksums(setup_data_save_folder, get_ometiff_data_dir):
+
+    folder, ometiff_data = get_ometiff_data_dir
+    save_folder = setup_data_save_folder
+
+    input = ometiff_data
+    output = os.path.join(save_folder, "2T_3P_16Z_128Y_256X_Kazansky.zarr")
+
+    if os.path.exists(output):
+        shutil.rmtree(output)
+
+    converter = ZarrConverter(input, output, verify="full")
+    converter.run_conversion()
+
+    mismatches, n_checked = verify_checksums(output)
+    assert n_checked == 2 * 3 * 16 * 4
+    assert mismatches == []
+
+    # corrupt one image
+    array = zarr.open(output, "r+")["Row_0"]["Col_1"]["Pos_001"]["arr_0"]
+    array[1, 2, 3] = array[1, 2, 3] + 1
+    mismatches, _ = verify_checksums(output)
+    assert mismatches == [("Row_0/Col_1/Pos_001", 1, 2, 3)]
+
+
+def test_converter_resume(setup_data_save_folder, get_ometiff_data_dir):
+
+    folder, ometiff_data = get_ometiff_data_dir
+    save_folder = setup_data_save_folder
+
+    input = ometiff_data
+    output = os.path.join(save_folder, "2T_3P_16Z_128Y_256X_Kazansky.zarr")
+
+    if os.path.exists(output):
+        shutil.rmtree(output)
+
+    # simulate a crash after 100 chunks
+    converter = ZarrConverter(input, output)
+    write_unit = converter._write_unit
+    n_writes = itertools.count()
+
+    def crashing_write_unit(unit, images):
+        if next(n_writes) >= 100:
+            raise RuntimeError("Simulated crash")
+        write_unit(unit, images)
+
+    converter._write_unit = crashing_write_unit
+    with pytest.raises(RuntimeError):
+        converter.run_conversion()
+
+    converter = ZarrConverter(input, output, resume=True)
+    assert converter.resume
+    converter.run_conversion()
+
+    zs = zarr.open(output, "r")
+    for p in range(3):
+        tf = TiffFile(
+            os.path.join(
+                ometiff_data,
+                f"2T_3P_16Z_128Y_256X_Kazansky_1_MMStack_Pos{p}.ome.tif",
+            )
+        )
+        array = zs["Row_0"][f"Col_{p}"][f"Pos_00{p}"]["arr_0"]
+        cnt = 0
+        for t in range(2):
+            for z in range(16):
+                for c in range(4):
+                    assert np.array_equal(
+                        array[t, c, z], tf.pages.get(cnt).asarray()
+                    )
+                    cnt += 1
+        tf.close()
+
+    # every image has its image-plane metadata
+    metadata = PlaneMetadataReader(
+        os.path.join(
+            save_folder, "2T_3P_16Z_128Y_256X_Kazansky_ImagePlaneMetadata.zarr"
+        )
+    )
+    values = metadata.query([CHECKSUM_KEY])
+    assert len(values["p"]) == 2 * 3 * 16 * 4
+    assert np.all(np.isfinite(values[CHECKSUM_KEY]))
+
+    # the journal and the tiff index are deleted once the conversion completes
+    assert not os.path.exists(converter.journal_file)
+    assert not os.path.exists(converter.index_file)
+
+
+def test_converter_failed_verification(
+    setup_data_save_folder, get_ometiff_data_dir
+):
+
+    folder, ometiff_data = get_ometiff_data_dir
+    save_folder = setup_data_save_folder
+
+    input = ometiff_data
+    output = os.path.join(save_folder, "2T_3P_16Z_128Y_256X_Kazansky.zarr")
+
+    if os.path.exists(output):
+        shutil.rmtree(output)
+
+    # simulate a mismatch of the 50th chunk
+    converter = ZarrConverter(input, output)
+    verify_unit = converter._verify_unit
+    n_verifications = itertools.count()
+    failed = []
+
+    def failing_verify_unit(unit, checksums):
+        if next(n_verifications) == 50:
+            failed.extend(converter._reorder_coord(coord) for coord in unit)
+            raise ValueError("Simulated mismatch")
+        verify_unit(unit, checksums)
+
+    converter._verify_unit = failing_verify_unit
+    with pytest.raises(ValueError):
+        converter.run_conversion()
+
+    # the chunk isn't journaled, a resumed conversion converts it again
+    completed = ConversionJournal(converter.journal_file).completed()
+    assert failed
+    assert not any(coord in completed for coord in failed)
+
+
+def test_plane_metadata_query(setup_data_save_folder, get_ometiff_data_dir):
+
+    folder, ometiff_data = get_ometiff_data_dir
+    save_folder = setup_data_save_folder
+
+    input = ometiff_data
+    output = os.path.join(save_folder, "2T_3P_16Z_128Y_256X_Kazansky.zarr")
+
+    if os.path.exists(output):
+        shutil.rmtree(output)
+
+    converter = ZarrConverter(input, output)
+    converter.run_conversion()
+
+    metadata = PlaneMetadataReader(
+        os.path.join(
+            save_folder, "2T_3P_16Z_128Y_256X_Kazansky_ImagePlaneMetadata.zarr"
+        )
+    )
+    assert "ZPositionUm" in metadata.keys
+
+    values = metadata.query(["ZPositionUm"], p=1)
+    assert len(values["ZPositionUm"]) == 2 * 16 * 4
+    assert np.all(values["p"] == 1)
+
+    values = metadata.query(["ZPositionUm"], p=2, t=1, c=0, z=3)
+    assert len(values["ZPositionUm"]) == 1
+    assert (values["t"][0], values["c"][0], values["z"][0]) == (1, 0, 3)
+
+
+def test_plane_metadata_nested(setup_data_save_folder):
+
+    path = os.path.join(
+        setup_data_save_folder, "Nested_ImagePlaneMetadata.zarr"
+    )
+    writer = PlaneMetadataWriter(path, (1, 2, 1, 2))
+    for t, z in itertools.product(range(2), range(2)):
+        metadata = {"ZPositionUm": float(z), "Camera": {"Binning": t + 1}}
+        if t == 1:
+            # keys that first appear in a later flush
+            metadata["Stage"] = {"XY/Position": [t, z]}
+        writer.append((0, t, 0, z), metadata)
+        if z == 1:
+            writer.flush()
+
+    metadata = PlaneMetadataReader(path)
+    assert {"Camera.Binning", "Stage.XY_Position"} <= set(metadata.keys)
+
+    values = metadata.query(["Camera.Binning", "Stage.XY_Position"])
+    assert len(values["p"]) == len(values["Camera.Binning"]) == 4
+    assert list(values["Camera.Binning"]) == [1, 1, 2, 2]
+    assert list(values["Stage.XY_Position"]) == ["", "", "[1, 0]", "[1, 1]"]
+
+
+def test_plane_metadata_resume(setup_data_save_folder):
+    path = os.path.join(
+        setup_data_save_folder, "Resumed_ImagePlaneMetadata.zarr"
+    )
+    writer = PlaneMetadataWriter(path, (1, 1, 1, 4))
+    for z in range(3):
+        writer.append((0, 0, 0, z), {"ZPositionUm": float(z), "Run": "1"})
+    writer.flush()
+
+    # the conversion is resumed from plane 1, planes 1 and 2 are written again
+    writer = PlaneMetadataWriter(path, (1, 1, 1, 4), resume=True)
+    for z in range(1, 4):
+        writer.append((0, 0, 0, z), {"ZPositionUm": float(z), "Run": "2"})
+    writer.flush()
+
+    metadata = PlaneMetadataReader(path)
+    assert metadata.columns["Run"].shape == (4,)
+    values = metadata.query(["ZPositionUm", "Run"])
+    assert list(values["z"]) == [0, 1, 2, 3]
+    assert list(values["ZPositionUm"]) == [0, 1, 2, 3]
+    assert list(values["Run"]) == ["1", "2", "2", "2"]
+
+
+def test_tiff_index(setup_data_save_folder, get_ometiff_data_dir):
+
+    folder, ometiff_data = get_ometiff_data_dir
+    index_path = os.path.join(setup_data_save_folder, "TiffIndex.npz")
+    if os.path.exists(index_path):
+        os.remove(index_path)
+
+    index = TiffIndex.load_or_build(ometiff_data, index_path)
+    assert os.path.exists(index_path)
+    assert len(index) == 2 * 3 * 16 * 4
+
+    reader = WaveorderReader(ometiff_data, extract_data=False)
+    assert set(index.lookup) == set(reader.reader.coord_map)
+    for p, t, c, z in [(0, 0, 0, 0), (1, 1, 2, 7), (2, 1, 3, 15)]:
+        assert np.array_equal(
+            index.get_image(p, t, c, z), reader.get_image(p, t, c, z)
+        )
+        file, page = reader.reader.coord_map[(p, t, c, z)][:2]
+        with TiffFile(file) as tf:
+            assert (
+                index.get_metadata(p, t, c, z)
+                == tf.pages[page].tags["MicroManagerMetadata"].value
+            )
+
+    # the saved index is reused until the tiff files change
+    loaded = TiffIndex.load(ometiff_data, index_path)
+    assert np.array_equal(loaded.entries, index.entries)
+    file = reader.reader.coord_map[(0, 0, 0, 0)][0]
+    os.utime(file)
+    assert TiffIndex.load(ometiff_data, index_path) is None
+
+
+def test_converter_sharded(setup_data_save_folder, get_ometiff_data_dir):
+
+    folder, ometiff_data = get_ometiff_data_dir
+    save_folder = setup_data_save_folder
+
+    input = ometiff_data
+    output = os.path.join(save_folder, "2T_3P_16Z_128Y_256X_Kazansky.zarr")
+
+    if os.path.exists(output):
+        shutil.rmtree(output)
+
+    converter = ZarrConverter(input, output, shards="time")
+    converter.run_conversion()
+
+    # one shard per position and timepoint instead of one file per image
+    shards = [
+        file
+        for _, _, files in os.walk(output)
+        for file in files
+        if file.endswith(".shard")
+    ]
+    assert 2 * 3 <= len(shards) < 2 * 3 * 16 * 4
+
+    arrays = ome_zarr_reader(output)
+    assert len(arrays) == 3
+    for p, (array, meta) in enumerate(arrays):
+        tf = TiffFile(
+            os.path.join(
+                ometiff_data,
+                f"2T_3P_16Z_128Y_256X_Kazansky_1_MMStack_Pos{p}.ome.tif",
+            )
+        )
+        assert array.shape == (2, 4, 16, 128, 256)
+        assert np.array_equal(array[0, 0, 0], tf.pages.get(0).asarray())
+        assert np.array_equal(array[1, 3, 15], tf.pages.get(127).asarray())
+        tf.close()
+
+    mismatches, n_checked = verify_checksums(output)
+    assert not mismatches
+    assert n_checked == 2 * 3 * 16 * 4
+
+
+@pytest.mark.parametrize("clim_mode", ["focus", "stack"])
+def test_converter_clims(
+    setup_data_save_folder, get_ometiff_data_dir, clim_mode
+):
+
+    folder, ometiff_data = get_ometiff_data_dir
+    output = os.path.join(
+        setup_data_save_folder, "2T_3P_16Z_128Y_256X_Kazansky.zarr"
+    )
+    if os.path.exists(output):
+        shutil.rmtree(output)
+
+    converter = ZarrConverter(ometiff_data, output, clim_mode=clim_mode)
+    converter.run_conversion()
+
+    zarr_data = zarr.open(output, "r")
+    for pos in range(3):
+        group = zarr_data[f"Row_0/Col_{pos}/Pos_{pos:03d}"]
+        channels = group.attrs["omero"]["channels"]
+        for chan, channel in enumerate(channels):
+            images = (
+                group["arr_0"][0, chan, 8]
+                if clim_mode == "focus"
+                else group["arr_0"][:, chan]
+            )
+            window = channel["window"]
+            assert np.isclose(window["start"], np.percentile(images, 1))
+            assert np.isclose(window["end"], np.percentile(images, 99))
+
+
+def test_create_grid_from_coordinates():
+
+    rows, columns = 7, 5
+    xy_coords = synthetic_position_list(rows, columns, seed=1)
+    grid = create_grid_from_coordinates(xy_coords, rows, columns)
+
+    assert grid.shape == (rows, columns)
+    for row, col in itertools.product(range(rows), range(columns)):
+        assert xy_coords[grid[row, col]] == (col * 100.0, row * 100.0)
+
+
+def test_default_hcs_layout(tmp_path):
+
+    n_pos = 4
+    data_shape = (2, 3, 4, 8, 16)
+    chan_names = ["State0", "State1", "State2"]
+    clims = [[(pos, 100 + c) for c in range(3)] for pos in range(n_pos)]
+
+    # position by position w/ waveorder's default writer
+    writer = WaveorderWriter(str(tmp_path))
+    writer.create_zarr_root("Dataset.zarr")
+    for pos in range(n_pos):
+        writer.init_array(
+            pos,
+            data_shape=data_shape,
+            chunk_size=(1, 1, 1, 8, 16),
+            chan_names=chan_names,
+            clims=clims[pos],
+            dtype="uint16",
+        )
+
+    # in one pass
+    os.mkdir(tmp_path / "bulk")
+    bulk_writer = WaveorderWriter(
+        str(tmp_path / "bulk"),
+        hcs=True,
+        hcs_meta=default_hcs_metadata(
+            [f"Pos_{pos:03d}" for pos in range(n_pos)], "Dataset"
+        ),
+    )
+    bulk_writer.create_zarr_root("Dataset.zarr")
+    groups, arrays = init_position_arrays(
+        bulk_writer,
+        data_shape=data_shape,
+        chunk_size=(1, 1, 1, 8, 16),
+        chan_names=chan_names,
+        dtype="uint16",
+        clims=clims,
+    )
+
+    expected = zarr.open(str(tmp_path / "Dataset.zarr"), "r")
+    result = zarr.open(str(tmp_path / "bulk" / "Dataset.zarr"), "r")
+    assert result.attrs.asdict() == expected.attrs.asdict()
+    for pos, group in enumerate(groups):
+        path = f"Row_0/Col_{pos}/Pos_{pos:03d}"
+        assert group.path == path
+        assert (
+            result[f"Row_0/Col_{pos}"].attrs.asdict()
+            == expected[f"Row_0/Col_{pos}"].attrs.asdict()
+        )
+        assert result[path].attrs.asdict() == expected[path].attrs.asdict()
+        assert arrays[pos].shape == expected[path]["arr_0"].shape
+        assert arrays[pos].chunks == expected[path]["arr_0"].chunks